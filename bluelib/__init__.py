@@ -1,5 +1,6 @@
 # -*- coding: utf-8 -*-
 
+import os
 import sys
 import platform
 import pathlib
@@ -8,12 +9,34 @@ _module_path = pathlib.Path(__file__).parent.parent
 if str(_module_path) not in sys.path:
 	sys.path.append(str(_module_path))
 
-if platform.system() == "Windows":
-	import bleak
-	from bleak.backends.dotnet.discovery import discover as scan
-	from bluelib.windowslib.client import BleClient
 
+def use_backend(name: str = None):
+	"""Select the backend behind ``bluelib.BleClient``, ``bluelib.scan`` and
+	``bluelib.scan_stream``.
 
-if platform.system() == "Linux":
-	from bluelib.linux.scan import scan
-	from bluelib.linux.client import BleClient
+	Args:
+		name (str): ``"sim"`` for the in-process simulated backend, or None
+			for the native backend of the running platform. Defaults to the
+			``BLUELIB_BACKEND`` environment variable.
+
+	"""
+	global BleClient, scan, scan_stream
+
+	if name is None:
+		name = os.environ.get("BLUELIB_BACKEND", "")
+
+	if name.lower() == "sim":
+		from bluelib.sim import BleClient, scan, scan_stream
+
+	elif platform.system() == "Windows":
+		import bleak
+		from bleak.backends.dotnet.discovery import discover as scan
+		from bluelib.windowslib.scan import scan_stream
+		from bluelib.windowslib.client import BleClient
+
+	elif platform.system() == "Linux":
+		from bluelib.linux.scan import scan, scan_stream
+		from bluelib.linux.client import BleClient
+
+
+use_backend()
@@ -0,0 +1,281 @@
+# -*- coding: utf-8 -*-
+"""
+Advertisement events, scan filters and the bounded streams the backend
+scanners feed.
+"""
+
+import asyncio
+import collections
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+BASE_UUID = "-0000-1000-8000-00805f9b34fb"
+
+
+def full_uuid(uuid) -> str:
+	"""Expand a 16 or 32 bit uuid to its 128 bit string form."""
+	if isinstance(uuid, int):
+		uuid = "%08x" % uuid
+	uuid = str(uuid).lower()
+	if len(uuid) <= 8:
+		return "%08x" % int(uuid, 16) + BASE_UUID
+	return uuid
+
+
+# AD types of the advertising data
+AD_INCOMPLETE_16B_SERVICES      = 0x02
+AD_COMPLETE_16B_SERVICES        = 0x03
+AD_INCOMPLETE_32B_SERVICES      = 0x04
+AD_COMPLETE_32B_SERVICES        = 0x05
+AD_INCOMPLETE_128B_SERVICES     = 0x06
+AD_COMPLETE_128B_SERVICES       = 0x07
+AD_SHORT_LOCAL_NAME             = 0x08
+AD_COMPLETE_LOCAL_NAME          = 0x09
+AD_SERVICE_DATA_16B             = 0x16
+AD_SERVICE_DATA_32B             = 0x20
+AD_SERVICE_DATA_128B            = 0x21
+AD_MANUFACTURER                 = 0xFF
+
+_SERVICE_LISTS = {AD_INCOMPLETE_16B_SERVICES: 2, AD_COMPLETE_16B_SERVICES: 2,
+	AD_INCOMPLETE_32B_SERVICES: 4, AD_COMPLETE_32B_SERVICES: 4,
+	AD_INCOMPLETE_128B_SERVICES: 16, AD_COMPLETE_128B_SERVICES: 16}
+_SERVICE_DATA = {AD_SERVICE_DATA_16B: 2, AD_SERVICE_DATA_32B: 4, AD_SERVICE_DATA_128B: 16}
+
+
+def _uuid_from_le(raw: bytes) -> str:
+	if len(raw) <= 4:
+		return full_uuid(int.from_bytes(raw, "little"))
+	h = raw[::-1].hex()
+	return f"{h[:8]}-{h[8:12]}-{h[12:16]}-{h[16:20]}-{h[20:]}"
+
+
+def decode_ad(ad: dict) -> dict:
+	"""Decode raw AD structures (AD type -> bytes) into :class:`Advertisement` fields."""
+	fields = {"name": None, "service_uuids": [], "manufacturer_data": {}, "service_data": {}}
+
+	for t, raw in ad.items():
+		raw = bytes(raw)
+		if t == AD_COMPLETE_LOCAL_NAME or (t == AD_SHORT_LOCAL_NAME and fields["name"] is None):
+			fields["name"] = raw.decode("utf-8", errors="replace")
+		elif t in _SERVICE_LISTS:
+			n = _SERVICE_LISTS[t]
+			fields["service_uuids"] += [_uuid_from_le(raw[i:i+n]) for i in range(0, len(raw) - n + 1, n)]
+		elif t in _SERVICE_DATA:
+			n = _SERVICE_DATA[t]
+			if len(raw) >= n:
+				fields["service_data"][_uuid_from_le(raw[:n])] = raw[n:]
+		elif t == AD_MANUFACTURER:
+			if len(raw) >= 2:
+				fields["manufacturer_data"][int.from_bytes(raw[:2], "little")] = raw[2:]
+
+	return fields
+
+
+class Advertisement(object):
+	"""One advertising (or scan response) report of a device.
+
+	``manufacturer_data`` maps company identifiers to payloads and
+	``service_data`` maps 128 bit service uuid strings to payloads.
+	"""
+
+	__slots__ = ("address", "addrType", "rssi", "name", "service_uuids",
+		"manufacturer_data", "service_data", "connectable", "timestamp")
+
+	def __init__(self, address: str, addrType: str = "public", rssi: int = None, name: str = None,
+		service_uuids=(), manufacturer_data: dict = None, service_data: dict = None,
+		connectable: bool = True, timestamp: float = None):
+		self.address = address.lower()
+		self.addrType = addrType
+		self.rssi = rssi
+		self.name = name
+		self.service_uuids = tuple(service_uuids)
+		self.manufacturer_data = manufacturer_data or {}
+		self.service_data = service_data or {}
+		self.connectable = connectable
+		self.timestamp = timestamp if timestamp is not None else time.monotonic()
+
+	def payload(self) -> tuple:
+		"""Everything but rssi and time, used to tell repeated reports apart."""
+		return (self.name, self.service_uuids,
+			tuple(sorted(self.manufacturer_data.items())),
+			tuple(sorted(self.service_data.items())))
+
+	def to_dict(self) -> dict:
+		return {"address": self.address, "name": self.name, "rssi": self.rssi}
+
+	def __repr__(self):
+		return f"Advertisement({self.address}, name={self.name!r}, rssi={self.rssi})"
+
+
+class ScanFilter(object):
+	"""Matches advertisements; every criterion that is set has to match.
+
+	Args:
+		address_prefix (str): Start of the device address, e.g. ``"c0:d0"``.
+		name (str): Text contained in the local name.
+		service_uuid (str or int): Service uuid listed in the services or
+			service data of the advertisement.
+		manufacturer_id (int): Company identifier of the manufacturer data.
+
+	"""
+
+	__slots__ = ("address_prefix", "name", "service_uuid", "manufacturer_id")
+
+	def __init__(self, address_prefix: str = None, name: str = None, service_uuid=None, manufacturer_id: int = None):
+		self.address_prefix = address_prefix.replace("-", ":").lower() if address_prefix else None
+		self.name = name
+		self.service_uuid = full_uuid(service_uuid) if service_uuid is not None else None
+		self.manufacturer_id = manufacturer_id
+
+	def match_address(self, address: str) -> bool:
+		return self.address_prefix is None or address.startswith(self.address_prefix)
+
+	def match(self, adv: Advertisement) -> bool:
+		if not self.match_address(adv.address):
+			return False
+		if self.name is not None and (adv.name is None or self.name not in adv.name):
+			return False
+		if self.service_uuid is not None and (self.service_uuid not in adv.service_uuids
+			and self.service_uuid not in adv.service_data):
+			return False
+		if self.manufacturer_id is not None and self.manufacturer_id not in adv.manufacturer_data:
+			return False
+		return True
+
+
+def _filters(filters) -> tuple:
+	if filters is None:
+		return ()
+	if isinstance(filters, ScanFilter):
+		return (filters,)
+	return tuple(filters)
+
+
+class SeenTable(object):
+	"""Last payload of the most recently seen devices, in LRU order.
+
+	Holds at most ``maxsize`` devices so long scans in busy places do not
+	grow without bound; evicted devices are reported again when they are
+	seen next.
+	"""
+
+	DEFAULT_MAXSIZE = 1024
+
+	def __init__(self, maxsize=DEFAULT_MAXSIZE, refresh=None):
+		self.maxsize = maxsize
+		self.refresh = refresh
+		self._table = collections.OrderedDict()
+
+	def __len__(self) -> int:
+		return len(self._table)
+
+	def is_new(self, adv: Advertisement) -> bool:
+		"""Record ``adv`` and tell if it has to be reported: the device is new,
+		its payload changed or it was last reported ``refresh`` seconds ago."""
+		payload = adv.payload()
+		last = self._table.get(adv.address, None)
+
+		if last is not None:
+			self._table.move_to_end(adv.address)
+			if last[0] == payload and (self.refresh is None or adv.timestamp - last[1] < self.refresh):
+				return False
+
+		self._table[adv.address] = (payload, adv.timestamp)
+		if len(self._table) > self.maxsize:
+			self._table.popitem(last=False)
+		return True
+
+
+class ScanStream(object):
+	"""Deduplicated advertisements of one scan consumer, consumed with ``async for``.
+
+	Scanners call :meth:`offer` from their delegate, which may run on a
+	worker thread. Filtering and deduplication happen right there, so only
+	reports the consumer asked for reach the event loop. The queue holds at
+	most ``maxsize`` events and drops the oldest one when it is full.
+	"""
+
+	DEFAULT_MAXSIZE = 256
+
+	def __init__(self, loop, filters=None, seen=SeenTable.DEFAULT_MAXSIZE, refresh=None,
+		maxsize=DEFAULT_MAXSIZE):
+		self.loop = loop
+		self.filters = _filters(filters)
+		self.seen = SeenTable(seen, refresh)
+		self.maxsize = maxsize
+		self.dropped = 0
+
+		self._queue = collections.deque()
+		self._readable = asyncio.Event()
+		self._closed = False
+		self._error = None
+
+	def match_address(self, address: str) -> bool:
+		"""Cheap pre-check a scanner can run before decoding a report."""
+		return not self.filters or any(f.match_address(address) for f in self.filters)
+
+	def offer(self, adv: Advertisement, threadsafe: bool = True):
+		if self._closed:
+			return
+		if self.filters and not any(f.match(adv) for f in self.filters):
+			return
+		if not self.seen.is_new(adv):
+			return
+
+		if threadsafe:
+			self.loop.call_soon_threadsafe(self._put, adv)
+		else:
+			self._put(adv)
+
+	def _put(self, adv: Advertisement):
+		if self._closed:
+			return
+		if len(self._queue) >= self.maxsize:
+			self._queue.popleft()
+			self.dropped += 1
+		self._queue.append(adv)
+		self._readable.set()
+
+	def close(self, error: Exception = None):
+		"""End the stream once the queued events are consumed, raising ``error`` if given."""
+		self._closed = True
+		self._error = error
+		self._readable.set()
+
+	def __aiter__(self):
+		return self
+
+	async def __anext__(self) -> Advertisement:
+		while not self._queue:
+			if self._closed:
+				if self._error is not None:
+					raise self._error
+				raise StopAsyncIteration
+			self._readable.clear()
+			await self._readable.wait()
+		return self._queue.popleft()
+
+
+async def collect(stream, timeout: float) -> list:
+	"""Drain an advertisement generator for ``timeout`` seconds and close it.
+
+	Returns:
+		(list) The last advertisement of every device seen, in order of discovery.
+
+	"""
+	devices = collections.OrderedDict()
+
+	async def consume():
+		async for adv in stream:
+			devices[adv.address] = adv
+
+	try:
+		await asyncio.wait_for(consume(), timeout)
+	except asyncio.TimeoutError:
+		pass
+	finally:
+		await stream.aclose()
+
+	return list(devices.values())
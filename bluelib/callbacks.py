@@ -0,0 +1,88 @@
+# -*- coding: utf-8 -*-
+"""
+Notification dispatch table shared by the backend clients.
+"""
+
+import logging
+from typing import Callable, Any
+
+logger = logging.getLogger(__name__)
+
+
+class CallbackTable(object):
+	"""Maps a characteristic key (value handle or uuid) to its subscribers.
+
+	Dispatch is a single dict lookup. Several callbacks can subscribe to the
+	same characteristic so they share one CCCD subscription on the device:
+	:meth:`add` reports when the first subscriber arrives and :meth:`remove`
+	when the last one leaves, which is when the CCCD has to be written.
+	"""
+
+	def __init__(self):
+		self._table = {}
+
+	def add(self, key, func: Callable[[str, Any], Any]) -> bool:
+		"""Subscribe ``func`` to ``key``.
+
+		Returns:
+			True if ``func`` is the first subscriber of ``key``.
+
+		"""
+		subscribers = self._table.get(key, None)
+		if subscribers is None:
+			self._table[key] = [func]
+			return True
+
+		if func not in subscribers:
+			subscribers.append(func)
+		return False
+
+	def remove(self, key, func: Callable[[str, Any], Any] = None) -> bool:
+		"""Unsubscribe ``func`` from ``key``, or every subscriber if ``func`` is None.
+
+		Returns:
+			True if ``key`` has no subscribers left.
+
+		"""
+		subscribers = self._table.get(key, None)
+		if subscribers is None:
+			return True
+
+		if func is None:
+			subscribers.clear()
+		elif func in subscribers:
+			subscribers.remove(func)
+
+		if not subscribers:
+			del self._table[key]
+			return True
+
+		return False
+
+	def is_last(self, key, func: Callable[[str, Any], Any] = None) -> bool:
+		"""True if removing ``func`` (every subscriber if None) leaves ``key`` without subscribers."""
+		subscribers = self._table.get(key, None)
+		if subscribers is None or func is None:
+			return True
+		return all(f == func for f in subscribers)
+
+	def exec(self, key, data: Any):
+		subscribers = self._table.get(key, None)
+		if subscribers is None:
+			raise Exception("Callback not found.")
+
+		sender = str(key)
+		for func in tuple(subscribers):
+			try:
+				func(sender, data)
+			except Exception as e:
+				logger.error(f"[CallbackTable.exec] subscriber of {sender} raised: {str(e)}")
+
+	def keys(self) -> list:
+		return list(self._table.keys())
+
+	def __contains__(self, key) -> bool:
+		return key in self._table
+
+	def __len__(self) -> int:
+		return len(self._table)
@@ -5,18 +5,43 @@ Base class for backend clients.
 
 import abc
 import asyncio
+import contextlib
+import logging
 import re
+import time
 from typing import Callable, Any
 
+from bluelib.stream import NotificationStream, BLOCK
+from bluelib.session import GattSession
+from bluelib.connection import default_manager
+from bluelib.retry import RetryPolicy, CircuitOpenError, circuit_breaker
+from bluelib.advertisement import ScanFilter
+from bluelib.profile import LatencyProfile, latency_profile
+
+logger = logging.getLogger(__name__)
+
 class BaseBleClient(abc.ABC):
 	"""docstring for BaseBleClient"""
 
 	DEFAULT_MAXRETRIES              = 3
 	DEFAULT_KEEP_CONNECTION         = False
 	DEFAULT_TIMEOUT					= 30
+	DEFAULT_AUTO_RECONNECT			= True
+	DEFAULT_WAIT_ADVERTISING		= False
+	DEFAULT_ADAPTIVE_TIMEOUTS		= False
+
+	# Backoff between background reconnect attempts
+	RECONNECT_POLICY				= RetryPolicy(base_delay=0.5, max_delay=30)
+
+	# Errors of an operation that count as a failure of the device for its
+	# circuit breaker, besides timeouts. Others, e.g. a rejected write, show
+	# that the device is reachable
+	LINK_ERRORS						= (ConnectionError,)
 
 	def __init__(self, address, loop=None, maxretries=DEFAULT_MAXRETRIES, 
-		timeout=DEFAULT_TIMEOUT, defaultKeepConnection=DEFAULT_KEEP_CONNECTION):
+		timeout=DEFAULT_TIMEOUT, defaultKeepConnection=DEFAULT_KEEP_CONNECTION,
+		manager=None, autoReconnect=DEFAULT_AUTO_RECONNECT, retry=None,
+		waitAdvertising=DEFAULT_WAIT_ADVERTISING, adaptiveTimeouts=DEFAULT_ADAPTIVE_TIMEOUTS):
 
 		address = address.replace("-", ":").lower()
 
@@ -34,6 +59,26 @@ class BaseBleClient(abc.ABC):
 		self.maxretries = maxretries
 		self.timeout = timeout
 		self.defaultKeepConnection = defaultKeepConnection
+		self.autoReconnect = autoReconnect
+		# Only connect after the device was seen advertising
+		self.waitAdvertising = waitAdvertising
+		self._reconnect_task = None
+
+		# Backoff between connect attempts and the device's circuit breaker,
+		# which is shared by every client of the address
+		self.retry = retry if retry is not None else RetryPolicy(attempts=maxretries)
+		self.breaker = circuit_breaker(address)
+
+		# Latencies of the device, shared like the breaker; with adaptiveTimeouts
+		# the timeouts and connect attempts are learned from them
+		self.profile = latency_profile(address)
+		self.adaptiveTimeouts = adaptiveTimeouts
+
+		# Links are handed back to the connection manager after each
+		# operation instead of being closed right away
+		self.manager = manager if manager is not None else default_manager()
+		self._busy = 0
+		self._connect_lock = asyncio.Lock()
 
 	# Async Context managers
 
@@ -44,6 +89,192 @@ class BaseBleClient(abc.ABC):
 	async def __aexit__(self, exc_type, exc_val, exc_tb):
 		await self.disconnect()
 
+	# Connection management
+
+	@contextlib.asynccontextmanager
+	async def _operation(self, keepConnection=None):
+		"""Wrap one GATT operation.
+
+		The link is not closed by the connection manager while operations
+		are running. When the last one ends, ``keepConnection`` decides what
+		happens to it: True keeps it open, False closes it and None leaves
+		it to ``defaultKeepConnection``, lingering when that is False.
+		"""
+		self._busy += 1
+		self.manager.touch(self)
+		try:
+			yield
+		except BaseException:
+			self._busy -= 1
+			try:
+				await self._release_connection(keepConnection)
+			except Exception as e:
+				logger.debug(f"[BaseBleClient._operation] could not release the link of {self.address}: {str(e)}")
+			raise
+
+		self._busy -= 1
+		await self._release_connection(keepConnection)
+
+	def __keep(self, keepConnection) -> bool:
+		if keepConnection is None:
+			return self.defaultKeepConnection
+		return keepConnection is True
+
+	async def _release_connection(self, keepConnection=None):
+		if self._busy > 0 or self.__keep(keepConnection):
+			return
+
+		if keepConnection is False or self.manager.linger <= 0:
+			if not self.has_subscriptions():
+				await self.disconnect()
+		else:
+			self.manager.release(self)
+
+	async def _ensure_connected(self) -> bool:
+		"""Connect unless the link is up. Concurrent callers share one connect."""
+		async with self._connect_lock:
+			# Fail fast while the device's circuit breaker is open, also on an open link
+			self.breaker.check()
+
+			try:
+				if await self.is_connected():
+					return True
+			except:
+				raise ConnectionError("Could not proof connecton.")
+
+			logger.debug(f"[BaseBleClient._ensure_connected] BLE device {self.address} is not connected or connetion was lost. Trying to connect.")
+
+			try:
+				return await self.connect()
+			except CircuitOpenError:
+				raise
+			except:
+				raise ConnectionError("BLE device could not be connected or connection was lost and could not be reset")
+
+	async def _on_link(self, op, *args):
+		"""Connect unless the link is up, then run ``op(*args)`` on it.
+
+		Backends that only notice a dropped link when an operation runs
+		into it override this to reconnect and retry.
+		"""
+		await self._ensure_connected()
+		return await op(*args)
+
+	async def release(self) -> None:
+		"""Hand the link back to the connection manager.
+
+		The link stays open for the manager's linger window, so operations
+		issued shortly after reuse it, and is closed afterwards.
+		"""
+		if self._busy == 0:
+			self.manager.release(self)
+
+	def has_subscriptions(self) -> bool:
+		"""True while notifications are active, which keeps the link open."""
+		return False
+
+	def _timeout(self, kind: str = LatencyProfile.OP) -> float:
+		"""Seconds to wait for a connect or an operation."""
+		if self.adaptiveTimeouts:
+			return self.profile.timeout(kind, self.timeout)
+		return self.timeout
+
+	def _attempts(self) -> int:
+		"""Number of connect attempts, as set by the retry policy."""
+		if self.adaptiveTimeouts:
+			return self.profile.attempts(LatencyProfile.CONNECT, self.retry.attempts)
+		return self.retry.attempts
+
+	async def _timed(self, kind: str, aw):
+		"""Await ``aw`` within the timeout of ``kind`` and record its latency in the profile.
+
+		Operations also report their outcome to the circuit breaker, connects
+		do that once all their attempts are done.
+		"""
+		timeout = self._timeout(kind)
+		op = kind == LatencyProfile.OP
+		t1 = time.perf_counter()
+		try:
+			result = await asyncio.wait_for(aw, timeout)
+		except asyncio.TimeoutError:
+			self.profile.timed_out(kind)
+			if op:
+				self.breaker.failure()
+			raise
+		except Exception as e:
+			self.profile.failed(kind)
+			if op and isinstance(e, self.LINK_ERRORS):
+				self.breaker.failure()
+			elif op:
+				self.breaker.success()
+			raise
+
+		self.profile.record(kind, time.perf_counter() - t1)
+		if op:
+			self.breaker.success()
+		return result
+
+	async def _wait_advertisement(self, scan_stream, timeout, **kwargs):
+		"""Wait until the device is seen advertising.
+
+		Args:
+			scan_stream (function): The backend's advertisement generator.
+			timeout (float): Seconds to wait for.
+			**kwargs: Passed on to ``scan_stream``.
+
+		Returns:
+			(Advertisement) The first advertisement received.
+
+		"""
+		stream = scan_stream(ScanFilter(address_prefix=self.address), **kwargs)
+		try:
+			return await asyncio.wait_for(stream.__anext__(), timeout)
+		except (asyncio.TimeoutError, StopAsyncIteration):
+			raise ConnectionError(f"Device {self.address} was not seen advertising in {timeout}s.")
+		finally:
+			await stream.aclose()
+
+	def _schedule_reconnect(self):
+		"""Reconnect in the background after the link was lost.
+
+		Only done while notifications are active: nobody would notice the
+		lost link otherwise, the next operation reconnects anyway. Backends
+		restore the subscriptions when they connect.
+		"""
+		if not self.autoReconnect or not self.has_subscriptions():
+			return
+		if self._reconnect_task is not None and not self._reconnect_task.done():
+			return
+
+		self._reconnect_task = asyncio.ensure_future(self._reconnect(), loop=self.loop)
+
+	async def _reconnect(self):
+		retry = 0
+
+		while self.has_subscriptions():
+			try:
+				await self._ensure_connected()
+				logger.info(f"[BaseBleClient._reconnect] link to {self.address} was restored.")
+				return
+			except Exception as e:
+				delay = max(self.RECONNECT_POLICY.delay(retry), self.breaker.remaining())
+				logger.warning(f"[BaseBleClient._reconnect] could not reconnect to {self.address}, "
+					f"retrying in {round(delay,2)}s: {str(e)}")
+
+			await asyncio.sleep(delay)
+			retry += 1
+
+	async def _cancel_reconnect(self):
+		task, self._reconnect_task = self._reconnect_task, None
+		if task is None or task.done() or task is asyncio.current_task():
+			return
+
+		task.cancel()
+		try:
+			await task
+		except asyncio.CancelledError:
+			pass
+
 	# Connectivity methods
 
 	@abc.abstractmethod
@@ -77,6 +308,19 @@ class BaseBleClient(abc.ABC):
 		raise NotImplementedError()
 
 
+	def bind_firmware_revision(self, revision: str) -> None:
+		"""Tell the backend which firmware revision the device runs.
+
+		Backends that cache the attribute table of a device use it to drop
+		handles that belong to another firmware. Does nothing by default.
+
+		Args:
+			revision (str): Firmware revision string of the device.
+
+		"""
+		pass
+
+
 	# GATT services methods
 
 	# @abc.abstractmethod
@@ -117,6 +361,21 @@ class BaseBleClient(abc.ABC):
 		"""
 		raise NotImplementedError()
 
+	@abc.abstractmethod
+	async def read_handle(self, handle: int, **kwargs) -> bytearray:
+		"""Read the attribute at ``handle`` without any uuid lookup.
+
+		Works for characteristic values and descriptors alike.
+
+		Args:
+			handle (int): The attribute handle to read from.
+
+		Returns:
+			(bytearray) The read data.
+
+		"""
+		raise NotImplementedError()
+
 	@abc.abstractmethod
 	async def write_gatt_char(
 		self, _uuid: str, data: bytearray, response: bool = False, **kwargs
@@ -147,6 +406,23 @@ class BaseBleClient(abc.ABC):
 		"""
 		raise NotImplementedError()
 
+	@abc.abstractmethod
+	async def write_handle(
+		self, handle: int, data: bytearray, response: bool = True, **kwargs
+	) -> Any:
+		"""Write the attribute at ``handle`` without any uuid lookup.
+
+		Works for characteristic values and descriptors alike, e.g. to
+		write a CCCD directly.
+
+		Args:
+			handle (int): The attribute handle to write to.
+			data (bytes or bytearray): The data to send.
+			response (bool): If write-with-response operation should be done. Defaults to `True`.
+
+		"""
+		raise NotImplementedError()
+
 	@abc.abstractmethod
 	async def start_notify(
 		self, _uuid: str, callback: Callable[[str, Any], Any], **kwargs
@@ -154,7 +430,8 @@ class BaseBleClient(abc.ABC):
 		"""Activate notifications/indications on a characteristic.
 
 		Callbacks must accept two inputs. The first will be a uuid string
-		object and the second will be a bytearray.
+		object and the second will be a bytearray. Several callbacks can be
+		registered on the same characteristic, they share one subscription.
 
 		.. code-block:: python
 
@@ -170,11 +447,111 @@ class BaseBleClient(abc.ABC):
 		raise NotImplementedError()
 
 	@abc.abstractmethod
-	async def stop_notify(self, _uuid: str) -> None:
+	async def stop_notify(
+		self, _uuid: str, callback: Callable[[str, Any], Any] = None, **kwargs
+	) -> None:
 		"""Deactivate notification/indication on a specified characteristic.
 
+		The subscription on the device is only cleared once the last
+		callback has been removed.
+
 		Args:
 			_uuid: The characteristic to stop notifying/indicating on.
+			callback (function): The subscriber to remove. Defaults to all subscribers.
+
+		"""
+		raise NotImplementedError()
+
+
+	def notifications(
+		self, _uuid: str, maxsize: int = NotificationStream.DEFAULT_MAXSIZE, policy: str = BLOCK, **kwargs
+	) -> NotificationStream:
+		"""Stream notifications of a characteristic through a bounded queue.
+
+		.. code-block:: python
+
+			async with client.notifications(char_uuid, maxsize=16, policy=bluelib.stream.DROP_OLDEST) as stream:
+				async for data in stream:
+					print(data)
+
+		Args:
+			_uuid (str or UUID): The uuid of the characteristic to stream.
+			maxsize (int): Maximum number of queued values.
+			policy (str): Overflow policy, one of ``bluelib.stream.POLICIES``.
+
+		Returns:
+			A :class:`bluelib.stream.NotificationStream`. The subscription starts
+			when the stream is entered or first iterated and ends when it is closed.
+
+		"""
+		return NotificationStream(self, _uuid, maxsize=maxsize, policy=policy, **kwargs)
+
+
+	# Batched operations
+
+	async def read_gatt_chars(self, uuids: list, **kwargs) -> list:
+		"""Read several characteristics in as few round trips as the backend allows.
+
+		Uses ATT Read Multiple where the backend supports it and falls back
+		to single reads issued back to back otherwise.
+
+		Args:
+			uuids (list): The uuids of the characteristics to read from.
+			return_exceptions (bool): Put the exception of a failed read in
+				its slot instead of raising it. Defaults to `False`.
+
+		Returns:
+			(list) The read data, in the order of ``uuids``.
+
+		"""
+		keepConnection = kwargs.get('keepConnection', None)
+		return_exceptions = kwargs.get('return_exceptions', False)
+
+		async with self._operation(keepConnection):
+			return await self._on_link(self._read_many, list(uuids), return_exceptions)
+
+	def session(self, keepConnection=None) -> GattSession:
+		"""Open a session that runs many operations on one connection.
+
+		.. code-block:: python
+
+			async with client.session() as s:
+				values = await s.read_many([uuid_a, uuid_b])
+
+		Args:
+			keepConnection (bool): What happens to the link when the session
+				ends, as for the single operations.
+
+		Returns:
+			A :class:`bluelib.session.GattSession`.
+
+		"""
+		return GattSession(self, keepConnection=keepConnection)
+
+	async def _read_char(self, _uuid: str) -> bytearray:
+		"""Read a characteristic on the current link, without connection handling.
+
+		Backends override it to skip the per-operation checks inside sessions.
+		"""
+		return await self.read_gatt_char(_uuid, keepConnection=True)
+
+	async def _write_char(self, _uuid: str, data: bytearray, response: bool = True) -> Any:
+		"""Write a characteristic on the current link, without connection handling."""
+		return await self.write_gatt_char(_uuid, data, response=response, keepConnection=True)
+
+	async def _read_many(self, uuids: list, return_exceptions: bool = False) -> list:
+		"""Read several characteristics on the current link.
 
+		Reads one after the other; backends with a bulk read override it.
 		"""
-		raise NotImplementedError()
\ No newline at end of file
+		results = []
+		for _uuid in uuids:
+			try:
+				results.append(await self._read_char(_uuid))
+			except Exception as e:
+				if not return_exceptions:
+					raise
+				logger.debug(f"[BaseBleClient._read_many] read from {_uuid} failed: {str(e)}")
+				results.append(e)
+
+		return results
@@ -0,0 +1,316 @@
+# -*- coding: utf-8 -*-
+"""
+Connection manager shared by the backend clients.
+
+Instead of disconnecting right after every operation, clients hand their
+link back to the manager, which keeps it open for a linger window so that
+bursts of operations reuse one connection. The manager also caps the number
+of links open at once and evicts the least recently used idle link when a
+new one is needed.
+
+Controllers only handle a few links and connect attempts at a time, so the
+manager can also cap links and pending connects per adapter. Connects over
+the cap wait in a queue and are admitted in arrival order per adapter.
+"""
+
+import asyncio
+import collections
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class AdmissionStats(object):
+	"""Queue depth and wait times of the connects admitted to one adapter."""
+
+	WINDOW = 256
+
+	def __init__(self):
+		self.queued = 0
+		self.max_queued = 0
+		self.admitted = 0
+		self.waited = 0
+		self.wait_total = 0.0
+		self.wait_max = 0.0
+		# Wait times of the most recent admissions, for percentiles
+		self._recent = collections.deque(maxlen=AdmissionStats.WINDOW)
+
+	def enqueue(self):
+		self.queued += 1
+		self.max_queued = max(self.max_queued, self.queued)
+
+	def dequeue(self):
+		self.queued -= 1
+
+	def admit(self, wait: float, queued: bool):
+		self.admitted += 1
+		self._recent.append(wait)
+		if queued:
+			self.waited += 1
+			self.wait_total += wait
+			self.wait_max = max(self.wait_max, wait)
+
+	def percentile(self, p: float) -> float:
+		if not self._recent:
+			return 0.0
+		samples = sorted(self._recent)
+		return samples[min(len(samples) - 1, int(round(p / 100.0 * (len(samples) - 1))))]
+
+	def to_dict(self) -> dict:
+		return {"queued": self.queued,
+				"max_queued": self.max_queued,
+				"admitted": self.admitted,
+				"waited": self.waited,
+				"wait_mean": self.wait_total / self.waited if self.waited else 0.0,
+				"wait_p95": self.percentile(95),
+				"wait_max": self.wait_max}
+
+
+class ConnectionManager(object):
+	"""Keeps idle links open for ``linger`` seconds and caps open links.
+
+	Args:
+		linger (float): Seconds an idle link stays open after its last
+			operation. 0 disconnects right away.
+		max_links (int): Maximum number of links open (or being opened) at
+			once, or None for no limit.
+		max_adapter_links (int): Maximum number of links open (or being
+			opened) on one adapter, or None for no limit.
+		max_adapter_pending (int): Maximum number of connects in progress on
+			one adapter, or None for no limit.
+
+	"""
+
+	DEFAULT_LINGER = 2.0
+
+	def __init__(self, linger=DEFAULT_LINGER, max_links=None, max_adapter_links=None,
+		max_adapter_pending=None):
+		self.linger = linger
+		self.max_links = max_links
+		self.max_adapter_links = max_adapter_links
+		self.max_adapter_pending = max_adapter_pending
+
+		# client -> linger timer handle (or None), in least recently used order
+		self._links = collections.OrderedDict()
+		# client -> adapter of its link
+		self._adapters = {}
+		# clients still connecting
+		self._pending = set()
+		# adapter -> number of links and of pending connects
+		self._link_count = collections.Counter()
+		self._pending_count = collections.Counter()
+		# [future, client, adapter] of the queued connects, in arrival order
+		self._waiters = collections.deque()
+		self._stats = collections.defaultdict(AdmissionStats)
+
+	def __len__(self) -> int:
+		return len(self._links)
+
+	def _is_idle(self, client) -> bool:
+		return client not in self._pending and client._busy == 0 and not client.has_subscriptions()
+
+	def _links_full(self) -> bool:
+		return self.max_links is not None and len(self._links) >= self.max_links
+
+	def _adapter_full(self, adapter) -> bool:
+		return self.max_adapter_links is not None and self._link_count[adapter] >= self.max_adapter_links
+
+	def _pending_full(self, adapter) -> bool:
+		return self.max_adapter_pending is not None and self._pending_count[adapter] >= self.max_adapter_pending
+
+	def _admits(self, adapter) -> bool:
+		return not (self._links_full() or self._adapter_full(adapter) or self._pending_full(adapter))
+
+	def _idle_victim(self, exclude, adapter):
+		"""The least recently used idle link whose closing makes room on ``adapter``."""
+		if self._pending_full(adapter):
+			return None
+
+		same_adapter = not self._links_full()
+		for client in self._links:
+			if client is exclude or not self._is_idle(client):
+				continue
+			if same_adapter and self._adapters[client] != adapter:
+				continue
+			return client
+		return None
+
+	def _blocks_waiter(self, client) -> bool:
+		adapter = self._adapters[client]
+		for _, _, a in self._waiters:
+			if self._pending_full(a):
+				continue
+			if self._links_full() or (a == adapter and self._adapter_full(a)):
+				return True
+		return False
+
+	def _reserve(self, client, adapter):
+		self._links[client] = None
+		self._adapters[client] = adapter
+		self._pending.add(client)
+		self._link_count[adapter] += 1
+		self._pending_count[adapter] += 1
+
+	def _admit_waiters(self):
+		"""Admit queued connects in arrival order, skipping adapters that are full."""
+		blocked = set()
+		for entry in list(self._waiters):
+			waiter, client, adapter = entry
+			if waiter.done():
+				self._waiters.remove(entry)
+				continue
+			if adapter in blocked or not self._admits(adapter):
+				# Later connects to the same adapter must not overtake this one
+				blocked.add(adapter)
+				continue
+
+			self._waiters.remove(entry)
+			self._reserve(client, adapter)
+			waiter.set_result(True)
+
+	async def acquire(self, client, adapter=None):
+		"""Reserve a link for ``client`` on ``adapter`` before it connects.
+
+		Waits while the caps are reached; idle links are closed to make
+		room, least recently used first. The link counts as a pending
+		connect until :meth:`connected` is called.
+		"""
+		if client in self._links:
+			if self._adapters[client] == adapter:
+				return
+			# The client moves to another adapter
+			self.closed(client)
+
+		stats = self._stats[adapter]
+		started = client.loop.time()
+		waited = False
+
+		while True:
+			queued = any(a == adapter for _, _, a in self._waiters)
+			if not queued and self._admits(adapter):
+				self._reserve(client, adapter)
+				break
+
+			# A closed link goes to the first queued connect, so evicting is fair
+			victim = self._idle_victim(client, adapter)
+			if victim is not None:
+				logger.debug(f"[ConnectionManager.acquire] closing idle link to {victim.address} for {client.address}.")
+				await victim.disconnect()
+				self.closed(victim)
+				continue
+
+			waited = True
+			waiter = client.loop.create_future()
+			entry = [waiter, client, adapter]
+			self._waiters.append(entry)
+			stats.enqueue()
+			try:
+				await waiter
+			except asyncio.CancelledError:
+				if waiter.done() and not waiter.cancelled():
+					# Admitted right before the cancellation
+					self.closed(client)
+				raise
+			finally:
+				stats.dequeue()
+				if entry in self._waiters:
+					self._waiters.remove(entry)
+			break
+
+		stats.admit(client.loop.time() - started if waited else 0.0, waited)
+
+	def connected(self, client):
+		"""Mark the connect of ``client`` as done, which frees its pending slot."""
+		if client in self._pending:
+			self._pending.discard(client)
+			self._pending_count[self._adapters[client]] -= 1
+			self._admit_waiters()
+
+	def closed(self, client):
+		"""Forget the link of ``client`` after it disconnected or failed to connect."""
+		if client not in self._links:
+			return
+
+		timer = self._links.pop(client)
+		if timer is not None:
+			timer.cancel()
+		adapter = self._adapters.pop(client)
+		self._link_count[adapter] -= 1
+		if client in self._pending:
+			self._pending.discard(client)
+			self._pending_count[adapter] -= 1
+
+		self._admit_waiters()
+
+	def touch(self, client):
+		"""Mark ``client`` as used: cancel its linger timer and make it most recently used."""
+		if client not in self._links:
+			return
+
+		timer = self._links[client]
+		if timer is not None:
+			timer.cancel()
+		self._links[client] = None
+		self._links.move_to_end(client)
+
+	def release(self, client):
+		"""Close the link of ``client`` once it has been idle for the linger window."""
+		if client not in self._links:
+			return
+
+		timer = self._links[client]
+		if timer is not None:
+			timer.cancel()
+
+		# Do not keep an idle link open while a queued connect needs its slot
+		linger = 0 if self._blocks_waiter(client) else self.linger
+		self._links[client] = client.loop.call_later(
+			linger, lambda: asyncio.ensure_future(self._expire(client), loop=client.loop))
+
+	async def _expire(self, client):
+		if client not in self._links:
+			return
+
+		self._links[client] = None
+		async with client._connect_lock:
+			if self._is_idle(client) and client in self._links:
+				logger.debug(f"[ConnectionManager._expire] closing idle link to {client.address}.")
+				await client.disconnect()
+
+	def metrics(self) -> dict:
+		"""Links, pending connects, queue depth and admission wait times per adapter.
+
+		Returns:
+			(dict) Maps each adapter (None for backends without adapter
+			selection) to its counters; wait times are in seconds.
+
+		"""
+		adapters = set(self._stats) | set(self._adapters.values())
+		metrics = {}
+		for adapter in adapters:
+			m = self._stats[adapter].to_dict()
+			m["links"] = self._link_count[adapter]
+			m["pending"] = self._pending_count[adapter]
+			metrics[adapter] = m
+		return metrics
+
+
+_default_manager = None
+
+def default_manager() -> ConnectionManager:
+	"""Return the process-wide :class:`ConnectionManager`, creating it on first use."""
+	global _default_manager
+	if _default_manager is None:
+		_default_manager = ConnectionManager()
+	return _default_manager
+
+def configure_connections(linger=ConnectionManager.DEFAULT_LINGER, max_links=None,
+	max_adapter_links=None, max_adapter_pending=None) -> ConnectionManager:
+	"""Configure the process-wide :class:`ConnectionManager`.
+
+	Only affects clients created afterwards.
+	"""
+	global _default_manager
+	_default_manager = ConnectionManager(linger=linger, max_links=max_links,
+		max_adapter_links=max_adapter_links, max_adapter_pending=max_adapter_pending)
+	return _default_manager
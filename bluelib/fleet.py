@@ -0,0 +1,367 @@
+# -*- coding: utf-8 -*-
+"""
+Periodic measurements of a fleet of devices under a concurrency budget.
+
+.. code-block:: python
+
+	poller = FleetPoller(concurrency=16)
+	for sensor in sensors:
+		poller.add(sensor.get_address(), sensor.measure, 60, ["temperature"])
+
+	async with poller:
+		async for result in poller.results():
+			print(result.key, result.value)
+
+Every job runs once per interval. The first run of each job is placed at
+its own phase of the interval, so a thousand sensors polled every minute
+cause a steady trickle of connects instead of a burst at the top of every
+minute. At most ``concurrency`` runs are in flight; when more are due, the
+ones with the lowest priority value go first.
+
+A connect only completes on the device's next advertising event, so a run
+holds its slot for up to one advertising interval before any GATT work
+starts. Jobs given an ``adv_interval`` are scheduled with that in mind:
+
+* Due runs are ordered by when their connect is expected to complete, so a
+  device advertising every 5s does not take a slot ahead of one advertising
+  every 0.5s that would be done by then.
+* Once a device was seen advertising recently (see :meth:`FleetPoller.seen`
+  and :meth:`FleetPoller.watch`), its next advertising event can be
+  predicted and its run is held back until just before it, leaving the
+  slot to others in the meantime.
+* Runs of slow advertisers whose timing is unknown may take at most
+  ``slow_share`` of the slots.
+"""
+
+import asyncio
+import heapq
+import itertools
+import logging
+import math
+import time
+
+logger = logging.getLogger(__name__)
+
+# Fractional part of the golden ratio, spreads any number of phases evenly
+_GOLDEN = (math.sqrt(5) - 1) / 2
+
+
+class PollResult(object):
+	"""Outcome of one run of a job.
+
+	``value`` holds the result of the run, or None if it raised ``error``.
+	``latency`` is how long the run took, ``delay`` how late it started.
+	"""
+
+	__slots__ = ("key", "value", "error", "started", "latency", "delay")
+
+	def __init__(self, key, value=None, error: Exception = None, started: float = None,
+		latency: float = None, delay: float = None):
+		self.key = key
+		self.value = value
+		self.error = error
+		self.started = started
+		self.latency = latency
+		self.delay = delay
+
+	@property
+	def ok(self) -> bool:
+		return self.error is None
+
+	def __repr__(self):
+		outcome = f"error={self.error!r}" if self.error is not None else f"value={self.value!r}"
+		return f"PollResult({self.key}, {outcome})"
+
+
+class _Job(object):
+	__slots__ = ("key", "func", "args", "kwargs", "interval", "priority", "adv_interval",
+		"last_seen", "due", "running", "slow", "removed")
+
+	def __init__(self, key, func, args, kwargs, interval, priority, adv_interval):
+		self.key = key
+		self.func = func
+		self.args = args
+		self.kwargs = kwargs
+		self.interval = interval
+		self.priority = priority
+		self.adv_interval = adv_interval
+		self.last_seen = None
+		self.due = None
+		self.running = False
+		self.slow = False
+		self.removed = False
+
+	def get_adv_interval(self) -> float:
+		if callable(self.adv_interval):
+			return self.adv_interval()
+		return self.adv_interval
+
+
+class FleetPoller(object):
+	"""Runs a coroutine per device every interval, ``concurrency`` runs at a time.
+
+	Args:
+		concurrency (int): Maximum number of runs in flight.
+		maxsize (int): Maximum number of results waiting for the consumer.
+			Runs wait for room when it is reached, so a slow consumer slows
+			the polling down instead of piling results up.
+		slow_share (float): Share of the slots that runs expected to wait
+			longer than ``slow_wait`` seconds for their connect may take.
+		slow_wait (float): Expected connect wait above which a run is slow.
+		lead (float): Seconds before a predicted advertising event a held
+			run is started.
+		loop (AbstractEventLoop): Event loop, defaults to the current one.
+
+	"""
+
+	DEFAULT_CONCURRENCY     = 8
+	DEFAULT_MAXSIZE         = 1024
+	# Predictions are trusted for this many advertising intervals after a sighting
+	FRESH_INTERVALS         = 4
+
+	def __init__(self, concurrency=DEFAULT_CONCURRENCY, maxsize=DEFAULT_MAXSIZE, slow_share=0.5,
+		slow_wait=1.0, lead=0.05, loop=None):
+		self.concurrency = concurrency
+		self.slow_share = slow_share
+		self.slow_wait = slow_wait
+		self.lead = lead
+		self.loop = loop if loop else asyncio.get_event_loop()
+
+		self._jobs = {}
+		self._timers = []       # (due, seq, job) of the jobs waiting for their time
+		self._ready = []        # jobs that are due
+		self._seq = itertools.count()
+		self._phases = itertools.count()
+		self._running = set()
+		self._slow_running = 0
+		self._watchers = set()
+		self._results = asyncio.Queue(maxsize)
+		self._wakeup = asyncio.Event()
+		self._task = None
+		self._closed = False
+
+	def __len__(self) -> int:
+		return len(self._jobs)
+
+	@property
+	def in_flight(self) -> int:
+		return len(self._running)
+
+	def add(self, key, func, interval: float, *args, priority: int = 0, adv_interval=None, **kwargs):
+		"""Poll ``func(*args, **kwargs)`` every ``interval`` seconds.
+
+		Args:
+			key: Identifies the job in the results. Has to be the device
+				address for :meth:`watch` to find it.
+			func (coroutine function): The measurement to run.
+			interval (float): Seconds between the starts of two runs.
+			priority (int): Due runs with lower values go first.
+			adv_interval (float or function): The device's advertising
+				interval in seconds, or a function returning it (or None
+				while it is unknown).
+
+		"""
+		if key in self._jobs:
+			self.remove(key)
+
+		job = _Job(key, func, args, kwargs, interval, priority, adv_interval)
+		self._jobs[key] = job
+
+		phase = (next(self._phases) * _GOLDEN) % 1.0
+		self._schedule(job, self.loop.time() + phase * interval)
+
+	def remove(self, key):
+		"""Stop polling ``key``. A run in flight still delivers its result."""
+		job = self._jobs.pop(key, None)
+		if job is not None:
+			job.removed = True
+
+	def seen(self, key, when: float = None):
+		"""Record that device ``key`` advertised at loop time ``when`` (default: now)."""
+		job = self._jobs.get(key, None)
+		if job is None:
+			return
+		job.last_seen = when if when is not None else self.loop.time()
+		if not job.running and job.due <= self.loop.time():
+			# The job may be held back waiting for this prediction
+			self._wakeup.set()
+
+	def watch(self, stream):
+		"""Feed the advertisements of ``stream`` to :meth:`seen` until the poller stops.
+
+		``stream`` is an advertisement generator such as
+		``bluelib.scan_stream(refresh=0)``, which reports every sighting.
+		"""
+		async def consume():
+			try:
+				async for adv in stream:
+					self.seen(adv.address, adv.timestamp)
+			finally:
+				await stream.aclose()
+
+		task = asyncio.ensure_future(consume())
+		self._watchers.add(task)
+		task.add_done_callback(self._watchers.discard)
+		return task
+
+	def _connect_wait(self, job: _Job, now: float):
+		"""Expected seconds until the device's next advertising event, and if
+		that is a prediction from a recent sighting rather than an average."""
+		interval = job.get_adv_interval()
+		if not interval:
+			return 0.0, False
+
+		if job.last_seen is not None and now - job.last_seen < self.FRESH_INTERVALS * interval:
+			since = now - job.last_seen
+			return (math.floor(since / interval) + 1) * interval - since, True
+
+		return interval / 2, False
+
+	def _max_slow(self) -> int:
+		return max(1, int(self.concurrency * self.slow_share))
+
+	def _pick(self, now: float):
+		"""The ready job to start now, if any, and when a held job can start."""
+		best = None
+		best_key = None
+		wake = None
+		slow_full = self._slow_running >= self._max_slow()
+
+		for job in self._ready:
+			wait, predicted = self._connect_wait(job, now)
+			if predicted and wait > self.lead:
+				# Hold the run until just before the advertising event
+				start = now + wait - self.lead
+				wake = start if wake is None else min(wake, start)
+				continue
+
+			slow = wait > self.slow_wait
+			if slow and slow_full:
+				continue
+
+			# Earliest expected end of the connect first
+			key = (job.priority, job.due + wait)
+			if best_key is None or key < best_key:
+				best, best_key = job, key
+
+		if best is not None:
+			best.slow = best_key[1] - best.due > self.slow_wait
+
+		return best, wake
+
+	def _schedule(self, job: _Job, due: float):
+		job.due = due
+		heapq.heappush(self._timers, (due, next(self._seq), job))
+		self._wakeup.set()
+
+	def _reschedule(self, job: _Job):
+		"""Keep the job's phase; periods missed while it was late are skipped."""
+		now = self.loop.time()
+		due = job.due + job.interval
+		if due < now:
+			due += job.interval * math.ceil((now - due) / job.interval)
+		self._schedule(job, due)
+
+	async def _run(self, job: _Job):
+		started = time.time()
+		delay = max(0.0, self.loop.time() - job.due)
+		t1 = time.perf_counter()
+		try:
+			value = await job.func(*job.args, **job.kwargs)
+			result = PollResult(job.key, value, None, started, time.perf_counter() - t1, delay)
+		except asyncio.CancelledError:
+			raise
+		except Exception as e:
+			logger.debug(f"[FleetPoller._run] {job.key} failed: {str(e)}")
+			result = PollResult(job.key, None, e, started, time.perf_counter() - t1, delay)
+
+		await self._results.put(result)
+
+	def _finished(self, task, job: _Job):
+		self._running.discard(task)
+		job.running = False
+		if job.slow:
+			job.slow = False
+			self._slow_running -= 1
+		if not job.removed and not task.cancelled():
+			self._reschedule(job)
+		self._wakeup.set()
+
+	async def _dispatch(self):
+		while True:
+			now = self.loop.time()
+
+			while self._timers and self._timers[0][0] <= now:
+				_, _, job = heapq.heappop(self._timers)
+				if not job.removed:
+					self._ready.append(job)
+
+			self._ready = [j for j in self._ready if not j.removed]
+
+			wake = None
+			while self._ready and len(self._running) < self.concurrency:
+				job, wake = self._pick(now)
+				if job is None:
+					break
+
+				self._ready.remove(job)
+				job.running = True
+				if job.slow:
+					self._slow_running += 1
+				task = asyncio.ensure_future(self._run(job))
+				self._running.add(task)
+				task.add_done_callback(lambda t, job=job: self._finished(t, job))
+
+			self._wakeup.clear()
+			if self._timers:
+				wake = self._timers[0][0] if wake is None else min(wake, self._timers[0][0])
+			timeout = None if wake is None else max(0.0, wake - self.loop.time())
+			try:
+				await asyncio.wait_for(self._wakeup.wait(), timeout)
+			except asyncio.TimeoutError:
+				pass
+
+	def start(self):
+		if self._task is None:
+			self._closed = False
+			self._task = asyncio.ensure_future(self._dispatch())
+
+	async def stop(self):
+		"""Stop dispatching and watching, and cancel the runs in flight.
+
+		:meth:`results` ends once the results already queued are consumed.
+		"""
+		if self._task is not None:
+			self._task.cancel()
+			tasks = [self._task] + list(self._running) + list(self._watchers)
+			for t in self._running | self._watchers:
+				t.cancel()
+			await asyncio.gather(*tasks, return_exceptions=True)
+			self._task = None
+
+			# Wake up a consumer waiting for results; a full queue needs none
+			self._closed = True
+			try:
+				self._results.put_nowait(None)
+			except asyncio.QueueFull:
+				pass
+
+	async def __aenter__(self):
+		self.start()
+		return self
+
+	async def __aexit__(self, exc_type, exc_val, exc_tb):
+		await self.stop()
+
+	async def results(self):
+		"""Yield a :class:`PollResult` for every run, as soon as it finishes,
+		until the poller is stopped."""
+		while not (self._closed and self._results.empty()):
+			result = await self._results.get()
+			if result is None:
+				if self._closed:
+					# Pass the wake-up on to the next consumer
+					self._results.put_nowait(None)
+					return
+				continue
+			yield result
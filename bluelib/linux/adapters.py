@@ -0,0 +1,162 @@
+"""
+HCI adapter selection for gateways with several controllers.
+
+The :class:`AdapterManager` finds the adapters in ``/sys/class/bluetooth``
+and picks one for every connection and scan. A device goes to the adapter
+with the best score, i.e. the strongest signal the scanners reported for
+it on that adapter, minus a penalty per link the adapter already holds and
+per recent failure of the device on it. Once a device connected, it stays
+on that adapter until another one scores clearly better or the device keeps
+failing there.
+"""
+
+import collections
+import logging
+import os
+import re
+import threading
+
+from sys import _getframe
+
+currentFuncName = lambda n=0: _getframe(n + 1).f_code.co_name
+
+logger = logging.getLogger(__name__)
+
+SYSFS_BLUETOOTH = "/sys/class/bluetooth"
+
+
+def find_adapters(path: str = SYSFS_BLUETOOTH) -> list:
+	"""Return the indexes of the HCI adapters registered with the kernel, or ``[0]``."""
+	try:
+		names = os.listdir(path)
+	except OSError:
+		names = []
+
+	ifaces = sorted(int(m.group(1)) for m in (re.match(r"^hci(\d+)$", n) for n in names) if m)
+	return ifaces or [0]
+
+
+class AdapterManager(object):
+	"""Spreads connections and scan duty over the available HCI adapters.
+
+	Args:
+		adapters (list): Indexes of the adapters to use. Defaults to every
+			adapter found in sysfs.
+		load_weight (float): Score penalty, in dB, per link open on an adapter.
+		failure_weight (float): Score penalty, in dB, per consecutive failure
+			of a device on an adapter.
+		max_failures (int): Consecutive failures after which a device leaves
+			its adapter regardless of the scores.
+		hysteresis (float): Score, in dB, another adapter has to be better by
+			before a device moves off its adapter.
+
+	"""
+
+	UNKNOWN_RSSI        = -90.0
+	RSSI_SMOOTHING      = 0.3
+	# Signal strengths are kept for this many (device, adapter) pairs, in LRU order
+	MAX_OBSERVATIONS    = 4096
+
+	def __init__(self, adapters: list = None, load_weight=6.0, failure_weight=10.0,
+		max_failures=2, hysteresis=10.0):
+
+		self.adapters = list(adapters) if adapters else find_adapters()
+		self.load_weight = load_weight
+		self.failure_weight = failure_weight
+		self.max_failures = max_failures
+		self.hysteresis = hysteresis
+
+		self._links = {i: 0 for i in self.adapters}
+		self._rssi = collections.OrderedDict()  # (address, iface) -> smoothed rssi
+		self._failures = {}                     # (address, iface) -> consecutive failures
+		self._home = {}                         # address -> adapter of its last successful connection
+		self._mutex = threading.Lock()
+
+		logger.debug(f"[{currentFuncName()}] using adapters {['hci%d' % i for i in self.adapters]}.")
+
+	def load(self, iface: int) -> int:
+		"""Number of links open on ``iface``."""
+		return self._links.get(iface, 0)
+
+	def observe(self, address: str, iface: int, rssi: int):
+		"""Record the signal strength of ``address`` as seen by ``iface``.
+
+		Called by the scanners for every report, possibly from a worker thread.
+		"""
+		if rssi is None or iface not in self._links:
+			return
+
+		key = (address.lower(), iface)
+		with self._mutex:
+			last = self._rssi.pop(key, None)
+			self._rssi[key] = rssi if last is None else last + self.RSSI_SMOOTHING * (rssi - last)
+			if len(self._rssi) > self.MAX_OBSERVATIONS:
+				self._rssi.popitem(last=False)
+
+	def _score(self, address: str, iface: int) -> float:
+		rssi = self._rssi.get((address, iface), self.UNKNOWN_RSSI)
+		return (rssi - self.load_weight * self._links[iface]
+			- self.failure_weight * self._failures.get((address, iface), 0))
+
+	def select(self, address: str) -> int:
+		"""Pick the adapter to connect ``address`` with."""
+		address = address.lower()
+
+		with self._mutex:
+			# Ties go to the adapter with fewer links, then to the lower index
+			best = max(self.adapters, key=lambda i: (self._score(address, i), -self._links[i], -i))
+
+			home = self._home.get(address, None)
+			if home is not None and home != best and home in self._links:
+				if (self._failures.get((address, home), 0) < self.max_failures
+					and self._score(address, best) - self._score(address, home) < self.hysteresis):
+					return home
+
+				logger.debug(f"[{currentFuncName()}] moving {address} from hci{home} to hci{best}.")
+
+			return best
+
+	def scan_adapter(self) -> int:
+		"""Pick the adapter with the least links for a new scan."""
+		with self._mutex:
+			return min(self.adapters, key=lambda i: (self._links[i], i))
+
+	def connected(self, address: str, iface: int):
+		"""Record a successful connection of ``address`` on ``iface``."""
+		address = address.lower()
+		with self._mutex:
+			if iface in self._links:
+				self._links[iface] += 1
+			self._failures.pop((address, iface), None)
+			self._home[address] = iface
+
+	def disconnected(self, address: str, iface: int):
+		"""Record that the link of ``address`` on ``iface`` was closed or lost."""
+		with self._mutex:
+			if self._links.get(iface, 0) > 0:
+				self._links[iface] -= 1
+
+	def failed(self, address: str, iface: int):
+		"""Record a failed connection attempt of ``address`` on ``iface``."""
+		key = (address.lower(), iface)
+		with self._mutex:
+			self._failures[key] = self._failures.get(key, 0) + 1
+
+
+_manager = None
+_manager_mutex = threading.Lock()
+
+def adapter_manager() -> AdapterManager:
+	"""Return the process-wide :class:`AdapterManager`, creating it on first use."""
+	global _manager
+	with _manager_mutex:
+		if _manager is None:
+			_manager = AdapterManager()
+		return _manager
+
+def configure_adapters(adapters: list = None, **kwargs) -> AdapterManager:
+	"""Replace the process-wide :class:`AdapterManager`, e.g. to restrict the adapters used."""
+	global _manager
+	with _manager_mutex:
+		_manager = AdapterManager(adapters, **kwargs)
+		return _manager
@@ -1,9 +1,14 @@
 import asyncio
 import logging
 
-from executor import Executor
-from bluepy.btle import Peripheral, UUID, DefaultDelegate
+from bluelib.linux.adapters import adapter_manager
+from bluelib.linux.executor import shared_executor
+from bluelib.linux.gatt import attribute_table
+from bluelib.linux.scan import scan_stream, shared_scanner
+from bluepy.btle import Peripheral, DefaultDelegate, BTLEDisconnectError, BTLEGattError
 from bluelib.client import BaseBleClient
+from bluelib.profile import LatencyProfile
+from bluelib.callbacks import CallbackTable
 from time import perf_counter
 from typing import Callable, Any
 from asyncio.events import AbstractEventLoop
@@ -13,64 +18,151 @@ currentFuncName = lambda n=0: _getframe(n + 1).f_code.co_name
 
 logger = logging.getLogger(__name__)
 
-CCCD_UUID = "00002902-0000-1000-8000-00805f9b34fb"
 CCCD_NOTIFY_VAL = b"\x01\x00"
 CCCD_CLEAR = b"\x00\x00"
 
-class CallbackList(object):
-	def __init__(self):
-		self.list = []
+class MyDelegate(DefaultDelegate):
+	"""Receives notifications on a bluepy worker thread and hands them over
+	to the event loop, where the registered callbacks run."""
 
-	def add(self, charHandle: int, func: Callable[[str, Any], Any]):
-		for i in self.list:
-			if i[0] == charHandle:
-				i[1] = func
-				return
+	def __init__(self, loop: AbstractEventLoop):
+		DefaultDelegate.__init__(self)
+		self.loop = loop
+		self.callbacks = CallbackTable()
 
-		self.list.append((charHandle, func))
+	def handleNotification(self, cHandle, data):
+		self.loop.call_soon_threadsafe(self._dispatch, cHandle, data)
 
+	def _dispatch(self, cHandle, data):
+		try:
+			self.callbacks.exec(cHandle, data)
+		except Exception as e:
+			logger.warning(f"[{currentFuncName()}] notification on handle {cHandle} was not handled: {str(e)}")
 
-	def remove(self, charHandle: int):
-		for i in self.list:
-			if i[0] == charHandle:
-				self.list.remove(i)
 
 
-	def exec(self, charHandle: int, data: Any):
-		for i in self.list:
-			if i[0] == charHandle:
-				return i[1](str(charHandle), data)
+class NotificationPump(object):
+	"""Delivers notifications from the bluepy helper while subscriptions are active.
 
-		raise Exception("Callback not found.")
+	The event loop watches the helper's output pipe. Only when it becomes
+	readable is a short ``waitForNotifications`` queued on the connection's
+	serial lane, which dispatches what arrived; while an operation is in
+	flight bluepy dispatches notifications itself. An idle subscribed link
+	therefore holds no thread of the shared executor and never delays the
+	operations queued on its lane, so the executor's ``max_workers`` only
+	caps the calls in flight, not the number of subscribed links.
 
+	If the helper's pipe cannot be watched, the pump falls back to waiting
+	in slices of ``interval`` seconds on the lane, which keeps one pool
+	thread busy per subscribed link.
+	"""
 
+	DEFAULT_INTERVAL = 0.05
+	# Poll timeout of a drain, bluepy blocks in readline without one
+	DRAIN_TIMEOUT = 0.001
 
-class MyDelegate(DefaultDelegate):
-	def __init__(self):
-		DefaultDelegate.__init__(self)
-		self.callbacks = CallbackList()
+	def __init__(self, client, interval=DEFAULT_INTERVAL):
+		self._client = client
+		self.interval = interval
+		self._task = None
 
-	def handleNotification(self, cHandle, data):
-		self.callbacks.exec(cHandle,data)
+	def is_running(self) -> bool:
+		return self._task is not None and not self._task.done()
+
+	def start(self):
+		if not self.is_running():
+			self._task = asyncio.ensure_future(self._run(), loop=self._client.loop)
+
+	async def stop(self):
+		if self.is_running():
+			self._task.cancel()
+			try:
+				await self._task
+			except asyncio.CancelledError:
+				pass
+		self._task = None
+
+	@staticmethod
+	def _helper_fd(peripheral):
+		try:
+			return peripheral._helper.stdout.fileno()
+		except Exception:
+			return None
+
+	async def _readable(self, fd):
+		loop = self._client.loop
+		readable = loop.create_future()
+		loop.add_reader(fd, lambda: readable.done() or readable.set_result(None))
+		try:
+			await readable
+		finally:
+			loop.remove_reader(fd)
+
+	async def _run(self):
+		peripheral = self._client.client
+		if peripheral is None:
+			return
+
+		fd = self._helper_fd(peripheral)
+		if fd is None:
+			logger.debug(f"[{currentFuncName()}] cannot watch the helper of {self._client.address}, waiting in slices.")
+
+		while self._client.client is peripheral:
+			try:
+				if fd is not None:
+					await self._readable(fd)
+
+				timeout = self.DRAIN_TIMEOUT if fd is not None else self.interval
+				await self._client._execute(peripheral.waitForNotifications, timeout)
+			except BTLEDisconnectError:
+				# The client has already marked the link as lost
+				return
+			except Exception as e:
+				# A helper that exited or got out of step delivers nothing anymore,
+				# so the link is dropped and reconnected like a lost one
+				logger.error(f"[{currentFuncName()}] received exception: {str(e)}")
+				self._client._link_lost(e)
+				return
 
 
 
 class BleClient(BaseBleClient):
-	def __init__(self, address: str, loop: AbstractEventLoop = None, iface = 0, **kwargs):
+	LINK_ERRORS = BaseBleClient.LINK_ERRORS + (BTLEDisconnectError,)
+
+	def __init__(self, address: str, loop: AbstractEventLoop = None, iface = None,
+		notifyInterval = NotificationPump.DEFAULT_INTERVAL, **kwargs):
 		BaseBleClient.__init__(self, address, loop, **kwargs)
 
 		self.client = None
-		self.iface = 0
-		self._execute = Executor(loop=loop)
-		self._characteristics = None
-		self._delegate = MyDelegate()
+		# Fixed adapter, or None to let the adapter manager pick one per connection
+		self.iface = iface
+		self._adapter = None
+		self._lane = shared_executor().lane(self.address)
+		self._connected = False
+		self._attributes = attribute_table(self.address)
+		self._delegate = MyDelegate(self.loop)
+		self._pump = NotificationPump(self, notifyInterval)
+
+		# Value handle -> CCCD handle of the active subscriptions
+		self._cccds = {}
+		# Uuids of cached entries checked against the device on this link
+		self._verified = set()
 
 
 # %% Connectivity methods
 
-	async def connect(self, retries=None, iface=None, **kwargs) -> bool:
+	async def connect(self, retries=None, iface=None, waitAdvertising=None, **kwargs) -> bool:
 		"""Connect to the specified GATT server.
 
+		Args:
+			retries (int): Connection attempts, defaults to the attempts of
+				the retry policy or the budget learned by the latency profile.
+			iface (int): HCI adapter to connect with, defaults to the
+				client's ``iface`` or the adapter manager's pick.
+			waitAdvertising (bool): Start every attempt only after a passive
+				scan saw the device advertising, and connect with the address
+				type it advertised. Defaults to the client's ``waitAdvertising``.
+
 		Returns:
 			Boolean representing connection status.
 
@@ -84,39 +176,72 @@ class BleClient(BaseBleClient):
 					return True
 				else:
 					logger.debug(f"[{currentFuncName()}] device might has lost connection.")
+					await self._close_peripheral()
 			except Exception as e:
-				self.logger.error(f"[{currentFuncName()}] received exception while checking connection state: " + str(e))
+				logger.error(f"[{currentFuncName()}] received exception while checking connection state: " + str(e))
 
 
 		# Adjust retries
 		if retries is None:
-			retries = self.maxretries
+			retries = self._attempts()
 
 		# Adjust iface
 		if iface is None:
 			iface = self.iface
+		adapters = adapter_manager()
+
+		if waitAdvertising is None:
+			waitAdvertising = self.waitAdvertising
+
+		# Fail fast while the device's circuit breaker is open
+		self.breaker.check()
 
 		# Try to connect
 		for i in range(0,retries):
+			adapter = iface if iface is not None else adapters.select(self.address)
+			addrType = self._attributes.addrType or "public"
+
 			try:
-				t1 = perf_counter()
-				self.client = await asyncio.wait_for(self._execute(Peripheral, self.address, "public", iface=iface), self.timeout)
-				self._characteristics = None
+				if waitAdvertising:
+					# Connect right after an advertisement instead of waiting out the timeout
+					# for a device that is out of range; no slot is held meanwhile
+					adv = await self._wait_advertisement(scan_stream, self.timeout, iface=adapter, passive=True)
+					addrType = adv.addrType or addrType
+
+				# Reserve a link on the adapter, queueing while the manager's caps are reached
+				await self.manager.acquire(self, adapter)
+
+				# The adapter must not scan while it connects
+				async with shared_scanner(adapter).pause():
+					t1 = perf_counter()
+					self.client = await self._execute_timed(LatencyProfile.CONNECT, Peripheral, self.address, addrType, iface=adapter)
+				self._attributes.addrType = addrType
+				self._connected = True
+				self._adapter = adapter
+				adapters.connected(self.address, adapter)
+				self.manager.connected(self)
 				t2 = perf_counter() - t1
 
 				self.client.withDelegate(self._delegate)
+				self._verified = set()
+				await self._restore_subscriptions()
 
-				logger.info(f"[{currentFuncName()}] connection established in {round(t2,2)}s in {i+1} of {retries} tries.")
+				self.breaker.success()
+				logger.info(f"[{currentFuncName()}] connection established on hci{adapter} in {round(t2,2)}s in {i+1} of {retries} tries.")
 				return True
 
 			except Exception as e:
-				del self.client
-				self.client = None
+				await self._close_peripheral()
+				adapters.failed(self.address, adapter)
+				# Free the slot for the backoff, the next attempt queues again
+				self.manager.closed(self)
 
 				if (i+1) < retries:
 					logger.warning(f"[{currentFuncName()}] failed to connect in {str(i+1)} of {str(retries)} tries." + " Received exception: " + str(e))
+					await asyncio.sleep(self.retry.delay(i))
 				else:
 					logger.error(f"[{currentFuncName()}] could not connect to device." + " Received exception: " + str(e))
+					self.breaker.failure()
 					raise e
 
 
@@ -127,53 +252,146 @@ class BleClient(BaseBleClient):
 			Boolean representing connection status.
 
 		"""
+		await self._cancel_reconnect()
+		await self._close_peripheral()
+
+		self.manager.closed(self)
+
+		logger.debug(f"[{currentFuncName()}] disconnected.")
+
+		return True
+
+
+	async def _close_peripheral(self):
+		"""Stop the pump and shut down the helper of the current peripheral."""
+		await self._pump.stop()
+
+		self._connected = False
+		self._release_adapter()
 		if self.client is not None:
 			try:
 				await self._execute(self.client.disconnect)
 			except Exception as e:
-				logger.debug(f"[{currentFuncName()}] received exception: {str(e)}")
+				logger.debug(f"[{currentFuncName(1)}] received exception: {str(e)}")
 
 			del self.client
 			self.client = None
-			#self._characteristics = None
 
-		logger.debug(f"[{currentFuncName()}] disconnected.")
 
-		return True
+	def _release_adapter(self):
+		if self._adapter is not None:
+			adapter_manager().disconnected(self.address, self._adapter)
+			self._adapter = None
 
 
+	async def _execute(self, func, *args, **kwargs):
+		"""Run a bluepy call on the connection's lane.
 
-	async def is_connected(self):
-		"""Check connection status between this client and the server.
+		A ``BTLEDisconnectError`` raised by the helper marks the link as lost,
+		so the next operation reconnects without asking the helper first.
+		"""
+		try:
+			return await self._lane(func, *args, **kwargs)
+		except BTLEDisconnectError as e:
+			if func is not Peripheral:
+				self._link_lost(e)
+			raise
 
-		Returns:
-			Boolean representing connection status.
 
+	async def _execute_timed(self, kind: str, func, *args, **kwargs):
+		"""Run a bluepy call on the connection's lane within the timeout of ``kind``.
+
+		The timeout starts when the call runs on a pool thread, so waiting
+		for the lane or for a free thread does not count against it. A
+		``Peripheral`` that connects after its caller gave up is disconnected
+		again instead of keeping its helper and link.
 		"""
+		started, job = await self._lane.submit(func, *args, **kwargs)
+		try:
+			await asyncio.shield(started)
+			return await self._timed(kind, asyncio.shield(job))
+		except BTLEDisconnectError as e:
+			if func is not Peripheral:
+				self._link_lost(e)
+			raise
+		except BaseException:
+			if func is Peripheral:
+				job.add_done_callback(self._discard_peripheral)
+			raise
+
+
+	def _discard_peripheral(self, job):
+		if job.cancelled() or job.exception() is not None:
+			return
+		asyncio.ensure_future(self._disconnect_discarded(job.result()), loop=self.loop)
+
+
+	async def _disconnect_discarded(self, peripheral):
+		logger.debug(f"[{currentFuncName()}] closing a link to {self.address} that connected after its timeout.")
+		try:
+			await self._lane(peripheral.disconnect)
+		except Exception as e:
+			logger.debug(f"[{currentFuncName()}] received exception: {str(e)}")
 
-		if self.client is not None:
-			try:
-				state = await asyncio.wait_for(self._execute(self.client.getState), self.timeout)
-				return(state == 'conn')
-			except Exception as e:
-				logger.error(f"[{currentFuncName()}] received exception: {str(e)}")
-		else:
-			return False
 
+	async def _on_link(self, op, *args):
+		"""Connect unless the link is up, then run ``op(*args)`` on it.
 
-	async def __check_connection(self) -> bool:
+		The link state is tracked locally, so a link that dropped while
+		idle, e.g. while lingering, is only noticed by the next operation.
+		That operation is retried once on a new link.
+		"""
+		await self._ensure_connected()
 		try:
-			if await self.is_connected():
-				return True
-		except:
-			raise ConnectionError("Could not proof connecton.")
+			return await op(*args)
+		except BTLEDisconnectError as e:
+			if self._connected:
+				raise
+			logger.info(f"[{currentFuncName()}] link to {self.address} was lost, retrying on a new link: {str(e)}")
 
-		logger.debug(f"[{currentFuncName(1)}] BLE device is not connected or connetion was lost. Trying to connect.")
-		
-		try:
-			return await self.connect()
-		except:
-			raise ConnectionError("BLE device could not be connected or connection was lost and could not be reset")
+		await self._ensure_connected()
+		return await op(*args)
+
+
+	def _link_lost(self, e: Exception):
+		if not self._connected:
+			return
+
+		logger.warning(f"[{currentFuncName()}] link to {self.address} was lost: {str(e)}")
+		self._connected = False
+		self._release_adapter()
+		self.manager.closed(self)
+		self._schedule_reconnect()
+
+
+	async def _restore_subscriptions(self):
+		"""Enable the CCCDs of the active subscriptions again after a reconnect."""
+		for handle in self._delegate.callbacks.keys():
+			cccd = self._cccds.get(handle, None)
+			if not cccd:
+				continue
+			await self._execute_timed(LatencyProfile.OP, self.client.writeCharacteristic, cccd, CCCD_NOTIFY_VAL, True)
+			logger.debug(f"[{currentFuncName()}] restored notify on handle {handle}.")
+
+		if self._delegate.callbacks:
+			self._pump.start()
+
+
+	def has_subscriptions(self) -> bool:
+		return bool(self._delegate.callbacks)
+
+
+	async def is_connected(self):
+		"""Check connection status between this client and the server.
+
+		The state is tracked from connects, disconnects and link errors
+		reported by the helper, so this does not talk to the device.
+
+		Returns:
+			Boolean representing connection status.
+
+		"""
+		return self.client is not None and self._connected
 
 
 # %% GATT services methods
@@ -187,9 +405,10 @@ class BleClient(BaseBleClient):
 		"""
 
 		if self.client is not None:
-			await self.__check_connection()
-			services = await self._execute(self.client.getServices)
-			return [str(s.uuid) for s in services]
+			async with self._operation(True):
+				await self._ensure_connected()
+				services = await self._execute(self.client.getServices)
+				return [str(s.uuid) for s in services]
 
 		else:
 			return None
@@ -198,17 +417,56 @@ class BleClient(BaseBleClient):
 # %% I/O methods
 
 	async def _get_char(self, uuid: str):
-		if self._characteristics is None:
-			self._characteristics = await self._execute(self.client.getCharacteristics)
+		char = self._attributes.lookup(uuid)
+
+		if char is not None and self._attributes.from_cache and char.uuid not in self._verified:
+			if await self._verify_char(char):
+				self._verified.add(char.uuid)
+			else:
+				logger.warning(f"[{currentFuncName()}] cached handles of {self.address} are stale, rediscovering.")
+				self._attributes.invalidate()
+				char = None
+
+		if char is None and not self._attributes:
+			async with self._attributes.discovery:
+				if not self._attributes:
+					characteristics = await asyncio.wait_for(self._execute(self.client.getCharacteristics), self.timeout)
+					self._attributes.load(characteristics)
+					self._attributes.persist()
+			char = self._attributes.lookup(uuid)
 
-		_uuid = UUID(uuid)
+		return char
+
+
+	async def _get_cccd(self, char) -> int:
+		if char.cccd is None:
+			start, end = self._attributes.descriptor_range(char)
+			descriptors = await asyncio.wait_for(self._execute(self.client.getDescriptors, start, end), self.timeout)
+			char.cccd = self._attributes.find_cccd(descriptors)
+			self._attributes.persist()
+
+		return char.cccd
+
+
+	async def _verify_char(self, char) -> bool:
+		"""Check a handle loaded from the on-disk cache against the device.
+
+		Discovers the characteristic declared at the cached declaration
+		handle, one request, so a handle that now belongs to another
+		attribute is not read or written. Done once per link and uuid until
+		the device confirmed the firmware revision the cache belongs to.
+		"""
+		try:
+			declared = await asyncio.wait_for(self._execute(self.client.getCharacteristics, char.handle, char.handle), self.timeout)
+		except BTLEGattError:
+			return False
 
-		for c in self._characteristics:
-			if c.uuid == _uuid:
-				return c
+		return any(c.handle == char.handle and c.valHandle == char.valHandle and str(c.uuid) == char.uuid for c in declared)
 
-		return None
 
+	def bind_firmware_revision(self, revision: str) -> None:
+		"""Invalidate the cached attribute table if the device firmware changed."""
+		self._attributes.bind_firmware(revision)
 
 
 	async def read_gatt_char(self, _uuid: str, **kwargs) -> bytearray:
@@ -223,28 +481,56 @@ class BleClient(BaseBleClient):
 		"""
 		keepConnection = kwargs.get('keepConnection', None)
 
-		try:
-			await self.__check_connection()
+		async with self._operation(keepConnection):
+			return await self._on_link(self._read_char, _uuid)
 
-			char = await self._get_char(_uuid)
 
-			if char is None:
-				raise Exception("Characteristic was not found.")
+	async def _read_char(self, _uuid: str) -> bytearray:
+		char = await self._get_char(_uuid)
 
-			data = await asyncio.wait_for(self._execute(char.read), self.timeout)
+		if char is None:
+			raise Exception("Characteristic was not found.")
 
-			if keepConnection is None:
-				if self.defaultKeepConnection is False:
-					await self.disconnect()
-			elif keepConnection is False:
-				await self.disconnect()
+		data = await self._execute_timed(LatencyProfile.OP, self.client.readCharacteristic, char.valHandle)
 
-			logger.debug(f"[{currentFuncName(0)}] from characteristic \'{_uuid}\' received: {str(data)}")
+		logger.debug(f"[{currentFuncName(0)}] from characteristic \'{_uuid}\' received: {str(data)}")
 
-			return data
+		return data
 
-		except Exception as e:
-			raise e
+
+	async def _read_many(self, uuids: list, return_exceptions: bool = False) -> list:
+		# bluepy has no ATT Read Multiple, so the reads are pipelined instead:
+		# one job on the lane issues them back to back in the worker thread
+		chars = [await self._get_char(u) for u in uuids]
+		handles = [c.valHandle if c is not None else None for c in chars]
+
+		# Not profiled, the job takes one read per handle
+		results = await asyncio.wait_for(self._execute(self.__read_handles, handles), self._timeout() * max(1, len(handles)))
+
+		for _uuid, data in zip(uuids, results):
+			if isinstance(data, Exception):
+				if not return_exceptions:
+					raise data
+				logger.debug(f"[{currentFuncName(0)}] read from {_uuid} failed: {str(data)}")
+
+		logger.debug(f"[{currentFuncName(0)}] read {len(results)} characteristics in one job.")
+
+		return results
+
+
+	def __read_handles(self, handles: list) -> list:
+		results = []
+		for handle in handles:
+			if handle is None:
+				results.append(Exception("Characteristic was not found."))
+				continue
+			try:
+				results.append(self.client.readCharacteristic(handle))
+			except BTLEDisconnectError:
+				raise
+			except Exception as e:
+				results.append(e)
+		return results
 
 
 	async def read_gatt_descriptor(self, handle: int, **kwargs) -> bytearray:
@@ -257,28 +543,31 @@ class BleClient(BaseBleClient):
 			(bytearray) The read data.
 
 		"""
-		# TODO
-		raise NotImplementedError()
+		return await self.read_handle(handle, **kwargs)
 
-		keepConnection = kwargs.get('keepConnection', None)
 
-		try:
-			await self.__check_connection()			
+	async def read_handle(self, handle: int, **kwargs) -> bytearray:
+		"""Read the attribute at ``handle`` without any uuid lookup.
+
+		Args:
+			handle (int): The attribute handle to read from.
 
-			# IMPLEMENTATION HERE #
+		Returns:
+			(bytearray) The read data.
 
-			if keepConnection is None:
-				if self.defaultKeepConnection is False:
-					await self.disconnect()
-			elif keepConnection is False:
-				await self.disconnect()
+		"""
+		keepConnection = kwargs.get('keepConnection', None)
 
-			logger.debug(f"[{currentFuncName(0)}] from descriptor \'{str(handle)}\' received: {str(data)}")
+		async with self._operation(keepConnection):
+			return await self._on_link(self._read_handle, handle)
 
-			return data
 
-		except Exception as e:
-			raise e
+	async def _read_handle(self, handle: int) -> bytearray:
+		data = await self._execute_timed(LatencyProfile.OP, self.client.readCharacteristic, handle)
+
+		logger.debug(f"[{currentFuncName(0)}] from handle \'{str(handle)}\' received: {str(data)}")
+
+		return data
 
 
 	async def write_gatt_char(
@@ -296,33 +585,25 @@ class BleClient(BaseBleClient):
 
 		"""
 		keepConnection = kwargs.get('keepConnection', None)
-		response = True
-
-		try:
-			await self.__check_connection()
 
-			char = await self._get_char(_uuid)
+		async with self._operation(keepConnection):
+			return await self._on_link(self._write_char, _uuid, data, True)
 
-			if char is None:
-				raise Exception("Characteristic was not found.")
 
-			data = bytes(data)
-			ret = await asyncio.wait_for(self._execute(char.write, data, response), self.timeout)
+	async def _write_char(self, _uuid: str, data: bytearray, response: bool = True) -> Any:
+		char = await self._get_char(_uuid)
 
-			if keepConnection is None:
-				if self.defaultKeepConnection is False:
-					await self.disconnect()
-			elif keepConnection is False:
-				await self.disconnect()
+		if char is None:
+			raise Exception("Characteristic was not found.")
 
-			logger.debug(f"[{currentFuncName(0)}] to characteristic \'{_uuid}\' was sent: {str(data)}")
-			if response:
-				logger.debug(f"[{currentFuncName(0)}] characteristic \'{_uuid}\' responded: {str(ret)}")
+		data = bytes(data)
+		ret = await self._execute_timed(LatencyProfile.OP, self.client.writeCharacteristic, char.valHandle, data, response)
 
-			return ret
+		logger.debug(f"[{currentFuncName(0)}] to characteristic \'{_uuid}\' was sent: {str(data)}")
+		if response:
+			logger.debug(f"[{currentFuncName(0)}] characteristic \'{_uuid}\' responded: {str(ret)}")
 
-		except Exception as e:
-			raise e
+		return ret
 
 
 	async def write_gatt_descriptor(
@@ -335,29 +616,35 @@ class BleClient(BaseBleClient):
 			data (bytes or bytearray): The data to send.
 
 		"""
-		# TODO
-		raise NotImplementedError()
+		return await self.write_handle(handle, data, True, **kwargs)
+
+
+	async def write_handle(
+		self, handle: int, data: bytearray, response: bool = True, **kwargs
+	) -> Any:
+		"""Write the attribute at ``handle`` without any uuid lookup.
+
+		Args:
+			handle (int): The attribute handle to write to.
+			data (bytes or bytearray): The data to send.
+			response (bool): If write-with-response operation should be done. Defaults to `True`.
 
+		"""
 		keepConnection = kwargs.get('keepConnection', None)
 
-		try:
-			await self.__check_connection()			
-			
-			# IMPLEMENTATION HERE #
+		async with self._operation(keepConnection):
+			return await self._on_link(self._write_handle, handle, data, response)
 
-			if keepConnection is None:
-				if self.defaultKeepConnection is False:
-					await self.disconnect()
-			elif keepConnection is False:
-				await self.disconnect()
 
-			logger.debug(f"[{currentFuncName(0)}] to descriptor \'{str(handle)}\' was sent: {str(data)}")
-			logger.debug(f"[{currentFuncName(0)}] descriptor \'{str(handle)}\' responded: {str(ret)}")
+	async def _write_handle(self, handle: int, data: bytearray, response: bool = True) -> Any:
+		data = bytes(data)
+		ret = await self._execute_timed(LatencyProfile.OP, self.client.writeCharacteristic, handle, data, response)
 
-			return ret
+		logger.debug(f"[{currentFuncName(0)}] to handle \'{str(handle)}\' was sent: {str(data)}")
+		if response:
+			logger.debug(f"[{currentFuncName(0)}] handle \'{str(handle)}\' responded: {str(ret)}")
 
-		except Exception as e:
-			raise e
+		return ret
 
 
 	async def start_notify(
@@ -378,74 +665,71 @@ class BleClient(BaseBleClient):
 			callback (function): The function to be called on notification.
 
 		"""
-		try:
-			await self.__check_connection()
+		async with self._operation(True):
+			await self._ensure_connected()
 			char = await self._get_char(_uuid)
 
 			if char is None:
 				raise Exception("Characteristic was not found.")
 
-			descriptors = await asyncio.wait_for(self._execute(char.getDescriptors), self.timeout)
+			cccd = await self._get_cccd(char)
 
-			cccd = None
-
-			for d in descriptors:
-				if d.uuid == UUID(CCCD_UUID):
-					cccd = d
-
-			if cccd is None:
+			if not cccd:
 				raise Exception(f"Could not start notify on {str(_uuid)}. CCCD was not found.")
 
-			self._delegate.callbacks.add(char.getHandle(), callback)
+			if not self._delegate.callbacks.add(char.getHandle(), callback):
+				# The CCCD is already enabled for another subscriber
+				logger.debug(f"[{currentFuncName(0)}] added subscriber to characteristic {_uuid}.")
+				return
+
+			try:
+				resp = await self._execute_timed(LatencyProfile.OP, self.client.writeCharacteristic, cccd, CCCD_NOTIFY_VAL, True)
+			except:
+				self._delegate.callbacks.remove(char.getHandle(), callback)
+				raise
 
-			await asyncio.wait_for(self._execute(cccd.write, CCCD_NOTIFY_VAL, withResponse=True), self.timeout)
-			resp = await asyncio.wait_for(self._execute(cccd.read), self.timeout)
+			self._cccds[char.getHandle()] = cccd
+			self._pump.start()
 
 			logger.debug(f"[{currentFuncName(0)}] started notify on characteristic {_uuid}. Response: {str(resp)}")
 
-		except Exception as e:
-			raise e
-
 
-	async def stop_notify(self, _uuid: str, **kwargs) -> None:
+	async def stop_notify(self, _uuid: str, callback: Callable[[str, Any], Any] = None, **kwargs) -> None:
 		"""Deactivate notification/indication on a specified characteristic.
 
 		Args:
 			_uuid: The characteristic to stop notifying/indicating on.
+			callback (function): The subscriber to remove. Defaults to all subscribers.
 
 		"""
 		keepConnection = kwargs.get('keepConnection', None)
 
-		try:
-			await self.__check_connection()
+		async with self._operation(keepConnection):
+			await self._ensure_connected()
 			char = await self._get_char(_uuid)
 
 			if char is None:
 				raise Exception("Characteristic was not found.")
 
-			descriptors = await asyncio.wait_for(self._execute(char.getDescriptors), self.timeout)
-
-			cccd = None
+			cccd = await self._get_cccd(char)
 
-			for d in descriptors:
-				if d.uuid == UUID(CCCD_UUID):
-					cccd = d
-
-			if cccd is None:
+			if not cccd:
 				raise Exception(f"Could not stop notify on {str(_uuid)}. CCCD was not found.")
 
-			self._delegate.callbacks.remove(char.getHandle())
+			handle = char.getHandle()
+			if not self._delegate.callbacks.is_last(handle, callback):
+				# Other subscribers still rely on the CCCD and the connection
+				self._delegate.callbacks.remove(handle, callback)
+				logger.debug(f"[{currentFuncName(0)}] removed subscriber from characteristic {_uuid}.")
+				return
 
-			await asyncio.wait_for(self._execute(cccd.write, CCCD_CLEAR, withResponse=True), self.timeout)
-			resp = await asyncio.wait_for(self._execute(cccd.read), self.timeout)
+			resp = await self._execute_timed(LatencyProfile.OP, self.client.writeCharacteristic, cccd, CCCD_CLEAR, True)
 
-			if keepConnection is None:
-				if self.defaultKeepConnection is False:
-					await self.disconnect()
-			elif keepConnection is False:
-				await self.disconnect()
+			# Only forget the subscribers once the device stopped notifying,
+			# so a failed attempt is restored on the next connect
+			self._delegate.callbacks.remove(handle, callback)
+			self._cccds.pop(handle, None)
+			if not self._delegate.callbacks:
+				await self._pump.stop()
 
 			logger.debug(f"[{currentFuncName(0)}] stopped notify on characteristic {_uuid}. Response: {str(resp)}")
-
-		except Exception as e:
-			raise e
@@ -1,4 +1,9 @@
 import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+DEFAULT_MAX_WORKERS = 32
 
 class Executor:
 	"""In most cases, you can just use the 'execute' instance as a
@@ -8,13 +13,117 @@ class Executor:
 	Executor(nthreads=4)"""
 
 	def __init__(self, loop=None, nthreads=None):
-		from concurrent.futures import ThreadPoolExecutor
 		self._ex = ThreadPoolExecutor(nthreads)
 		if loop is None:
 			loop = asyncio.get_event_loop()
-			
+
 		self._loop = loop
 
 	def __call__(self, f, *args, **kw):
-		from functools import partial
-		return self._loop.run_in_executor(self._ex, partial(f, *args, **kw))
\ No newline at end of file
+		return self._loop.run_in_executor(self._ex, partial(f, *args, **kw))
+
+
+class SerialLane:
+	"""Runs blocking calls for one connection on a shared thread pool.
+
+	Calls submitted to the same lane execute one at a time and in
+	submission order, so a bluepy Peripheral is never used from two
+	threads at once. A lane only occupies a pool thread while it has a
+	call in flight.
+	"""
+
+	def __init__(self, pool: ThreadPoolExecutor, key=None):
+		self.key = key
+		self._pool = pool
+		self._lock = asyncio.Lock()
+
+	async def __call__(self, f, *args, **kw):
+		_, job = await self.submit(f, *args, **kw)
+		return await asyncio.shield(job)
+
+	async def submit(self, f, *args, **kw):
+		"""Queue ``f(*args, **kw)`` on the lane.
+
+		Returns:
+			(tuple) A future resolved once the call runs on a pool thread,
+			so timeouts can leave out the wait for the lane and for a free
+			thread, and the future of the call itself.
+
+		"""
+		loop = asyncio.get_event_loop()
+		started = loop.create_future()
+
+		def run():
+			loop.call_soon_threadsafe(lambda: started.done() or started.set_result(None))
+			return f(*args, **kw)
+
+		await self._lock.acquire()
+		try:
+			job = loop.run_in_executor(self._pool, run)
+		except:
+			self._lock.release()
+			raise
+
+		# The lane stays locked until the worker thread really finishes,
+		# even if the awaiting task is cancelled (e.g. by asyncio.wait_for).
+		job.add_done_callback(lambda _: self._lock.release())
+		return started, job
+
+
+class SharedExecutor:
+	"""Process-wide executor with a global thread cap.
+
+	Every connection gets its own :class:`SerialLane`, which is looked up by
+	key (usually the device address), so the number of threads in use is
+	bounded by the number of connections with work in flight and never
+	exceeds ``max_workers``.
+	"""
+
+	def __init__(self, max_workers=DEFAULT_MAX_WORKERS):
+		self.max_workers = max_workers
+		self._pool = ThreadPoolExecutor(max_workers, thread_name_prefix="bluelib")
+		self._lanes = {}
+		self._mutex = threading.Lock()
+
+	def lane(self, key) -> SerialLane:
+		with self._mutex:
+			lane = self._lanes.get(key, None)
+			if lane is None:
+				lane = SerialLane(self._pool, key)
+				self._lanes[key] = lane
+			return lane
+
+	def __call__(self, f, *args, **kw):
+		"""Run ``f`` on the shared pool without lane ordering."""
+		return asyncio.get_event_loop().run_in_executor(self._pool, partial(f, *args, **kw))
+
+	def shutdown(self, wait=True):
+		self._pool.shutdown(wait=wait)
+
+
+_shared = None
+_shared_mutex = threading.Lock()
+
+def shared_executor() -> SharedExecutor:
+	"""Return the process-wide :class:`SharedExecutor`, creating it on first use."""
+	global _shared
+	with _shared_mutex:
+		if _shared is None:
+			_shared = SharedExecutor()
+		return _shared
+
+def configure_shared_executor(max_workers=DEFAULT_MAX_WORKERS) -> SharedExecutor:
+	"""Replace the process-wide executor with one capped at ``max_workers`` threads.
+
+	Should be called before the first client is created, lanes handed out by
+	the previous executor keep using its pool.
+	"""
+	global _shared
+	with _shared_mutex:
+		previous = _shared
+		_shared = SharedExecutor(max_workers)
+
+	if previous is not None:
+		previous.shutdown(wait=False)
+
+	return _shared
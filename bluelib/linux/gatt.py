@@ -0,0 +1,238 @@
+import asyncio
+import json
+import logging
+import os
+import pathlib
+import threading
+
+from bluepy.btle import UUID
+
+logger = logging.getLogger(__name__)
+
+CCCD_UUID = UUID("00002902-0000-1000-8000-00805f9b34fb")
+
+# Attribute types that end the descriptor list of a characteristic
+_DECLARATION_UUIDS = (UUID(0x2800), UUID(0x2801), UUID(0x2803))
+
+
+class CharEntry(object):
+	"""Handles of one characteristic.
+
+	``cccd`` is None while the descriptors have not been discovered yet and
+	0 if the characteristic has no CCCD.
+	"""
+
+	__slots__ = ("uuid", "handle", "valHandle", "properties", "cccd")
+
+	def __init__(self, uuid: str, handle: int, valHandle: int, properties: int, cccd=None):
+		self.uuid = uuid
+		self.handle = handle
+		self.valHandle = valHandle
+		self.properties = properties
+		self.cccd = cccd
+
+	def getHandle(self) -> int:
+		return self.valHandle
+
+	def to_dict(self) -> dict:
+		return {s: getattr(self, s) for s in self.__slots__}
+
+	@classmethod
+	def from_dict(cls, d: dict):
+		return cls(d["uuid"], d["handle"], d["valHandle"], d["properties"], d.get("cccd", None))
+
+
+class AttributeTable(object):
+	"""UUID -> characteristic index of one device.
+
+	The table stores plain handles instead of bluepy objects, so it stays
+	valid across reconnects and is only rebuilt when it is invalidated.
+	Lookups by the exact string the caller used are a single dict access;
+	other spellings of the same uuid are normalized once and remembered.
+	"""
+
+	def __init__(self, address: str):
+		self.address = address
+		self.addrType = None
+		self.firmware = None
+		self._by_uuid = {}
+		self._aliases = {}
+
+		# True while the handles come from the on-disk cache and neither a
+		# discovery nor the firmware revision confirmed them; the client
+		# checks each one against the device before using it on a link
+		self.from_cache = False
+
+		# Serializes discovery so concurrent first reads discover only once
+		self.discovery = asyncio.Lock()
+
+	def __bool__(self) -> bool:
+		return bool(self._by_uuid)
+
+	def load(self, characteristics):
+		"""Index the characteristics returned by ``Peripheral.getCharacteristics``."""
+		self._by_uuid = {}
+		self._aliases = {}
+		self.from_cache = False
+
+		for c in characteristics:
+			entry = CharEntry(str(c.uuid), c.handle, c.valHandle, c.properties)
+			self._by_uuid[entry.uuid] = entry
+
+	def invalidate(self):
+		self._by_uuid = {}
+		self._aliases = {}
+		self.from_cache = False
+
+		if _cache is not None:
+			_cache.remove(self.address)
+
+	def confirm(self):
+		"""Mark handles loaded from the cache as valid, so they are no longer checked."""
+		self.from_cache = False
+
+	def persist(self):
+		if _cache is not None and self._by_uuid:
+			_cache.save(self)
+
+	def bind_firmware(self, revision: str) -> bool:
+		"""Record the firmware revision the handles belong to.
+
+		Returns:
+			True if the revision changed and the table was invalidated.
+
+		"""
+		if self.firmware == revision:
+			self.confirm()
+
+		changed = self.firmware is not None and self.firmware != revision
+		if changed:
+			logger.info(f"[AttributeTable.bind_firmware] firmware of {self.address} changed from "
+				f"{self.firmware} to {revision}, discarding cached handles.")
+			self.invalidate()
+
+		if changed or self.firmware is None:
+			self.firmware = revision
+			self.persist()
+
+		return changed
+
+	def to_dict(self) -> dict:
+		return {"version": GattCache.VERSION,
+				"address": self.address,
+				"addrType": self.addrType,
+				"firmware": self.firmware,
+				"characteristics": [e.to_dict() for e in self.entries()]}
+
+	def update(self, d: dict):
+		self.addrType = d.get("addrType", None)
+		self.firmware = d.get("firmware", None)
+		self._by_uuid = {}
+		self._aliases = {}
+		for c in d.get("characteristics", []):
+			entry = CharEntry.from_dict(c)
+			self._by_uuid[entry.uuid] = entry
+		self.from_cache = bool(self._by_uuid)
+
+	def entries(self) -> list:
+		return sorted(self._by_uuid.values(), key=lambda e: e.handle)
+
+	def lookup(self, _uuid) -> CharEntry:
+		entry = self._aliases.get(_uuid, None)
+		if entry is not None:
+			return entry
+
+		entry = self._by_uuid.get(str(UUID(_uuid)), None)
+		if entry is not None and isinstance(_uuid, str):
+			self._aliases[_uuid] = entry
+		return entry
+
+	def descriptor_range(self, entry: CharEntry):
+		"""Handle range that can hold the descriptors of ``entry``."""
+		end = 0xFFFF
+		for e in self._by_uuid.values():
+			if entry.valHandle < e.handle <= end:
+				end = e.handle - 1
+		return entry.valHandle + 1, end
+
+	@staticmethod
+	def find_cccd(descriptors) -> int:
+		for d in descriptors:
+			if d.uuid in _DECLARATION_UUIDS:
+				break
+			if d.uuid == CCCD_UUID:
+				return d.handle
+		return 0
+
+
+class GattCache(object):
+	"""Persists attribute tables as one JSON file per device address, so a
+	restarted process can skip service discovery."""
+
+	VERSION = 1
+
+	def __init__(self, directory):
+		self.directory = pathlib.Path(directory)
+
+	def _path(self, address: str) -> pathlib.Path:
+		return self.directory / (address.replace(":", "").lower() + ".json")
+
+	def load(self, table: AttributeTable) -> bool:
+		try:
+			with open(self._path(table.address)) as f:
+				d = json.load(f)
+		except FileNotFoundError:
+			return False
+		except Exception as e:
+			logger.warning(f"[GattCache.load] ignoring unreadable cache of {table.address}: {str(e)}")
+			return False
+
+		if d.get("version", None) != self.VERSION or d.get("address", None) != table.address:
+			return False
+
+		table.update(d)
+		return True
+
+	def save(self, table: AttributeTable):
+		path = self._path(table.address)
+		try:
+			self.directory.mkdir(parents=True, exist_ok=True)
+			tmp = path.with_suffix(".tmp")
+			with open(tmp, "w") as f:
+				json.dump(table.to_dict(), f)
+			os.replace(tmp, path)
+		except Exception as e:
+			logger.warning(f"[GattCache.save] could not write cache of {table.address}: {str(e)}")
+
+	def remove(self, address: str):
+		try:
+			self._path(address).unlink()
+		except FileNotFoundError:
+			pass
+		except Exception as e:
+			logger.warning(f"[GattCache.remove] could not remove cache of {address}: {str(e)}")
+
+
+DEFAULT_CACHE_DIR = os.environ.get("BLUELIB_CACHE_DIR",
+	str(pathlib.Path.home() / ".cache" / "bluelib" / "gatt"))
+
+_cache = GattCache(DEFAULT_CACHE_DIR)
+_tables = {}
+_tables_mutex = threading.Lock()
+
+def configure_gatt_cache(directory=DEFAULT_CACHE_DIR):
+	"""Set the directory of the on-disk attribute cache, or None to disable it."""
+	global _cache
+	_cache = GattCache(directory) if directory is not None else None
+
+def attribute_table(address: str) -> AttributeTable:
+	"""Return the attribute table shared by every client of ``address``,
+	loaded from the on-disk cache the first time it is requested."""
+	with _tables_mutex:
+		table = _tables.get(address, None)
+		if table is None:
+			table = AttributeTable(address)
+			if _cache is not None:
+				_cache.load(table)
+			_tables[address] = table
+		return table
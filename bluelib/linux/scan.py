@@ -1,21 +1,211 @@
 import asyncio
+import contextlib
+import logging
+import threading
 
 from asyncio.events import AbstractEventLoop
-from bluepy.btle import Scanner, ScanEntry
-from executor import Executor
+from bluepy.btle import Scanner, DefaultDelegate
+from bluelib.linux.adapters import adapter_manager
+from bluelib.linux.executor import shared_executor
+from bluelib.advertisement import Advertisement, ScanStream, SeenTable, decode_ad, collect
+from sys import _getframe
 
-async def scan(timeout=2, loop: AbstractEventLoop = asyncio.get_event_loop()):
-	scanner = Scanner(0)
+currentFuncName = lambda n=0: _getframe(n + 1).f_code.co_name
 
-	execute = Executor(loop=loop)
+logger = logging.getLogger(__name__)
 
-	devices = await execute(scanner.scan, timeout)
 
-	dev_list = []
+def _advertisement(entry) -> Advertisement:
+	fields = decode_ad(getattr(entry, "scanData", {}))
+	return Advertisement(entry.addr, addrType=entry.addrType, rssi=entry.rssi,
+		connectable=getattr(entry, "connectable", True), **fields)
 
-	for d in devices:
-		dev_list.append({"address": d.addr,
-						 "name": d.getValueText(ScanEntry.COMPLETE_LOCAL_NAME),
-						 "rssi": d.rssi})
 
-	return dev_list
\ No newline at end of file
+class _ScanDelegate(DefaultDelegate):
+	def __init__(self, scanner):
+		DefaultDelegate.__init__(self)
+		self.scanner = scanner
+
+	def handleDiscovery(self, entry, isNewDev, isNewData):
+		self.scanner._dispatch(entry)
+
+
+class SharedScanner(object):
+	"""One continuous scan per adapter, shared by every :func:`scan_stream`.
+
+	The scan runs in slices of ``SLICE`` seconds on the adapter's lane of
+	the shared executor while at least one stream is subscribed. Reports
+	are decoded and offered to the streams right in the bluepy delegate,
+	on the worker thread; bluepy's own device table is cleared every slice
+	so it does not grow during long scans.
+
+	The scan is passive, i.e. sends no scan requests, as long as every
+	subscribed stream asked for it, and switches to active scanning at the
+	next slice when a stream wanting scan responses subscribes.
+
+	Connecting on an adapter that is scanning fails or stalls on many
+	controllers, so connects :meth:`pause` the scan of their adapter.
+	"""
+
+	SLICE = 0.5
+
+	def __init__(self, iface: int = 0):
+		self.iface = iface
+		self._scanner = Scanner(iface).withDelegate(_ScanDelegate(self))
+		self._lane = shared_executor().lane(f"scan:hci{iface}")
+		self._adapters = adapter_manager()
+		self._streams = ()
+		self._passive = set()
+		self._task = None
+
+		# Number of running pauses; set while the scanner is stopped and
+		# once the last pause ended, respectively
+		self._paused = 0
+		self._stopped = asyncio.Event()
+		self._stopped.set()
+		self._resumed = asyncio.Event()
+		self._resumed.set()
+
+	def subscribe(self, stream: ScanStream, passive: bool = False):
+		self._streams = self._streams + (stream,)
+		if passive:
+			self._passive.add(stream)
+		if self._task is None:
+			self._task = asyncio.ensure_future(self._run())
+
+	def unsubscribe(self, stream: ScanStream):
+		self._streams = tuple(s for s in self._streams if s is not stream)
+		self._passive.discard(stream)
+
+	@contextlib.asynccontextmanager
+	async def pause(self):
+		"""Stop the scan while the block runs, e.g. to connect on the adapter.
+
+		Waits for the running slice to end and the scanner to stop. The
+		scan starts again when the last pause ended.
+		"""
+		self._paused += 1
+		self._resumed.clear()
+		try:
+			await self._stopped.wait()
+			yield
+		finally:
+			self._paused -= 1
+			if not self._paused:
+				self._resumed.set()
+
+	def _wants_passive(self) -> bool:
+		return all(s in self._passive for s in self._streams)
+
+	def _dispatch(self, entry):
+		self._adapters.observe(entry.addr, self.iface, entry.rssi)
+
+		# Runs on the worker thread, skip the decoding if nobody wants the address
+		streams = [s for s in self._streams if s.match_address(entry.addr)]
+		if not streams:
+			return
+
+		adv = _advertisement(entry)
+		for s in streams:
+			s.offer(adv)
+
+	async def _run(self):
+		# Mode of the running scan, None while the scanner is stopped
+		scanning = None
+		try:
+			try:
+				while self._streams:
+					if self._paused:
+						if scanning is not None:
+							scanning = None
+							await self._lane(self._scanner.stop)
+							logger.debug(f"[{currentFuncName()}] paused scanning on hci{self.iface}.")
+						self._stopped.set()
+						await self._resumed.wait()
+						continue
+
+					passive = self._wants_passive()
+					if scanning != passive:
+						if scanning is not None:
+							await self._lane(self._scanner.stop)
+						self._stopped.clear()
+						await self._lane(self._scanner.start, passive)
+						logger.debug(f"[{currentFuncName()}] {'switched to' if scanning is not None else 'started'} "
+							f"{'passive' if passive else 'active'} scanning on hci{self.iface}.")
+						scanning = passive
+					self._scanner.clear()
+					await self._lane(self._scanner.process, self.SLICE)
+			finally:
+				if scanning is not None:
+					await self._lane(self._scanner.stop)
+					logger.debug(f"[{currentFuncName()}] stopped scanning on hci{self.iface}.")
+				self._stopped.set()
+
+		except Exception as e:
+			logger.error(f"[{currentFuncName()}] scan on hci{self.iface} failed: {str(e)}")
+			streams, self._streams = self._streams, ()
+			for s in streams:
+				s.close(e)
+
+		finally:
+			self._task = None
+			# A stream may have subscribed while the scan was stopping
+			if self._streams:
+				self._task = asyncio.ensure_future(self._run())
+
+
+_scanners = {}
+_scanners_mutex = threading.Lock()
+
+def shared_scanner(iface: int = 0) -> SharedScanner:
+	"""Return the :class:`SharedScanner` of adapter ``hci<iface>``, creating it on first use."""
+	with _scanners_mutex:
+		scanner = _scanners.get(iface, None)
+		if scanner is None:
+			scanner = SharedScanner(iface)
+			_scanners[iface] = scanner
+		return scanner
+
+
+async def scan_stream(filters=None, iface: int = None, seen: int = SeenTable.DEFAULT_MAXSIZE,
+	refresh: float = None, maxsize: int = ScanStream.DEFAULT_MAXSIZE, passive: bool = False):
+	"""Scan continuously and yield advertisements as they arrive.
+
+	A device is yielded when it is first seen, when its advertised data
+	changes or, if ``refresh`` is set, when it was last yielded ``refresh``
+	seconds ago.
+
+	Args:
+		filters (ScanFilter or list): Only advertisements matching at least one
+			filter are yielded. Defaults to all advertisements.
+		iface (int): Number of the HCI adapter to scan on. Defaults to the
+			adapter with the least links.
+		seen (int): Maximum number of devices remembered for deduplication.
+		refresh (float): Seconds after which an unchanged device is yielded again.
+		maxsize (int): Maximum number of pending events, the oldest is
+			dropped when a slow consumer lets the queue fill up.
+		passive (bool): The stream does not need scan responses, so the
+			adapter may scan passively while no active stream is subscribed.
+
+	"""
+	if iface is None:
+		iface = adapter_manager().scan_adapter()
+
+	stream = ScanStream(asyncio.get_event_loop(), filters, seen, refresh, maxsize)
+	scanner = shared_scanner(iface)
+	scanner.subscribe(stream, passive)
+
+	try:
+		async for adv in stream:
+			yield adv
+	finally:
+		stream.close()
+		scanner.unsubscribe(stream)
+		if stream.dropped:
+			logger.debug(f"[{currentFuncName()}] dropped {stream.dropped} events of a slow consumer.")
+
+
+async def scan(timeout=2, loop: AbstractEventLoop = None, iface: int = None):
+	devices = await collect(scan_stream(iface=iface), timeout)
+
+	return [adv.to_dict() for adv in devices]
@@ -0,0 +1,147 @@
+# -*- coding: utf-8 -*-
+"""
+Per-device latency history and the timeouts and retry budgets learned from it.
+
+Every client records how long its connects and GATT operations take in the
+:class:`LatencyProfile` of its device. Once enough samples were seen, a
+client created with ``adaptiveTimeouts=True`` waits ``factor`` times the
+recent 99th percentile instead of its fixed ``timeout``: a device that
+answers in 50ms fails within a second when it stops answering, while one
+that takes seconds to connect is given the time it needs.
+
+Timeouts only tell that a device took longer, so they are not taken as
+latencies. Instead every consecutive timeout doubles the next one, up to
+the fixed timeout, until a device that became slower answers again and
+its new latencies take over.
+"""
+
+import collections
+import logging
+import math
+import threading
+
+logger = logging.getLogger(__name__)
+
+
+class LatencyProfile(object):
+	"""Rolling latencies and outcomes of the connects and operations of one device.
+
+	Args:
+		address (str): Address of the device.
+		window (int): Number of recent samples kept per kind.
+		factor (float): Timeouts are this many times the ``percentile``.
+		percentile (float): Percentile of the recent latencies, in [0, 100].
+		min_samples (int): Samples needed before the defaults are replaced.
+		min_timeout (float): Lower bound of a learned timeout, in seconds.
+		max_timeout (float): Upper bound of a learned timeout, in seconds.
+		success_target (float): Probability in [0, 1) that one of the
+			attempts of a connect succeeds, used to size the retry budget.
+		max_attempts (int): Upper bound of a learned retry budget.
+
+	"""
+
+	CONNECT = "connect"
+	OP      = "op"
+
+	def __init__(self, address: str, window=128, factor=3.0, percentile=99.0, min_samples=10,
+		min_timeout=0.5, max_timeout=120.0, success_target=0.999, max_attempts=6):
+		self.address = address
+		self.window = window
+		self.factor = factor
+		self.percentile = percentile
+		self.min_samples = min_samples
+		self.min_timeout = min_timeout
+		self.max_timeout = max_timeout
+		self.success_target = success_target
+		self.max_attempts = max_attempts
+
+		# kind -> recent latencies of successes, and recent outcomes (True for a success)
+		self._latencies = collections.defaultdict(lambda: collections.deque(maxlen=window))
+		self._outcomes = collections.defaultdict(lambda: collections.deque(maxlen=window))
+		# kind -> timeouts since the last success
+		self._timeouts = collections.Counter()
+
+	def record(self, kind: str, latency: float):
+		"""Record a successful ``kind`` that took ``latency`` seconds."""
+		self._latencies[kind].append(latency)
+		self._outcomes[kind].append(True)
+		self._timeouts[kind] = 0
+
+	def timed_out(self, kind: str):
+		"""Record a ``kind`` that did not complete within its timeout."""
+		self._outcomes[kind].append(False)
+		self._timeouts[kind] += 1
+
+	def failed(self, kind: str):
+		"""Record a ``kind`` that failed for another reason than its timeout."""
+		self._outcomes[kind].append(False)
+
+	def ready(self, kind: str) -> bool:
+		"""True once enough latencies of ``kind`` were recorded to learn from."""
+		return len(self._latencies[kind]) >= self.min_samples
+
+	def quantile(self, kind: str, p: float) -> float:
+		"""The ``p``-th percentile of the recent latencies of ``kind``, or None."""
+		samples = self._latencies[kind]
+		if not samples:
+			return None
+		samples = sorted(samples)
+		return samples[min(len(samples) - 1, int(round(p / 100.0 * (len(samples) - 1))))]
+
+	def timeout(self, kind: str, default: float) -> float:
+		"""Seconds to wait for the next ``kind``, ``default`` until the profile is ready."""
+		if not self.ready(kind):
+			return default
+		learned = min(max(self.quantile(kind, self.percentile) * self.factor, self.min_timeout), self.max_timeout)
+		if not self._timeouts[kind]:
+			return learned
+		return min(learned * 2 ** self._timeouts[kind], max(learned, default))
+
+	def failure_rate(self, kind: str) -> float:
+		"""Share of the recent ``kind`` attempts that failed, smoothed towards 1/2."""
+		outcomes = self._outcomes[kind]
+		return (outcomes.count(False) + 1) / (len(outcomes) + 2)
+
+	def attempts(self, kind: str, default: int) -> int:
+		"""Attempts needed to reach ``success_target``, ``default`` until the profile is ready.
+
+		A device that rarely fails gets one or two attempts, so a dead one is
+		given up on quickly, a flaky one gets up to ``max_attempts``.
+		"""
+		if len(self._outcomes[kind]) < self.min_samples:
+			return default
+		attempts = math.ceil(math.log(1 - self.success_target) / math.log(self.failure_rate(kind)))
+		return min(max(attempts, 1), self.max_attempts)
+
+	def to_dict(self) -> dict:
+		"""Sample count, failure rate and percentiles in seconds per kind."""
+		return {kind: {"samples": len(self._latencies[kind]),
+					"failure_rate": self.failure_rate(kind),
+					"timeouts": self._timeouts[kind],
+					"p50": self.quantile(kind, 50),
+					"p99": self.quantile(kind, 99)}
+				for kind in self._outcomes}
+
+
+_profile_settings = {}
+_profiles = {}
+_profiles_mutex = threading.Lock()
+
+def configure_profiles(**settings):
+	"""Set the parameters of the per-device :class:`LatencyProfile`.
+
+	Drops the existing profiles, so every device starts learning again.
+	"""
+	with _profiles_mutex:
+		_profile_settings.clear()
+		_profile_settings.update(settings)
+		_profiles.clear()
+
+def latency_profile(address: str) -> LatencyProfile:
+	"""Return the latency profile shared by every client of ``address``."""
+	with _profiles_mutex:
+		profile = _profiles.get(address, None)
+		if profile is None:
+			profile = LatencyProfile(address, **_profile_settings)
+			_profiles[address] = profile
+		return profile
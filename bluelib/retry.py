@@ -0,0 +1,164 @@
+# -*- coding: utf-8 -*-
+"""
+Retry policy and per-device circuit breaker shared by the backend clients.
+"""
+
+import asyncio
+import logging
+import random
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class CircuitOpenError(ConnectionError):
+	"""Raised instead of trying a device whose circuit breaker is open."""
+
+
+class RetryPolicy(object):
+	"""Exponential backoff with jitter.
+
+	The n-th retry waits ``base_delay * multiplier ** n``, capped at
+	``max_delay``. ``jitter`` randomizes the lower part of that delay so
+	that devices failing together do not retry in lockstep.
+
+	Args:
+		attempts (int): Number of attempts, including the first one.
+		base_delay (float): Delay before the first retry, in seconds.
+		max_delay (float): Upper bound of every delay, in seconds.
+		multiplier (float): Growth factor of the delay per retry.
+		jitter (float): Share in [0, 1] of each delay that is randomized.
+		retry_on (tuple): Exception types that are retried.
+
+	"""
+
+	def __init__(self, attempts=3, base_delay=0.2, max_delay=10.0, multiplier=2.0,
+		jitter=0.5, retry_on=(Exception,)):
+		self.attempts = attempts
+		self.base_delay = base_delay
+		self.max_delay = max_delay
+		self.multiplier = multiplier
+		self.jitter = jitter
+		self.retry_on = retry_on
+		self._rng = random.Random()
+
+	def delay(self, retry: int) -> float:
+		"""Seconds to wait before retry number ``retry`` (0 for the first retry)."""
+		delay = min(self.base_delay * self.multiplier ** retry, self.max_delay)
+		return delay * (1 - self.jitter) + self._rng.uniform(0, delay * self.jitter)
+
+	async def run(self, func, *args, breaker=None, **kwargs):
+		"""Await ``func(*args, **kwargs)``, retrying it according to the policy.
+
+		Args:
+			breaker (CircuitBreaker): Breaker consulted before every attempt
+				and told about the outcome of the run, or None. A run that
+				exhausts its attempts counts as one failure, like a connect.
+
+		"""
+		for i in range(self.attempts):
+			if breaker is not None:
+				breaker.check()
+
+			try:
+				result = await func(*args, **kwargs)
+			except CircuitOpenError:
+				raise
+			except self.retry_on as e:
+				if (i+1) >= self.attempts:
+					if breaker is not None:
+						breaker.failure()
+					raise
+
+				delay = self.delay(i)
+				logger.debug(f"[RetryPolicy.run] {getattr(func, '__name__', func)} failed in {i+1} of "
+					f"{self.attempts} tries, retrying in {round(delay,2)}s: {str(e)}")
+				await asyncio.sleep(delay)
+				continue
+
+			if breaker is not None:
+				breaker.success()
+			return result
+
+
+class CircuitBreaker(object):
+	"""Fails fast for a device that keeps failing.
+
+	After ``failure_threshold`` consecutive failures the breaker opens and
+	:meth:`check` raises :class:`CircuitOpenError` right away. Once
+	``reset_timeout`` seconds have passed, one caller is let through to
+	probe the device: its success closes the breaker, its failure opens it
+	for another ``reset_timeout``.
+	"""
+
+	CLOSED      = "closed"
+	OPEN        = "open"
+	HALF_OPEN   = "half_open"
+
+	def __init__(self, address: str, failure_threshold=3, reset_timeout=30.0):
+		self.address = address
+		self.failure_threshold = failure_threshold
+		self.reset_timeout = reset_timeout
+
+		self.state = CircuitBreaker.CLOSED
+		self.failures = 0
+		self._opened_at = 0.0
+
+	def remaining(self) -> float:
+		"""Seconds until an open breaker lets a probe through."""
+		if self.state != CircuitBreaker.OPEN:
+			return 0.0
+		return max(0.0, self._opened_at + self.reset_timeout - time.monotonic())
+
+	def check(self):
+		"""Raise :class:`CircuitOpenError` if the device must not be tried now."""
+		if self.state == CircuitBreaker.CLOSED:
+			return
+
+		if self.state == CircuitBreaker.OPEN and self.remaining() <= 0:
+			logger.debug(f"[CircuitBreaker.check] probing {self.address}.")
+			self.state = CircuitBreaker.HALF_OPEN
+			return
+
+		raise CircuitOpenError(f"Circuit of {self.address} is open, "
+			f"next attempt in {round(self.remaining(),1)}s.")
+
+	def success(self):
+		if self.state != CircuitBreaker.CLOSED:
+			logger.info(f"[CircuitBreaker.success] {self.address} recovered, closing circuit.")
+		self.state = CircuitBreaker.CLOSED
+		self.failures = 0
+
+	def failure(self):
+		self.failures += 1
+		if self.state == CircuitBreaker.HALF_OPEN or self.failures >= self.failure_threshold:
+			if self.state != CircuitBreaker.OPEN:
+				logger.warning(f"[CircuitBreaker.failure] {self.address} failed {self.failures} times, "
+					f"opening circuit for {self.reset_timeout}s.")
+			self.state = CircuitBreaker.OPEN
+			self._opened_at = time.monotonic()
+
+
+_breaker_settings = {"failure_threshold": 3, "reset_timeout": 30.0}
+_breakers = {}
+_breakers_mutex = threading.Lock()
+
+def configure_circuit_breakers(failure_threshold=3, reset_timeout=30.0):
+	"""Set the thresholds of the per-device circuit breakers.
+
+	Drops the existing breakers, so every device starts closed again.
+	"""
+	with _breakers_mutex:
+		_breaker_settings["failure_threshold"] = failure_threshold
+		_breaker_settings["reset_timeout"] = reset_timeout
+		_breakers.clear()
+
+def circuit_breaker(address: str) -> CircuitBreaker:
+	"""Return the circuit breaker shared by every client of ``address``."""
+	with _breakers_mutex:
+		breaker = _breakers.get(address, None)
+		if breaker is None:
+			breaker = CircuitBreaker(address, **_breaker_settings)
+			_breakers[address] = breaker
+		return breaker
@@ -0,0 +1,99 @@
+# -*- coding: utf-8 -*-
+"""
+Batched GATT sessions: many reads and writes on one connection.
+"""
+
+import logging
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+
+class GattSession(object):
+	"""Runs GATT operations back to back on one link.
+
+	.. code-block:: python
+
+		async with client.session() as s:
+			name, model = await s.read_many([NAME_UUID, MODEL_UUID])
+			await s.write_many({LABEL_UUID: b"kitchen"})
+
+	The session connects once when it is entered. The operations inside it
+	skip the connection check and release logic of the single operation
+	API, the link is handed back according to ``keepConnection`` when the
+	session is left.
+	"""
+
+	def __init__(self, client, keepConnection=None):
+		self.client = client
+		self.keepConnection = keepConnection
+		self._operation = None
+
+	async def __aenter__(self):
+		self._operation = self.client._operation(self.keepConnection)
+		await self._operation.__aenter__()
+		try:
+			await self.client._ensure_connected()
+		except BaseException as e:
+			await self._operation.__aexit__(type(e), e, e.__traceback__)
+			self._operation = None
+			raise
+		return self
+
+	async def __aexit__(self, exc_type, exc_val, exc_tb):
+		operation, self._operation = self._operation, None
+		return await operation.__aexit__(exc_type, exc_val, exc_tb)
+
+	def __check_open(self):
+		if self._operation is None:
+			raise RuntimeError("GATT session is not open.")
+
+	async def read(self, _uuid: str) -> bytearray:
+		self.__check_open()
+		return await self.client._read_char(_uuid)
+
+	async def write(self, _uuid: str, data: bytearray, response: bool = True) -> Any:
+		self.__check_open()
+		return await self.client._write_char(_uuid, data, response)
+
+	async def read_many(self, uuids: list, return_exceptions: bool = False) -> list:
+		"""Read several characteristics.
+
+		Args:
+			uuids (list): The uuids of the characteristics to read from.
+			return_exceptions (bool): Put the exception of a failed read in
+				its slot instead of raising it. Defaults to `False`.
+
+		Returns:
+			(list) The read data, in the order of ``uuids``.
+
+		"""
+		self.__check_open()
+		return await self.client._read_many(list(uuids), return_exceptions)
+
+	async def write_many(self, values: dict, response: bool = True, return_exceptions: bool = False) -> list:
+		"""Write several characteristics, in the order of ``values``.
+
+		Args:
+			values (dict): Maps the uuid of each characteristic to the data to send.
+			response (bool): If write-with-response operations should be done. Defaults to `True`.
+			return_exceptions (bool): Put the exception of a failed write in
+				its slot instead of raising it. Defaults to `False`.
+
+		Returns:
+			(list) The responses, in the order of ``values``.
+
+		"""
+		self.__check_open()
+
+		results = []
+		for _uuid, data in values.items():
+			try:
+				results.append(await self.client._write_char(_uuid, data, response))
+			except Exception as e:
+				if not return_exceptions:
+					raise
+				logger.debug(f"[GattSession.write_many] write to {_uuid} failed: {str(e)}")
+				results.append(e)
+
+		return results
@@ -0,0 +1,414 @@
+# -*- coding: utf-8 -*-
+"""
+Fleet polling sharded over worker processes, one event loop each.
+
+.. code-block:: python
+
+	def measure_job(address):
+		# Runs in the worker, which owns the sensor and its event loop
+		return tSense(address).measure
+
+	poller = ShardedPoller(measure_job, workers=4)
+	for address in addresses:
+		poller.add(address, 60, ["temperature"])
+
+	async with poller:
+		async for result in poller.results():
+			print(result.key, result.value)
+
+A single :class:`bluelib.fleet.FleetPoller` dispatches callbacks, decodes
+values and logs on one core. :class:`ShardedPoller` spreads the devices
+over worker processes instead, each running its own ``FleetPoller`` on its
+own loop and, by default, its own HCI adapter. The coordinator assigns
+every device to the worker with the least polling load and receives the
+results in batches over one queue.
+
+Workers report how late their runs start. When a worker falls more than
+``max_delay`` seconds behind while another keeps up, a share of its
+devices is moved over.
+
+Devices, their arguments and the results cross process boundaries, so
+they have to be picklable; a value or error that is not arrives as its
+``repr()``, the error wrapped in a ``RuntimeError``. The job function itself is created in the
+worker by ``factory(key)``, which has to be a module level function. The
+connection caps of :mod:`bluelib.connection` apply per worker.
+"""
+
+import asyncio
+import logging
+import math
+import multiprocessing
+import pickle
+import threading
+import time
+
+from bluelib.fleet import FleetPoller, PollResult
+
+logger = logging.getLogger(__name__)
+
+
+class _Spec(object):
+	__slots__ = ("key", "interval", "args", "kwargs", "priority")
+
+	def __init__(self, key, interval, args, kwargs, priority):
+		self.key = key
+		self.interval = interval
+		self.args = args
+		self.kwargs = kwargs
+		self.priority = priority
+
+	def command(self) -> tuple:
+		return ("add", self.key, self.interval, self.args, self.kwargs, self.priority)
+
+
+class _Worker(object):
+	"""The loop of one worker process."""
+
+	BATCH_SIZE      = 64
+
+	def __init__(self, index, factory, commands, results, concurrency, poller_kwargs, watch,
+		report_interval, batch_interval):
+		self.index = index
+		self.factory = factory
+		self.commands = commands
+		self.results = results
+		self.report_interval = report_interval
+		self.batch_interval = batch_interval
+		self.watch = watch
+
+		self.poller = FleetPoller(concurrency=concurrency, **poller_kwargs)
+		self._batch = []
+		self._delays = []
+		self._failures = 0
+
+	def _flush(self):
+		if self._batch:
+			# Pickled here, as the queue's feeder thread would drop the batch on an error
+			try:
+				payload = pickle.dumps(self._batch)
+			except Exception:
+				payload = pickle.dumps([self._picklable(r) for r in self._batch])
+			self.results.put(("results", self.index, payload))
+			self._batch = []
+
+	@staticmethod
+	def _picklable(r: PollResult) -> PollResult:
+		try:
+			pickle.dumps(r.value)
+		except Exception:
+			r.value = repr(r.value)
+		try:
+			pickle.dumps(r.error)
+		except Exception:
+			r.error = RuntimeError(repr(r.error))
+		return r
+
+	def _report(self):
+		delays, self._delays = self._delays, []
+		failures, self._failures = self._failures, 0
+		self.results.put(("stats", self.index, {
+			"jobs": len(self.poller),
+			"in_flight": self.poller.in_flight,
+			"runs": len(delays),
+			"failures": failures,
+			"delay": sum(delays) / len(delays) if delays else 0.0,
+			"delay_max": max(delays) if delays else 0.0}))
+
+	async def _forward(self):
+		async for r in self.poller.results():
+			if r.error is not None:
+				self._failures += 1
+			self._delays.append(r.delay)
+			self._batch.append(r)
+			if len(self._batch) >= self.BATCH_SIZE:
+				self._flush()
+
+	async def _tick(self):
+		next_report = time.monotonic() + self.report_interval
+		while True:
+			await asyncio.sleep(self.batch_interval)
+			self._flush()
+			if time.monotonic() >= next_report:
+				next_report += self.report_interval
+				self._report()
+
+	def _add(self, key, interval, args, kwargs, priority):
+		job = self.factory(key)
+		func, adv_interval = job if isinstance(job, tuple) else (job, None)
+		self.poller.add(key, func, interval, *args, priority=priority, adv_interval=adv_interval, **kwargs)
+
+	async def run(self):
+		loop = asyncio.get_event_loop()
+		tasks = [asyncio.ensure_future(self._forward()), asyncio.ensure_future(self._tick())]
+
+		async with self.poller:
+			if self.watch:
+				import bluelib
+				self.poller.watch(bluelib.scan_stream(refresh=0))
+
+			while True:
+				command = await loop.run_in_executor(None, self.commands.get)
+				if command[0] == "add":
+					try:
+						self._add(*command[1:])
+					except Exception as e:
+						logger.error(f"[_Worker.run] worker {self.index} could not add {command[1]}: {str(e)}")
+						self._batch.append(PollResult(command[1], None, RuntimeError(repr(e)), time.time()))
+				elif command[0] == "remove":
+					self.poller.remove(command[1])
+				else:
+					break
+
+		for t in tasks:
+			t.cancel()
+		await asyncio.gather(*tasks, return_exceptions=True)
+		self._flush()
+
+
+def _worker_main(index, adapter, factory, initializer, initargs, commands, results, concurrency,
+	poller_kwargs, watch, report_interval, batch_interval):
+	if adapter is not None:
+		# Only reads sysfs, so it does not pull in the Linux backend
+		from bluelib.linux.adapters import configure_adapters
+		configure_adapters([adapter])
+
+	async def main():
+		if initializer is not None:
+			initializer(*initargs)
+		worker = _Worker(index, factory, commands, results, concurrency, poller_kwargs, watch,
+			report_interval, batch_interval)
+		await worker.run()
+
+	try:
+		asyncio.run(main())
+	except KeyboardInterrupt:
+		pass
+
+
+class ShardedPoller(object):
+	"""Polls devices in ``workers`` processes, each with its own :class:`FleetPoller`.
+
+	Args:
+		factory (function): Called in the worker as ``factory(key)``; returns
+			the coroutine function to poll, or a ``(function, adv_interval)``
+			pair. Has to be picklable, i.e. defined at module level.
+		workers (int): Number of worker processes. Defaults to one per adapter.
+		adapters (list): HCI adapter indexes the workers are pinned to, in
+			turn. Defaults to every adapter found; pass an empty list to let
+			each worker use all of them.
+		concurrency (int): Runs in flight per worker.
+		initializer (function): Called in every worker with ``initargs``,
+			inside its event loop, before the first job is added.
+		initargs (tuple): Arguments of ``initializer``.
+		watch (bool): Let every worker time connects by a scan it runs.
+		max_delay (float): Mean delay of the runs, in seconds, above which a
+			worker is behind.
+		rebalance_share (float): Share of the devices of a worker that is
+			moved when it is behind.
+		report_interval (float): Seconds between the reports of the workers.
+		batch_interval (float): Seconds results are batched in a worker.
+		loop (AbstractEventLoop): Event loop, defaults to the current one.
+		**poller_kwargs: Passed on to every worker's :class:`FleetPoller`.
+
+	"""
+
+	def __init__(self, factory, workers=None, adapters=None, concurrency=FleetPoller.DEFAULT_CONCURRENCY,
+		initializer=None, initargs=(), watch=False, max_delay=1.0, rebalance_share=0.1,
+		report_interval=1.0, batch_interval=0.05, loop=None, **poller_kwargs):
+
+		if adapters is None:
+			from bluelib.linux.adapters import find_adapters
+			adapters = find_adapters()
+
+		self.factory = factory
+		self.workers = workers if workers else max(1, len(adapters))
+		self.adapters = list(adapters)
+		self.concurrency = concurrency
+		self.initializer = initializer
+		self.initargs = initargs
+		self.watch = watch
+		self.max_delay = max_delay
+		self.rebalance_share = rebalance_share
+		self.report_interval = report_interval
+		self.batch_interval = batch_interval
+		self.poller_kwargs = poller_kwargs
+		self.loop = loop if loop else asyncio.get_event_loop()
+
+		self._specs = {}
+		self._assignment = {}                       # key -> worker index
+		self._load = [0.0] * self.workers           # runs per second of each worker
+		self._stats = {}
+		self._processes = []
+		self._commands = []
+		self._results = None
+		self._reader = None
+		self._queue = asyncio.Queue()
+		self._closed = False
+		self._next_rebalance = 0.0
+
+	def __len__(self) -> int:
+		return len(self._specs)
+
+	def adapter(self, index: int) -> int:
+		"""Adapter worker ``index`` is pinned to, or None."""
+		return self.adapters[index % len(self.adapters)] if self.adapters else None
+
+	def add(self, key, interval: float, *args, priority: int = 0, **kwargs):
+		"""Poll the job ``factory(key)`` with ``(*args, **kwargs)`` every ``interval`` seconds."""
+		if key in self._specs:
+			self.remove(key)
+
+		spec = _Spec(key, interval, args, kwargs, priority)
+		self._specs[key] = spec
+		self._assign(spec, min(range(self.workers), key=lambda i: self._load[i]))
+
+	def remove(self, key):
+		"""Stop polling ``key``."""
+		spec = self._specs.pop(key, None)
+		if spec is None:
+			return
+		index = self._assignment.pop(key)
+		self._load[index] -= 1.0 / spec.interval
+		self._send(index, ("remove", key))
+
+	def _assign(self, spec: _Spec, index: int):
+		self._assignment[spec.key] = index
+		self._load[index] += 1.0 / spec.interval
+		self._send(index, spec.command())
+
+	def _send(self, index: int, command: tuple):
+		if self._commands:
+			self._commands[index].put(command)
+
+	def _move(self, key, index: int):
+		spec = self._specs[key]
+		old = self._assignment[key]
+		self._load[old] -= 1.0 / spec.interval
+		self._send(old, ("remove", key))
+		self._assign(spec, index)
+
+	def _rebalance(self):
+		"""Move devices off the worker furthest behind to the one most ahead."""
+		now = self.loop.time()
+		if now < self._next_rebalance or len(self._stats) < 2:
+			return
+
+		behind = max(self._stats, key=lambda i: self._stats[i]["delay"])
+		ahead = min(self._stats, key=lambda i: self._stats[i]["delay"])
+		if self._stats[behind]["delay"] <= self.max_delay or self._stats[ahead]["delay"] > self.max_delay / 2:
+			return
+
+		keys = [k for k, i in self._assignment.items() if i == behind]
+		count = max(1, int(math.ceil(len(keys) * self.rebalance_share)))
+		if count >= len(keys):
+			return
+
+		logger.info(f"[ShardedPoller._rebalance] worker {behind} is {round(self._stats[behind]['delay'],2)}s "
+			f"behind, moving {count} of its {len(keys)} devices to worker {ahead}.")
+		for key in keys[-count:]:
+			self._move(key, ahead)
+
+		# Wait for reports that reflect the move
+		self._stats.clear()
+		self._next_rebalance = now + 2 * self.report_interval
+
+	def _handle(self, message):
+		kind, index, payload = message
+		if kind == "results":
+			for r in payload:
+				self._queue.put_nowait(r)
+		elif kind == "stats":
+			self._stats[index] = payload
+			self._rebalance()
+
+	def _read(self):
+		"""Forward the messages of the workers to the loop, on a thread of its own."""
+		while True:
+			message = self._results.get()
+			if message[0] == "close":
+				return
+			if message[0] == "results":
+				message = ("results", message[1], pickle.loads(message[2]))
+			self.loop.call_soon_threadsafe(self._handle, message)
+
+	def metrics(self) -> dict:
+		"""The latest report of every worker: jobs, runs in flight, runs, failures and delays."""
+		return {i: dict(s) for i, s in self._stats.items()}
+
+	def start(self):
+		if self._processes:
+			return
+		self._closed = False
+
+		# Forking a process with a running event loop and executor threads is unsafe
+		context = multiprocessing.get_context("spawn")
+		self._results = context.Queue()
+
+		for i in range(self.workers):
+			commands = context.Queue()
+			process = context.Process(target=_worker_main, name=f"bluelib-shard-{i}", daemon=True,
+				args=(i, self.adapter(i), self.factory, self.initializer, self.initargs, commands,
+					self._results, self.concurrency, self.poller_kwargs, self.watch,
+					self.report_interval, self.batch_interval))
+			process.start()
+			self._commands.append(commands)
+			self._processes.append(process)
+
+		for key, i in self._assignment.items():
+			self._send(i, self._specs[key].command())
+
+		self._reader = threading.Thread(target=self._read, name="bluelib-shard-reader", daemon=True)
+		self._reader.start()
+
+	async def stop(self, timeout: float = 5.0):
+		"""Stop the workers, waiting up to ``timeout`` seconds before terminating them.
+
+		:meth:`results` ends once the results already received are consumed.
+		"""
+		if not self._processes:
+			return
+
+		for commands in self._commands:
+			commands.put(("stop",))
+
+		processes, self._processes, self._commands = self._processes, [], []
+		await self.loop.run_in_executor(None, self._join, processes, timeout)
+
+		# Everything the workers sent was queued before they exited
+		self._results.put(("close", None, None))
+		await self.loop.run_in_executor(None, self._reader.join, timeout)
+		self._reader = None
+
+		# Queued behind the last results the reader handed to the loop
+		self._closed = True
+		self._queue.put_nowait(None)
+
+	@staticmethod
+	def _join(processes, timeout):
+		deadline = time.monotonic() + timeout
+		for p in processes:
+			p.join(max(0.0, deadline - time.monotonic()))
+			if p.is_alive():
+				logger.warning(f"[ShardedPoller.stop] terminating {p.name}.")
+				p.terminate()
+				p.join()
+
+	async def __aenter__(self):
+		self.start()
+		return self
+
+	async def __aexit__(self, exc_type, exc_val, exc_tb):
+		await self.stop()
+
+	async def results(self):
+		"""Yield a :class:`PollResult` for every run of every worker, as soon as it arrived,
+		until the poller is stopped."""
+		while not (self._closed and self._queue.empty()):
+			result = await self._queue.get()
+			if result is None:
+				if self._closed:
+					# Pass the wake-up on to the next consumer
+					self._queue.put_nowait(None)
+					return
+				continue
+			yield result
@@ -0,0 +1,21 @@
+# -*- coding: utf-8 -*-
+"""
+In-process simulated GATT backend.
+
+Peripherals are described with :class:`SimPeripheral` and registered by
+address. The simulated :class:`BleClient` then behaves like the hardware
+backends, which allows sensors and fleets to be exercised without a radio.
+"""
+
+from bluelib.sim.peripheral import (
+	SimCharacteristic,
+	SimPeripheral,
+	SimLinkError,
+	add_peripheral,
+	get_peripheral,
+	remove_peripheral,
+	clear_peripherals,
+	set_default_factory,
+)
+from bluelib.sim.client import BleClient
+from bluelib.sim.scan import scan, scan_stream
@@ -0,0 +1,405 @@
+import asyncio
+import logging
+
+from bluelib.client import BaseBleClient
+from bluelib.profile import LatencyProfile
+from bluelib.callbacks import CallbackTable
+from bluelib.sim.peripheral import get_peripheral, normalize_uuid, SimLinkError, CCCD_NOTIFY_VAL, CCCD_CLEAR
+from bluelib.sim.scan import scan_stream
+from time import perf_counter
+from typing import Callable, Any
+from asyncio.events import AbstractEventLoop
+from sys import _getframe
+
+currentFuncName = lambda n=0: _getframe(n + 1).f_code.co_name
+
+logger = logging.getLogger(__name__)
+
+
+class BleClient(BaseBleClient):
+	def __init__(self, address: str, loop: AbstractEventLoop = None, **kwargs):
+		BaseBleClient.__init__(self, address, loop, **kwargs)
+
+		self.client = None
+		self._callbacks = CallbackTable()
+
+		# Value handle -> CCCD handle of the active subscriptions
+		self._cccds = {}
+
+
+	def _handle_notification(self, handle, data):
+		if handle in self._callbacks:
+			self._callbacks.exec(handle, data)
+
+	def _handle_disconnect(self):
+		logger.debug(f"[{currentFuncName()}] link to {self.address} was lost.")
+		self.client = None
+		self.manager.closed(self)
+		self._schedule_reconnect()
+
+
+# %% Connectivity methods
+
+	async def connect(self, retries=None, waitAdvertising=None, **kwargs) -> bool:
+		"""Connect to the specified GATT server.
+
+		Args:
+			retries (int): Connection attempts, defaults to the attempts of
+				the retry policy or the budget learned by the latency profile.
+			waitAdvertising (bool): Start every attempt only after the device
+				was seen advertising. Defaults to the client's ``waitAdvertising``.
+
+		Returns:
+			Boolean representing connection status.
+
+		"""
+		if self.client is not None and self.client.connected:
+			logger.debug(f"[{currentFuncName()}] device is already connected.")
+			return True
+
+		if retries is None:
+			retries = self._attempts()
+
+		if waitAdvertising is None:
+			waitAdvertising = self.waitAdvertising
+
+		# Fail fast while the device's circuit breaker is open
+		self.breaker.check()
+
+		for i in range(0,retries):
+			try:
+				if waitAdvertising:
+					# No slot is held while waiting for the device to show up
+					await self._wait_advertisement(scan_stream, self.timeout)
+
+				# Reserve a link, queueing while the manager's caps are reached
+				await self.manager.acquire(self)
+
+				peripheral = get_peripheral(self.address)
+				if peripheral is None:
+					raise SimLinkError(f"Device {self.address} is not advertising.")
+
+				t1 = perf_counter()
+				await self._timed(LatencyProfile.CONNECT, peripheral.connect())
+				t2 = perf_counter() - t1
+
+				peripheral.listener = self._handle_notification
+				peripheral.on_disconnect = self._handle_disconnect
+				self.client = peripheral
+				self.manager.connected(self)
+				await self._restore_subscriptions()
+
+				self.breaker.success()
+				logger.info(f"[{currentFuncName()}] connection established in {round(t2,2)}s in {i+1} of {retries} tries.")
+				return True
+
+			except Exception as e:
+				await self._close_peripheral()
+				# Free the slot for the backoff, the next attempt queues again
+				self.manager.closed(self)
+
+				if (i+1) < retries:
+					logger.warning(f"[{currentFuncName()}] failed to connect in {str(i+1)} of {str(retries)} tries." + " Received exception: " + str(e))
+					await asyncio.sleep(self.retry.delay(i))
+				else:
+					logger.error(f"[{currentFuncName()}] could not connect to device." + " Received exception: " + str(e))
+					self.breaker.failure()
+					raise e
+
+
+	async def disconnect(self) -> bool:
+		"""Disconnect from the specified GATT server.
+
+		Returns:
+			Boolean representing connection status.
+
+		"""
+		await self._cancel_reconnect()
+		await self._close_peripheral()
+
+		self.manager.closed(self)
+
+		logger.debug(f"[{currentFuncName()}] disconnected.")
+
+		return True
+
+
+	async def _close_peripheral(self):
+		if self.client is not None:
+			self.client.listener = None
+			self.client.on_disconnect = None
+			await self.client.disconnect()
+			self.client = None
+
+
+	async def _restore_subscriptions(self):
+		"""Enable the CCCDs of the active subscriptions again after a reconnect."""
+		for handle in self._callbacks.keys():
+			cccd = self._cccds.get(handle, None)
+			if cccd is None:
+				continue
+			await self._timed(LatencyProfile.OP, self.client.write(cccd, CCCD_NOTIFY_VAL, True))
+			logger.debug(f"[{currentFuncName()}] restored notify on handle {handle}.")
+
+
+	async def is_connected(self) -> bool:
+		"""Check connection status between this client and the server.
+
+		Returns:
+			Boolean representing connection status.
+
+		"""
+		return self.client is not None and self.client.connected
+
+
+	def has_subscriptions(self) -> bool:
+		return bool(self._callbacks)
+
+
+# %% GATT services methods
+
+	async def get_services(self) -> Any:
+		"""Get all services registered for this GATT server.
+
+		Returns:
+		   Device's services tree.
+
+		"""
+		if self.client is not None:
+			async with self._operation(True):
+				await self._ensure_connected()
+				return self.client.services()
+
+		else:
+			return None
+
+
+# %% I/O methods
+
+	def _get_char(self, uuid: str):
+		return self.client.get_characteristic(normalize_uuid(uuid))
+
+
+	async def read_gatt_char(self, _uuid: str, **kwargs) -> bytearray:
+		"""Perform read operation on the specified GATT characteristic.
+
+		Args:
+			_uuid (str or UUID): The uuid of the characteristics to read from.
+
+		Returns:
+			(bytearray) The read data.
+
+		"""
+		keepConnection = kwargs.get('keepConnection', None)
+
+		async with self._operation(keepConnection):
+			await self._ensure_connected()
+			return await self._read_char(_uuid)
+
+
+	async def _read_char(self, _uuid: str) -> bytearray:
+		char = self._get_char(_uuid)
+
+		if char is None:
+			raise Exception("Characteristic was not found.")
+
+		data = await self._timed(LatencyProfile.OP, self.client.read(char.valHandle))
+
+		logger.debug(f"[{currentFuncName(0)}] from characteristic \'{_uuid}\' received: {str(data)}")
+
+		return data
+
+
+	async def _read_many(self, uuids: list, return_exceptions: bool = False) -> list:
+		chars = [self._get_char(u) for u in uuids]
+
+		if None not in chars:
+			try:
+				data = await self._timed(LatencyProfile.OP, self.client.read_multiple([c.valHandle for c in chars]))
+				logger.debug(f"[{currentFuncName(0)}] read {len(data)} characteristics in one request.")
+				return data
+			except (ValueError, PermissionError) as e:
+				# One handle failed the whole request, read them one by one
+				logger.debug(f"[{currentFuncName(0)}] read multiple failed: {str(e)}")
+
+		return await super()._read_many(uuids, return_exceptions)
+
+
+	async def read_gatt_descriptor(self, handle: int, **kwargs) -> bytearray:
+		"""Perform read operation on the specified GATT descriptor.
+
+		Args:
+			handle (int): The handle of the descriptor to read from.
+
+		Returns:
+			(bytearray) The read data.
+
+		"""
+		return await self.read_handle(handle, **kwargs)
+
+
+	async def read_handle(self, handle: int, **kwargs) -> bytearray:
+		"""Read the attribute at ``handle`` without any uuid lookup.
+
+		Args:
+			handle (int): The attribute handle to read from.
+
+		Returns:
+			(bytearray) The read data.
+
+		"""
+		keepConnection = kwargs.get('keepConnection', None)
+
+		async with self._operation(keepConnection):
+			await self._ensure_connected()
+
+			data = await self._timed(LatencyProfile.OP, self.client.read(handle))
+
+			logger.debug(f"[{currentFuncName(0)}] from handle \'{str(handle)}\' received: {str(data)}")
+
+			return data
+
+
+	async def write_gatt_char(
+		self, _uuid: str, data: bytearray, response: bool = True, **kwargs
+	) -> Any:
+		"""Perform a write operation on the specified GATT characteristic.
+
+		Args:
+			_uuid (str or UUID): The uuid of the characteristics to write to.
+			data (bytes or bytearray): The data to send.
+			response (bool): If write-with-response operation should be done. Defaults to `True`.
+
+		Returns:
+			None if not `response=True`, in which case a bytearray is returned.
+
+		"""
+		keepConnection = kwargs.get('keepConnection', None)
+
+		async with self._operation(keepConnection):
+			await self._ensure_connected()
+			return await self._write_char(_uuid, data, response)
+
+
+	async def _write_char(self, _uuid: str, data: bytearray, response: bool = True) -> Any:
+		char = self._get_char(_uuid)
+
+		if char is None:
+			raise Exception("Characteristic was not found.")
+
+		data = bytes(data)
+		ret = await self._timed(LatencyProfile.OP, self.client.write(char.valHandle, data, response))
+
+		logger.debug(f"[{currentFuncName(0)}] to characteristic \'{_uuid}\' was sent: {str(data)}")
+
+		return ret
+
+
+	async def write_gatt_descriptor(
+		self, handle: int, data: bytearray, **kwargs
+	) -> Any:
+		"""Perform a write operation on the specified GATT descriptor.
+
+		Args:
+			handle (int): The handle of the descriptor to read from.
+			data (bytes or bytearray): The data to send.
+
+		"""
+		return await self.write_handle(handle, data, True, **kwargs)
+
+
+	async def write_handle(
+		self, handle: int, data: bytearray, response: bool = True, **kwargs
+	) -> Any:
+		"""Write the attribute at ``handle`` without any uuid lookup.
+
+		Args:
+			handle (int): The attribute handle to write to.
+			data (bytes or bytearray): The data to send.
+			response (bool): If write-with-response operation should be done. Defaults to `True`.
+
+		"""
+		keepConnection = kwargs.get('keepConnection', None)
+
+		async with self._operation(keepConnection):
+			await self._ensure_connected()
+
+			data = bytes(data)
+			ret = await self._timed(LatencyProfile.OP, self.client.write(handle, data, response))
+
+			logger.debug(f"[{currentFuncName(0)}] to handle \'{str(handle)}\' was sent: {str(data)}")
+
+			return ret
+
+
+	async def start_notify(
+		self, _uuid: str, callback: Callable[[str, Any], Any], **kwargs
+	) -> None:
+		"""Activate notifications/indications on a characteristic.
+
+		Callbacks must accept two inputs. The first will be a uuid string
+		object and the second will be a bytearray.
+
+		Args:
+			_uuid (str or UUID): The uuid of the characteristics to start notification/indication on.
+			callback (function): The function to be called on notification.
+
+		"""
+		async with self._operation(True):
+			await self._ensure_connected()
+			char = self._get_char(_uuid)
+
+			if char is None:
+				raise Exception("Characteristic was not found.")
+
+			if char.cccdHandle is None:
+				raise Exception(f"Could not start notify on {str(_uuid)}. CCCD was not found.")
+
+			if not self._callbacks.add(char.valHandle, callback):
+				logger.debug(f"[{currentFuncName(0)}] added subscriber to characteristic {_uuid}.")
+				return
+
+			try:
+				await self._timed(LatencyProfile.OP, self.client.write(char.cccdHandle, CCCD_NOTIFY_VAL, True))
+			except:
+				self._callbacks.remove(char.valHandle, callback)
+				raise
+
+			self._cccds[char.valHandle] = char.cccdHandle
+
+			logger.debug(f"[{currentFuncName(0)}] started notify on characteristic {_uuid}.")
+
+
+	async def stop_notify(self, _uuid: str, callback: Callable[[str, Any], Any] = None, **kwargs) -> None:
+		"""Deactivate notification/indication on a specified characteristic.
+
+		Args:
+			_uuid: The characteristic to stop notifying/indicating on.
+			callback (function): The subscriber to remove. Defaults to all subscribers.
+
+		"""
+		keepConnection = kwargs.get('keepConnection', None)
+
+		async with self._operation(keepConnection):
+			await self._ensure_connected()
+			char = self._get_char(_uuid)
+
+			if char is None:
+				raise Exception("Characteristic was not found.")
+
+			if char.cccdHandle is None:
+				raise Exception(f"Could not stop notify on {str(_uuid)}. CCCD was not found.")
+
+			if not self._callbacks.is_last(char.valHandle, callback):
+				self._callbacks.remove(char.valHandle, callback)
+				logger.debug(f"[{currentFuncName(0)}] removed subscriber from characteristic {_uuid}.")
+				return
+
+			await self._timed(LatencyProfile.OP, self.client.write(char.cccdHandle, CCCD_CLEAR, True))
+
+			# Only forget the subscribers once the device stopped notifying,
+			# so a failed attempt is restored on the next connect
+			self._callbacks.remove(char.valHandle, callback)
+			self._cccds.pop(char.valHandle, None)
+
+			logger.debug(f"[{currentFuncName(0)}] stopped notify on characteristic {_uuid}.")
@@ -0,0 +1,374 @@
+# -*- coding: utf-8 -*-
+"""
+Fake peripherals for the simulated backend.
+
+A :class:`SimPeripheral` owns an attribute table laid out like a real GATT
+server (declaration handle, value handle and, for notifying
+characteristics, a CCCD right after the value) and emulates the radio with
+configurable connect latency, per-operation latency, jitter and drop rate.
+Everything runs on the asyncio loop, so thousands of devices cost no
+threads.
+"""
+
+import asyncio
+import logging
+import math
+import random
+from typing import Callable, Any
+
+from bluelib.advertisement import Advertisement
+
+logger = logging.getLogger(__name__)
+
+CCCD_UUID = "00002902-0000-1000-8000-00805f9b34fb"
+CCCD_NOTIFY_VAL = b"\x01\x00"
+CCCD_CLEAR = b"\x00\x00"
+
+
+class SimLinkError(ConnectionError):
+	"""Raised when the simulated radio link fails or is dropped."""
+
+
+def normalize_uuid(uuid) -> str:
+	"""Expand 16 bit UUIDs to the Bluetooth base UUID and lower the case."""
+	uuid = str(uuid).lower()
+	if len(uuid) <= 4:
+		uuid = "0000{:0>4}-0000-1000-8000-00805f9b34fb".format(uuid)
+	return uuid
+
+
+class SimCharacteristic(object):
+	"""A characteristic exposed by a :class:`SimPeripheral`.
+
+	Args:
+		uuid (str): The characteristic uuid.
+		value (bytes or callable): Initial value, or a function returning the
+			current value each time it is read or notified.
+		properties (tuple): Any of ``"read"``, ``"write"`` and ``"notify"``.
+		notify_on_subscribe (bool): Send the current value as a notification
+			right after the CCCD is enabled, as sensors that report a single
+			measurement per subscription do.
+
+	"""
+
+	def __init__(self, uuid: str, value=b"", properties=("read", "write"),
+		notify_on_subscribe=False):
+
+		self.uuid = normalize_uuid(uuid)
+		self.value = value
+		self.properties = tuple(properties)
+		self.notify_on_subscribe = notify_on_subscribe
+
+		# Assigned by the peripheral when the attribute table is built
+		self.handle = None
+		self.valHandle = None
+		self.cccdHandle = None
+
+	def get_value(self) -> bytes:
+		if callable(self.value):
+			return bytes(self.value())
+		return bytes(self.value)
+
+	def supports(self, prop: str) -> bool:
+		return prop in self.properties
+
+
+class SimPeripheral(object):
+	"""A fake BLE peripheral.
+
+	Args:
+		address (str): MAC address the peripheral answers to.
+		services (dict): Maps service uuids to lists of :class:`SimCharacteristic`.
+		connect_latency (float): Seconds a successful connect takes.
+		op_latency (float): Seconds each ATT operation takes.
+		jitter (float): Maximum random deviation added to every latency.
+		drop_rate (float): Probability in [0, 1] that a connect or an
+			operation fails and the link is dropped.
+		adv_interval (float): Seconds between two advertising events.
+		adv_connect (bool): Let a connect wait for the next advertising event,
+			as on a real link, before its ``connect_latency``.
+		name (str): Complete local name reported to scanners.
+		rssi (int): Signal strength reported to scanners.
+		manufacturer_data (dict): Maps company identifiers to the advertised
+			payload, or to a function returning it each time it is advertised.
+		service_data (dict): Maps service uuids to the advertised payload, or
+			to a function returning it.
+		mtu (int): ATT MTU of the link, which bounds the size of a
+			Read Multiple response.
+		seed: Seed for the peripheral's random generator, for reproducible runs.
+
+	"""
+
+	DEFAULT_CONNECT_LATENCY         = 0.05
+	DEFAULT_OP_LATENCY              = 0.01
+	DEFAULT_MTU                     = 247
+
+	def __init__(self, address: str, services: dict = None,
+		connect_latency=DEFAULT_CONNECT_LATENCY, op_latency=DEFAULT_OP_LATENCY,
+		jitter=0.0, drop_rate=0.0, adv_interval=0.1, name=None, rssi=-60,
+		addr_type="public", mtu=DEFAULT_MTU, manufacturer_data=None, service_data=None,
+		adv_connect=False, seed=None):
+
+		self.address = address.replace("-", ":").lower()
+		self.connect_latency = connect_latency
+		self.op_latency = op_latency
+		self.jitter = jitter
+		self.drop_rate = drop_rate
+		self.adv_interval = adv_interval
+		self.adv_connect = adv_connect
+		self.name = name
+		self.rssi = rssi
+		self.addr_type = addr_type
+		self.mtu = mtu
+		self.manufacturer_data = dict(manufacturer_data or {})
+		self.service_data = {normalize_uuid(k): v for k, v in (service_data or {}).items()}
+
+		self._rng = random.Random(seed)
+		# Offset of the advertising events, drawn apart from the radio's generator
+		self._adv_phase = random.Random(seed).uniform(0, adv_interval or 0)
+		self._services = {}
+		self._by_uuid = {}
+		self._by_handle = {}
+		self._cccd = {}
+		self._subscribed = set()
+
+		self.connected = False
+		self.listener = None
+		self.on_disconnect = None
+
+		self.stats = {"connects": 0, "reads": 0, "writes": 0, "notifications": 0, "drops": 0}
+
+		self._build(services or {})
+
+
+	def _build(self, services: dict):
+		handle = 1
+		for s_uuid, chars in services.items():
+			s_uuid = normalize_uuid(s_uuid)
+			self._services[s_uuid] = list(chars)
+			handle += 1
+
+			for c in chars:
+				c.handle = handle
+				c.valHandle = handle + 1
+				handle += 2
+				if c.supports("notify"):
+					c.cccdHandle = handle
+					self._cccd[handle] = c
+					handle += 1
+
+				self._by_uuid[c.uuid] = c
+				self._by_handle[c.valHandle] = c
+
+
+# %% Attribute table
+
+	def services(self) -> list:
+		return list(self._services.keys())
+
+	def characteristics(self) -> list:
+		return list(self._by_uuid.values())
+
+	def get_characteristic(self, uuid: str) -> SimCharacteristic:
+		return self._by_uuid.get(normalize_uuid(uuid), None)
+
+	def advertisement(self) -> Advertisement:
+		"""The report a scanner receives from this peripheral."""
+		def payload(value):
+			return bytes(value() if callable(value) else value)
+
+		return Advertisement(self.address, addrType=self.addr_type, rssi=self.rssi,
+			name=self.name, service_uuids=self.services(),
+			manufacturer_data={k: payload(v) for k, v in self.manufacturer_data.items()},
+			service_data={k: payload(v) for k, v in self.service_data.items()},
+			connectable=not self.connected)
+
+
+# %% Radio emulation
+
+	async def _delay(self, base: float):
+		delay = base
+		if self.jitter:
+			delay += self._rng.uniform(-self.jitter, self.jitter)
+		await asyncio.sleep(max(delay, 0))
+
+	def _maybe_drop(self):
+		if self.drop_rate and self._rng.random() < self.drop_rate:
+			self.stats["drops"] += 1
+			self._drop()
+			raise SimLinkError(f"Link to {self.address} was dropped.")
+
+	def _drop(self):
+		was_connected = self.connected
+		self.connected = False
+		self._subscribed.clear()
+
+		if was_connected and self.on_disconnect is not None:
+			self.on_disconnect()
+
+	def next_advertising(self, now: float) -> float:
+		"""Loop time of the first advertising event at or after ``now``."""
+		if not self.adv_interval:
+			return now
+		return self._adv_phase + math.ceil((now - self._adv_phase) / self.adv_interval) * self.adv_interval
+
+	def _check_link(self):
+		if not self.connected:
+			raise SimLinkError(f"Device {self.address} is not connected.")
+
+
+# %% Connectivity
+
+	async def connect(self):
+		if self.adv_connect and self.adv_interval:
+			loop = asyncio.get_event_loop()
+			await asyncio.sleep(self.next_advertising(loop.time()) - loop.time())
+		await self._delay(self.connect_latency)
+		if self.drop_rate and self._rng.random() < self.drop_rate:
+			self.stats["drops"] += 1
+			raise SimLinkError(f"Connection to {self.address} failed.")
+
+		self.connected = True
+		self.stats["connects"] += 1
+
+	async def disconnect(self):
+		self.connected = False
+		self._subscribed.clear()
+
+
+# %% ATT operations
+
+	async def read(self, handle: int) -> bytes:
+		self._check_link()
+		await self._delay(self.op_latency)
+		self._check_link()
+		self._maybe_drop()
+		self.stats["reads"] += 1
+
+		return self._value(handle)
+
+	def _value(self, handle: int) -> bytes:
+		if handle in self._cccd:
+			return CCCD_NOTIFY_VAL if handle in self._subscribed else CCCD_CLEAR
+
+		char = self._by_handle.get(handle, None)
+		if char is None:
+			raise ValueError(f"Invalid handle {handle}.")
+		if not char.supports("read"):
+			raise PermissionError(f"Characteristic {char.uuid} is not readable.")
+
+		return char.get_value()
+
+	async def read_multiple(self, handles: list) -> list:
+		"""ATT Read Multiple Variable Length: one request for several handles.
+
+		Like on a real link, the request fails as a whole if one handle
+		cannot be read. Responses larger than the MTU take one more round
+		trip per MTU.
+		"""
+		self._check_link()
+		values = [self._value(h) for h in handles]
+
+		size = sum(2 + len(v) for v in values)
+		round_trips = max(1, -(-size // (self.mtu - 1)))
+		for i in range(round_trips):
+			await self._delay(self.op_latency)
+			self._check_link()
+			self._maybe_drop()
+
+		self.stats["reads"] += 1
+		return values
+
+	async def write(self, handle: int, data: bytes, response: bool = True):
+		self._check_link()
+		await self._delay(self.op_latency)
+		self._check_link()
+		self._maybe_drop()
+		self.stats["writes"] += 1
+
+		if handle in self._cccd:
+			if bytes(data) == CCCD_NOTIFY_VAL:
+				self._subscribed.add(handle)
+				char = self._cccd[handle]
+				if char.notify_on_subscribe:
+					asyncio.ensure_future(self._notify_later(char))
+			else:
+				self._subscribed.discard(handle)
+			return b"" if response else None
+
+		char = self._by_handle.get(handle, None)
+		if char is None:
+			raise ValueError(f"Invalid handle {handle}.")
+		if not char.supports("write"):
+			raise PermissionError(f"Characteristic {char.uuid} is not writable.")
+
+		char.value = bytes(data)
+		return b"" if response else None
+
+	async def _notify_later(self, char: SimCharacteristic):
+		await self._delay(self.op_latency)
+		self.notify(char.uuid)
+
+	def notify(self, uuid: str, data: bytes = None):
+		"""Push a notification for ``uuid`` if the client subscribed to it.
+
+		Returns:
+			True if the notification was delivered.
+
+		"""
+		char = self.get_characteristic(uuid)
+		if char is None or not self.connected or char.cccdHandle not in self._subscribed:
+			return False
+
+		if data is None:
+			data = char.get_value()
+
+		self.stats["notifications"] += 1
+		if self.listener is not None:
+			self.listener(char.valHandle, bytes(data))
+		return True
+
+
+# %% Registry of simulated devices
+
+_peripherals = {}
+_default_factory = None
+
+
+def add_peripheral(peripheral: SimPeripheral) -> SimPeripheral:
+	_peripherals[peripheral.address] = peripheral
+	return peripheral
+
+
+def remove_peripheral(address: str):
+	_peripherals.pop(address.replace("-", ":").lower(), None)
+
+
+def clear_peripherals():
+	_peripherals.clear()
+
+
+def set_default_factory(factory: Callable[[str], SimPeripheral]):
+	"""Create peripherals on demand for unknown addresses.
+
+	Args:
+		factory (function): Receives an address and returns a :class:`SimPeripheral`,
+			or None to disable on-demand creation.
+
+	"""
+	global _default_factory
+	_default_factory = factory
+
+
+def get_peripheral(address: str) -> SimPeripheral:
+	address = address.replace("-", ":").lower()
+	peripheral = _peripherals.get(address, None)
+
+	if peripheral is None and _default_factory is not None:
+		peripheral = add_peripheral(_default_factory(address))
+
+	return peripheral
+
+
+def all_peripherals() -> list:
+	return list(_peripherals.values())
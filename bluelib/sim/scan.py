@@ -0,0 +1,59 @@
+import asyncio
+import logging
+
+from asyncio.events import AbstractEventLoop
+from bluelib.advertisement import ScanStream, SeenTable, collect
+from bluelib.sim.peripheral import all_peripherals
+
+logger = logging.getLogger(__name__)
+
+# Longest sleep of the advertiser, so newly added peripherals are picked up
+_MAX_TICK = 0.1
+
+
+async def _advertise(stream: ScanStream):
+	"""Offer every peripheral's advertisement once per advertising interval."""
+	loop = asyncio.get_event_loop()
+	due = {}
+
+	while True:
+		now = loop.time()
+		wake = now + _MAX_TICK
+
+		for p in all_peripherals():
+			if p.adv_interval is None:
+				continue
+
+			t = due.get(p.address, None)
+			if t is None:
+				t = p.next_advertising(now)
+
+			if t <= now:
+				if stream.match_address(p.address):
+					stream.offer(p.advertisement(), threadsafe=False)
+				t = max(t + p.adv_interval, now)
+
+			due[p.address] = t
+			wake = min(wake, t)
+
+		await asyncio.sleep(max(0, wake - loop.time()))
+
+
+async def scan_stream(filters=None, seen: int = SeenTable.DEFAULT_MAXSIZE,
+	refresh: float = None, maxsize: int = ScanStream.DEFAULT_MAXSIZE, **kwargs):
+	"""Scan the simulated peripherals continuously, like :func:`bluelib.linux.scan.scan_stream`."""
+	stream = ScanStream(asyncio.get_event_loop(), filters, seen, refresh, maxsize)
+	advertiser = asyncio.ensure_future(_advertise(stream))
+
+	try:
+		async for adv in stream:
+			yield adv
+	finally:
+		stream.close()
+		advertiser.cancel()
+
+
+async def scan(timeout=2, loop: AbstractEventLoop = None):
+	devices = await collect(scan_stream(), timeout)
+
+	return [adv.to_dict() for adv in devices]
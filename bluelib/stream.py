@@ -0,0 +1,209 @@
+# -*- coding: utf-8 -*-
+"""
+Async-iterator notification streams with bounded queues.
+"""
+
+import asyncio
+import collections
+import logging
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+# Overflow policies
+BLOCK               = "block"
+DROP_OLDEST         = "drop_oldest"
+DROP_NEWEST         = "drop_newest"
+COALESCE_LATEST     = "coalesce_latest"
+
+POLICIES = (BLOCK, DROP_OLDEST, DROP_NEWEST, COALESCE_LATEST)
+
+
+class NotificationStream(object):
+	"""Notifications of one characteristic, consumed with ``async for``.
+
+	.. code-block:: python
+
+		async with client.notifications(char_uuid, maxsize=32, policy=DROP_OLDEST) as stream:
+			async for data in stream:
+				print(data)
+
+	The stream holds at most ``maxsize`` values. When it is full:
+
+	* ``BLOCK`` pauses the stream's subscription until the consumer has
+	  taken half of the queued values. Only this characteristic is paused,
+	  and only for this stream; the device stops notifying once it has no
+	  other subscriber. Values that arrive before the pause took effect are
+	  kept in an overflow of up to ``maxsize`` more values, and dropped
+	  beyond that.
+	* ``DROP_OLDEST`` discards the oldest queued value.
+	* ``DROP_NEWEST`` discards the incoming value.
+	* ``COALESCE_LATEST`` overwrites the newest queued value, so the
+	  consumer always sees the latest reading.
+
+	Discarded values are counted in :attr:`dropped`.
+	"""
+
+	DEFAULT_MAXSIZE = 64
+
+	def __init__(self, client, _uuid: str, maxsize=DEFAULT_MAXSIZE, policy=BLOCK, **kwargs):
+		if policy not in POLICIES:
+			raise ValueError(f"Unknown overflow policy '{policy}'.")
+		if maxsize < 1:
+			raise ValueError("maxsize has to be at least 1.")
+
+		self.client = client
+		self.uuid = _uuid
+		self.maxsize = maxsize
+		self.policy = policy
+		self.dropped = 0
+
+		self._kwargs = kwargs
+		self._loop = client.loop
+		self._queue = collections.deque()
+		self._overflow = collections.deque()
+		self._readable = asyncio.Event()
+		self._started = False
+		self._closed = False
+		self._error = None
+
+		# BLOCK: whether the consumer asked for a pause, and the subscription
+		# state on the client, which pause and resume bring in line with it
+		self._paused = False
+		self._subscribed = False
+		self._switch_lock = asyncio.Lock()
+		self._switch_task = None
+
+	# Async context manager and iterator
+
+	async def __aenter__(self):
+		await self.start()
+		return self
+
+	async def __aexit__(self, exc_type, exc_val, exc_tb):
+		await self.close()
+
+	def __aiter__(self):
+		return self
+
+	async def __anext__(self):
+		if not self._started and not self._closed:
+			await self.start()
+
+		while not self._queue:
+			if self._error is not None:
+				raise self._error
+			if self._closed:
+				raise StopAsyncIteration
+			self._readable.clear()
+			await self._readable.wait()
+
+		data = self._queue.popleft()
+		self._refill()
+		return data
+
+	# Subscription
+
+	async def start(self):
+		if self._started:
+			return
+		await self.client.start_notify(self.uuid, self._callback, **self._kwargs)
+		self._started = True
+		self._subscribed = True
+
+	async def close(self):
+		if self._closed:
+			return
+		self._closed = True
+		self._readable.set()
+
+		async with self._switch_lock:
+			if self._subscribed:
+				try:
+					await self.client.stop_notify(self.uuid, callback=self._callback, keepConnection=True)
+				except Exception as e:
+					logger.debug(f"[NotificationStream.close] could not stop notify on {self.uuid}: {str(e)}")
+				self._subscribed = False
+
+	def qsize(self) -> int:
+		return len(self._queue) + len(self._overflow)
+
+	# Producer side
+
+	def _callback(self, _sender, data: Any):
+		try:
+			on_loop = asyncio.get_running_loop() is self._loop
+		except RuntimeError:
+			on_loop = False
+
+		if on_loop:
+			self._put(data)
+		else:
+			self._loop.call_soon_threadsafe(self._put, data)
+
+	def _put(self, data: Any):
+		if self._closed:
+			return
+
+		if len(self._queue) < self.maxsize and not self._overflow:
+			self._queue.append(data)
+			if self.policy == BLOCK and len(self._queue) >= self.maxsize:
+				self._pause(True)
+
+		elif self.policy == DROP_OLDEST:
+			self._queue.popleft()
+			self._queue.append(data)
+			self.dropped += 1
+
+		elif self.policy == DROP_NEWEST:
+			self.dropped += 1
+
+		elif self.policy == COALESCE_LATEST:
+			self._queue[-1] = data
+			self.dropped += 1
+
+		else:
+			if len(self._overflow) < self.maxsize:
+				self._overflow.append(data)
+			else:
+				self.dropped += 1
+			self._pause(True)
+
+		self._readable.set()
+
+	def _refill(self):
+		while self._overflow and len(self._queue) < self.maxsize:
+			self._queue.append(self._overflow.popleft())
+
+		if self._paused and not self._overflow and len(self._queue) <= self.maxsize // 2:
+			self._pause(False)
+
+	# Backpressure (BLOCK)
+
+	def _pause(self, paused: bool):
+		if self._paused == paused or self._closed:
+			return
+		self._paused = paused
+		if self._switch_task is None or self._switch_task.done():
+			self._switch_task = asyncio.ensure_future(self._switch(), loop=self._loop)
+
+	async def _switch(self):
+		"""Pause or resume the subscription until it matches what the consumer asked for."""
+		async with self._switch_lock:
+			while not self._closed and self._subscribed == self._paused:
+				try:
+					if self._paused:
+						await self.client.stop_notify(self.uuid, callback=self._callback, keepConnection=True)
+					else:
+						await self.client.start_notify(self.uuid, self._callback, **self._kwargs)
+				except Exception as e:
+					if self._paused:
+						# Keeps receiving, the bounded overflow drops what does not fit
+						logger.warning(f"[NotificationStream._switch] could not pause notify on {self.uuid}: {str(e)}")
+						return
+					# Resuming failed, nothing would arrive anymore
+					logger.error(f"[NotificationStream._switch] could not resume notify on {self.uuid}: {str(e)}")
+					self._error = e
+					self._readable.set()
+					return
+				self._subscribed = not self._paused
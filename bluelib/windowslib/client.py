@@ -12,6 +12,8 @@ import logging
 import time
 
 from bluelib.client import BaseBleClient
+from bluelib.profile import LatencyProfile
+from bluelib.callbacks import CallbackTable
 
 currentFuncName = lambda n=0: sys._getframe(n + 1).f_code.co_name
 
@@ -21,6 +23,8 @@ class BleClient(BaseBleClient):
 		BaseBleClient.__init__(self, address, loop, **kwargs)
 
 		self.client = None
+		self._callbacks = CallbackTable()
+		self._handles = None
 
 		if logger is None:
 			logger = logging.getLogger(__name__ + " dev "  + str(self.address))
@@ -29,6 +33,27 @@ class BleClient(BaseBleClient):
 		self.logger = logger
 
 
+	def _handle_disconnect(self, client):
+		if client is not self.client:
+			# A link that was already closed or replaced
+			return
+
+		self.logger.warning(f"[BleClient.{currentFuncName()}] link to {self.address} was lost.")
+		self.client = None
+		self._handles = None
+		self.manager.closed(self)
+		asyncio.ensure_future(self._dispose(client), loop=self.loop)
+		self._schedule_reconnect()
+
+
+	async def _dispose(self, client):
+		"""Release the WinRT objects of a link that is no longer used."""
+		try:
+			await asyncio.wait_for(client.disconnect(), self.timeout)
+		except Exception as e:
+			self.logger.debug(f"[BleClient.{currentFuncName()}] received exception: " + str(e))
+
+
 	def __del__(self):
 		if self.client is not None:
 			del self.client
@@ -37,9 +62,15 @@ class BleClient(BaseBleClient):
 
 # %% Connectivity methods
 
-	async def connect(self, timeout=2, retries=None) -> bool:
+	async def connect(self, timeout=None, retries=None) -> bool:
 		"""Connect to the specified GATT server.
 
+		Args:
+			timeout (float): Seconds to wait for each attempt, defaults to the
+				client's ``timeout`` or the one learned by the latency profile.
+			retries (int): Connection attempts, defaults to the attempts of
+				the retry policy or the budget learned by the latency profile.
+
 		Returns:
 			Boolean representing connection status.
 
@@ -53,50 +84,52 @@ class BleClient(BaseBleClient):
 				self.logger.error(f"[BleClient.{currentFuncName()}] received exception: " + str(e))
 
 		if retries is None:
-			retries = self.maxretries
+			retries = self._attempts()
+		if timeout is None:
+			timeout = self._timeout(LatencyProfile.CONNECT)
+
+		# Fail fast while the device's circuit breaker is open
+		self.breaker.check()
 
 		for i in range(0,retries):
 			try:
+				# Reserve a link, queueing while the manager's caps are reached
+				await self.manager.acquire(self)
+
 				self.client = bleak.BleakClient(self.address, self.loop)
+				self._handles = None
 
 				# Overrides the bleak connect method #
 				self.client.connect = types.MethodType(new_bleak_client_connect.connect, self.client)
+				self.client.set_disconnected_callback(self._handle_disconnect)
 
 				t1 = time.perf_counter()
-				status = await asyncio.wait_for(self.client.connect(timeout=timeout), self.timeout)
+				status = await self._timed(LatencyProfile.CONNECT, self.client.connect(timeout=timeout))
 				t2 = time.perf_counter() - t1
+				self.manager.connected(self)
+				if status:
+					await self._restore_subscriptions()
+				self.breaker.success()
 				self.logger.info(f"[BleClient.{currentFuncName()}] connection established in {round(t2,2)}s in {i+1} of {retries} tries.")
 				return status
 
 			except Exception as e:
-				del self.client
-				self.client = None
+				# Shut down the half-open link, e.g. when restoring the subscriptions failed
+				client, self.client = self.client, None
+				await self._dispose(client)
+				del client
+				# Free the slot for the backoff, the next attempt queues again
+				self.manager.closed(self)
 
 				if (i+1) < retries:
 					self.logger.warning(f"[BleClient.{currentFuncName()}] failed to connect in {str(i+1)} of {str(retries)} tries." + " Received exception: " + str(e))
+					await asyncio.sleep(self.retry.delay(i))
 				else:
 					self.logger.error(f"[BleClient.{currentFuncName()}] could not connect to device." + " Received exception: " + str(e))
+					self.breaker.failure()
 					raise e
 
 
-	async def __check_connection(self) -> bool:
-		try:
-			if self.client is not None:
-				if await asyncio.wait_for(self.client.is_connected(), self.timeout):
-					return True
-
-			self.logger.debug(f"[BleClient.{currentFuncName(1)}] BLE device is not connected or connetion was lost. Trying to connect.")
-			status = await self.connect()
-
-			if not status:
-				raise ConnectionError("BLE device could not be connected or connection was lost and could not be reset")
-
-			return status
-
-		except Exception as e:
-			raise e
-
-
 	async def disconnect(self) -> bool:
 		"""Disconnect from the specified GATT server.
 
@@ -106,18 +139,35 @@ class BleClient(BaseBleClient):
 		"""
 		status = False
 
+		await self._cancel_reconnect()
+
+		# Detach the link first, so its disconnect is not taken for a lost link
+		client, self.client = self.client, None
+
 		try:
-			status = await asyncio.wait_for(self.client.disconnect(), self.timeout)
+			status = await asyncio.wait_for(client.disconnect(), self.timeout)
 		except Exception as e:
 			self.logger.debug(f"[BleClient.{currentFuncName()}] received exception: " + str(e))
 			pass
 
-		del self.client
-		self.client = None
+		del client
+		self.manager.closed(self)
 		self.logger.debug(f"[BleClient.{currentFuncName()}] disconnected.")
 		return status
 
 
+	def has_subscriptions(self) -> bool:
+		return bool(self._callbacks)
+
+
+	async def _restore_subscriptions(self):
+		"""Subscribe again to the characteristics that had active callbacks
+		when the previous link went down."""
+		for key in self._callbacks.keys():
+			await self._timed(LatencyProfile.OP, self.client.start_notify(key, self.__dispatcher(key)))
+			self.logger.debug(f"[BleClient.{currentFuncName()}] restored notify on characteristic {key}.")
+
+
 	async def is_connected(self) -> bool:
 		"""Check connection status between this client and the server.
 
@@ -174,22 +224,27 @@ class BleClient(BaseBleClient):
 		"""
 		keepConnection = kwargs.get('keepConnection', None)
 
-		try:
-			await self.__check_connection()			
-			data = await asyncio.wait_for(self.client.read_gatt_char(_uuid, **kwargs), self.timeout)
-
-			if keepConnection is None:
-				if self.defaultKeepConnection is False:
-					await self.disconnect()
-			elif keepConnection is False:
-				await self.disconnect()
+		async with self._operation(keepConnection):
+			await self._ensure_connected()
+			data = await self._timed(LatencyProfile.OP, self.client.read_gatt_char(_uuid, **kwargs))
 
 			self.logger.debug(f"[BleClient.{currentFuncName(0)}] from characteristic \'{_uuid}\' received: {str(data)}")
 
 			return data
 
-		except Exception as e:
-			raise e
+
+	async def _read_char(self, _uuid: str) -> bytearray:
+		data = await self._timed(LatencyProfile.OP, self.client.read_gatt_char(_uuid))
+
+		self.logger.debug(f"[BleClient.{currentFuncName(0)}] from characteristic \'{_uuid}\' received: {str(data)}")
+
+		return data
+
+
+	async def _read_many(self, uuids: list, return_exceptions: bool = False) -> list:
+		# WinRT exposes no ATT Read Multiple, but queues concurrent requests
+		# on the link, so the single reads are pipelined
+		return await asyncio.gather(*[self._read_char(u) for u in uuids], return_exceptions=return_exceptions)
 
 
 	async def read_gatt_descriptor(self, handle: int, **kwargs) -> bytearray:
@@ -204,22 +259,51 @@ class BleClient(BaseBleClient):
 		"""
 		keepConnection = kwargs.get('keepConnection', None)
 
-		try:
-			await self.__check_connection()			
-			data = await asyncio.wait_for(self.client.read_gatt_descriptor(handle, **kwargs), self.timeout)
-
-			if keepConnection is None:
-				if self.defaultKeepConnection is False:
-					await self.disconnect()
-			elif keepConnection is False:
-				await self.disconnect()
+		async with self._operation(keepConnection):
+			await self._ensure_connected()
+			data = await self._timed(LatencyProfile.OP, self.client.read_gatt_descriptor(handle, **kwargs))
 
 			self.logger.debug(f"[BleClient.{currentFuncName(0)}] from descriptor \'{str(handle)}\' received: {str(data)}")
 
 			return data
 
-		except Exception as e:
-			raise e
+
+	async def read_handle(self, handle: int, **kwargs) -> bytearray:
+		"""Read the attribute at ``handle`` without any uuid lookup.
+
+		Args:
+			handle (int): The attribute handle to read from.
+
+		Returns:
+			(bytearray) The read data.
+
+		"""
+		keepConnection = kwargs.get('keepConnection', None)
+
+		async with self._operation(keepConnection):
+			await self._ensure_connected()
+
+			char = self.__attribute(handle)
+			if char is not None:
+				data = await self._timed(LatencyProfile.OP, self.client.read_gatt_char(char.uuid))
+			else:
+				data = await self._timed(LatencyProfile.OP, self.client.read_gatt_descriptor(handle))
+
+			self.logger.debug(f"[BleClient.{currentFuncName(0)}] from handle \'{str(handle)}\' received: {str(data)}")
+
+			return data
+
+
+	def __attribute(self, handle: int):
+		"""Return the characteristic whose value lives at ``handle``, or None
+		if ``handle`` belongs to a descriptor."""
+		if self._handles is None:
+			self._handles = {}
+			for service in self.client.services:
+				for char in service.characteristics:
+					self._handles[char.handle] = char
+
+		return self._handles.get(handle, None)
 
 
 	async def write_gatt_char(
@@ -238,24 +322,19 @@ class BleClient(BaseBleClient):
 		"""
 		keepConnection = kwargs.get('keepConnection', None)
 
-		try:
-			await self.__check_connection()			
-			ret = await asyncio.wait_for(self.client.write_gatt_char(_uuid, data, response), self.timeout)
+		async with self._operation(keepConnection):
+			await self._ensure_connected()
+			return await self._write_char(_uuid, data, response)
 
-			if keepConnection is None:
-				if self.defaultKeepConnection is False:
-					await self.disconnect()
-			elif keepConnection is False:
-				await self.disconnect()
 
-			self.logger.debug(f"[BleClient.{currentFuncName(0)}] to characteristic \'{_uuid}\' was sent: {str(data)}")
-			if response:
-				self.logger.debug(f"[BleClient.{currentFuncName(0)}] characteristic \'{_uuid}\' responded: {str(ret)}")
+	async def _write_char(self, _uuid: str, data: bytearray, response: bool = True) -> Any:
+		ret = await self._timed(LatencyProfile.OP, self.client.write_gatt_char(_uuid, data, response))
 
-			return ret
+		self.logger.debug(f"[BleClient.{currentFuncName(0)}] to characteristic \'{_uuid}\' was sent: {str(data)}")
+		if response:
+			self.logger.debug(f"[BleClient.{currentFuncName(0)}] characteristic \'{_uuid}\' responded: {str(ret)}")
 
-		except Exception as e:
-			raise e
+		return ret
 
 
 	async def write_gatt_descriptor(
@@ -270,23 +349,41 @@ class BleClient(BaseBleClient):
 		"""
 		keepConnection = kwargs.get('keepConnection', None)
 
-		try:
-			await self.__check_connection()			
-			ret = await asyncio.wait_for(self.client.write_gatt_descriptor(handle, data), self.timeout)
-
-			if keepConnection is None:
-				if self.defaultKeepConnection is False:
-					await self.disconnect()
-			elif keepConnection is False:
-				await self.disconnect()
+		async with self._operation(keepConnection):
+			await self._ensure_connected()
+			ret = await self._timed(LatencyProfile.OP, self.client.write_gatt_descriptor(handle, data))
 
 			self.logger.debug(f"[BleClient.{currentFuncName(0)}] to descriptor \'{str(handle)}\' was sent: {str(data)}")
 			self.logger.debug(f"[BleClient.{currentFuncName(0)}] descriptor \'{str(handle)}\' responded: {str(ret)}")
 
 			return ret
 
-		except Exception as e:
-			raise e
+
+	async def write_handle(
+		self, handle: int, data: bytearray, response: bool = True, **kwargs
+	) -> Any:
+		"""Write the attribute at ``handle`` without any uuid lookup.
+
+		Args:
+			handle (int): The attribute handle to write to.
+			data (bytes or bytearray): The data to send.
+			response (bool): If write-with-response operation should be done. Defaults to `True`.
+
+		"""
+		keepConnection = kwargs.get('keepConnection', None)
+
+		async with self._operation(keepConnection):
+			await self._ensure_connected()
+
+			char = self.__attribute(handle)
+			if char is not None:
+				ret = await self._timed(LatencyProfile.OP, self.client.write_gatt_char(char.uuid, data, response))
+			else:
+				ret = await self._timed(LatencyProfile.OP, self.client.write_gatt_descriptor(handle, data))
+
+			self.logger.debug(f"[BleClient.{currentFuncName(0)}] to handle \'{str(handle)}\' was sent: {str(data)}")
+
+			return ret
 
 
 	async def start_notify(
@@ -307,38 +404,55 @@ class BleClient(BaseBleClient):
 			callback (function): The function to be called on notification.
 
 		"""
-		try:
-			await self.__check_connection()
-			await asyncio.wait_for(self.client.start_notify(_uuid, callback, **kwargs), self.timeout)
+		key = str(_uuid).lower()
+
+		async with self._operation(True):
+			await self._ensure_connected()
+
+			if not self._callbacks.add(key, callback):
+				self.logger.debug(f"[BleClient.{currentFuncName(0)}] added subscriber to characteristic {_uuid}.")
+				return
+
+			try:
+				await self._timed(LatencyProfile.OP, self.client.start_notify(_uuid, self.__dispatcher(key), **kwargs))
+			except:
+				self._callbacks.remove(key, callback)
+				raise
+
 			self.logger.debug(f"[BleClient.{currentFuncName(0)}] started notify on characteristic {_uuid}.")
 
-		except Exception as e:
-			raise e
 
+	def __dispatcher(self, key):
+		def dispatch(sender, data):
+			self._callbacks.exec(key, data)
+		return dispatch
 
-	async def stop_notify(self, _uuid: str, **kwargs) -> None:
+
+	async def stop_notify(self, _uuid: str, callback: Callable[[str, Any], Any] = None, **kwargs) -> None:
 		"""Deactivate notification/indication on a specified characteristic.
 
 		Args:
 			_uuid: The characteristic to stop notifying/indicating on.
+			callback (function): The subscriber to remove. Defaults to all subscribers.
 
 		"""
 		keepConnection = kwargs.get('keepConnection', None)
+		key = str(_uuid).lower()
 
-		try:
-			await self.__check_connection()			
-			ret = await asyncio.wait_for(self.client.stop_notify(_uuid), self.timeout)
+		if not self._callbacks.is_last(key, callback):
+			self._callbacks.remove(key, callback)
+			self.logger.debug(f"[BleClient.{currentFuncName(0)}] removed subscriber from characteristic {_uuid}.")
+			return
+
+		async with self._operation(keepConnection):
+			await self._ensure_connected()
+			ret = await self._timed(LatencyProfile.OP, self.client.stop_notify(_uuid))
 
-			if keepConnection is None:
-				if self.defaultKeepConnection is False:
-					await self.disconnect()
-			elif keepConnection is False:
-				await self.disconnect()
+			# Only forget the subscribers once the device stopped notifying,
+			# so a failed attempt is restored on the next connect
+			self._callbacks.remove(key, callback)
 
 			self.logger.debug(f"[BleClient.{currentFuncName(0)}] stopped notify on characteristic {_uuid}.")
 
 			return ret
 
-		except Exception as e:
-			raise e
-
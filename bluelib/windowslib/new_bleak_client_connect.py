@@ -80,8 +80,14 @@ async def connect(self, timeout=2) -> bool:
 		loop=self.loop,
 	)
 
+	loop = self.loop
+
 	def _ConnectionStatusChanged_Handler(sender, args):
 		logger.debug("_ConnectionStatusChanged_Handler: " + args.ToString())
+		# Raised on a WinRT thread, so hand the lost link over to the loop
+		callback = getattr(self, "_disconnected_callback", None)
+		if sender.ConnectionStatus == BluetoothConnectionStatus.Disconnected and callback is not None:
+			loop.call_soon_threadsafe(callback, self)
 
 	self._requester.ConnectionStatusChanged += _ConnectionStatusChanged_Handler
 
@@ -0,0 +1,51 @@
+# -*- coding: utf-8 -*-
+
+import asyncio
+import logging
+
+from bleak.backends.dotnet.discovery import discover
+from bluelib.advertisement import Advertisement, ScanStream, SeenTable, full_uuid
+
+logger = logging.getLogger(__name__)
+
+# Length of each discovery round, the .NET watcher is not exposed by bleak
+SLICE = 1.0
+
+
+def _advertisement(device) -> Advertisement:
+	metadata = getattr(device, "metadata", None) or {}
+	return Advertisement(device.address, rssi=device.rssi, name=device.name or None,
+		service_uuids=[full_uuid(u) for u in metadata.get("uuids", [])],
+		manufacturer_data={k: bytes(v) for k, v in metadata.get("manufacturer_data", {}).items()})
+
+
+async def scan_stream(filters=None, seen: int = SeenTable.DEFAULT_MAXSIZE,
+	refresh: float = None, maxsize: int = ScanStream.DEFAULT_MAXSIZE, **kwargs):
+	"""Scan continuously and yield advertisements, see :func:`bluelib.linux.scan.scan_stream`.
+
+	Runs back to back discovery rounds of ``SLICE`` seconds and filters
+	each round's devices as they are returned.
+	"""
+	loop = asyncio.get_event_loop()
+	stream = ScanStream(loop, filters, seen, refresh, maxsize)
+
+	async def discover_rounds():
+		try:
+			while True:
+				for d in await discover(timeout=SLICE, loop=loop):
+					if stream.match_address(d.address.lower()):
+						stream.offer(_advertisement(d), threadsafe=False)
+		except asyncio.CancelledError:
+			raise
+		except Exception as e:
+			logger.error(f"[scan_stream] discovery failed: {str(e)}")
+			stream.close(e)
+
+	task = asyncio.ensure_future(discover_rounds())
+
+	try:
+		async for adv in stream:
+			yield adv
+	finally:
+		stream.close()
+		task.cancel()
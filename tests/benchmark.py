@@ -0,0 +1,307 @@
+# ------------------------------------------------------------------------------#
+# -Description:                                                                -#
+# --Latency/throughput benchmark for bluelib. Runs each operation against     --#
+# --1..N concurrent devices and reports p50/p95/p99 latency and ops/sec.      --#
+# --Works with the simulated backend (--backend sim) or real sensors          --#
+# --(--backend native --address ...). Results are written as JSON and can be --#
+# --compared against a previous run with --compare.                          --#
+# ------------------------------------------------------------------------------#
+#
+# Examples:
+#   python benchmark.py --backend sim --devices 64 --concurrency 1 8 64
+#   python benchmark.py --backend native --address 57:5a:4c:f3:7a:1c 57:5a:4c:f3:7a:0a
+#   python benchmark.py --backend sim --output new.json --compare old.json
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import pathlib
+import platform
+import sys
+import time
+
+_module_path = pathlib.Path(__file__).parent.parent
+if str(_module_path) not in sys.path:
+    sys.path.append(str(_module_path))
+
+OPERATIONS = ["connect", "read_gatt_char", "write_gatt_char", "set_genSens", "start_notify", "_get_notify",
+              "measure", "measure_advertised"]
+
+
+def percentile(samples, p):
+    """Nearest-rank percentile of an already sorted list."""
+    if not samples:
+        return None
+    k = max(0, min(len(samples) - 1, int(round(p / 100.0 * len(samples) + 0.5)) - 1))
+    return samples[k]
+
+
+def summarize(latencies, errors, elapsed):
+    latencies = sorted(latencies)
+    return {"count": len(latencies),
+            "errors": errors,
+            "elapsed": elapsed,
+            "ops_per_sec": (len(latencies) / elapsed) if elapsed > 0 else None,
+            "mean": (sum(latencies) / len(latencies)) if latencies else None,
+            "p50": percentile(latencies, 50),
+            "p95": percentile(latencies, 95),
+            "p99": percentile(latencies, 99),
+            "max": latencies[-1] if latencies else None}
+
+
+class Benchmark(object):
+    """Runs the operation matrix against a list of tSense sensors."""
+
+    def __init__(self, sensors, iterations=10, timeout=30):
+        from sensorlib.blesensor import GenericSensor, Temperature
+
+        self.sensors = sensors
+        self.iterations = iterations
+        self.timeout = timeout
+
+        self.read_uuid = GenericSensor.GEN_SENS_LABEL_CHAR_UUID
+        self.write_uuid = GenericSensor.GEN_SENS_LABEL_CHAR_UUID
+        self.notify_uuid = Temperature.TEMP_TEMPERATURE_CHAR_UUID
+
+    # Each op returns an (untimed setup, timed op, untimed teardown) triple.
+
+    def _op(self, name, sensor):
+        client = sensor.client
+
+        async def noop():
+            pass
+
+        async def ensure_connected():
+            await sensor.connect()
+
+        if name == "connect":
+            return noop, client.connect, client.disconnect
+
+        if name == "read_gatt_char":
+            return ensure_connected, lambda: client.read_gatt_char(self.read_uuid, keepConnection=True), noop
+
+        if name == "write_gatt_char":
+            return (ensure_connected,
+                    lambda: client.write_gatt_char(self.write_uuid, b"Benchmark", keepConnection=True),
+                    noop)
+
+        if name == "set_genSens":
+            # Three writes in one session
+            return (ensure_connected,
+                    lambda: sensor.set_genSens(label="Benchmark", advMode=sensor.ADV_MODE_1,
+                                               txPwrLvl=(sensor.TX_PWR_LVL_0_DBM, sensor.TX_PWR_LVL_0_DBM),
+                                               keepConnection=True),
+                    noop)
+
+        if name == "start_notify":
+            return (ensure_connected,
+                    lambda: client.start_notify(self.notify_uuid, lambda s, d: None),
+                    lambda: client.stop_notify(self.notify_uuid, keepConnection=True))
+
+        if name == "_get_notify":
+            return ensure_connected, lambda: sensor._get_notify(self.notify_uuid, keepConnection=True), noop
+
+        if name == "measure":
+            return noop, lambda: sensor.measure(["temperature", "battery"]), noop
+
+        if name == "measure_advertised":
+            return noop, lambda: sensor.measure_advertised(["temperature", "battery"]), noop
+
+        raise ValueError(f"Unknown operation {name}")
+
+    async def _run_device(self, name, sensor, latencies, errors):
+        setup, op, teardown = self._op(name, sensor)
+        busy = 0.0
+        for _ in range(self.iterations):
+            try:
+                await setup()
+                t1 = time.perf_counter()
+                await asyncio.wait_for(op(), self.timeout)
+                latencies.append(time.perf_counter() - t1)
+                busy += latencies[-1]
+                await teardown()
+            except Exception as e:
+                errors.append(repr(e))
+        return busy
+
+    async def run_level(self, name, concurrency):
+        latencies = []
+        errors = []
+        devices = self.sensors[:concurrency]
+
+        # Throughput is measured over the timed sections only; the slowest
+        # device bounds the elapsed time of a level.
+        busy = await asyncio.gather(*[self._run_device(name, s, latencies, errors) for s in devices])
+        elapsed = max(busy) if busy else 0.0
+
+        for s in devices:
+            try:
+                await s.disconnect()
+            except Exception:
+                pass
+
+        result = summarize(latencies, len(errors), elapsed)
+        result["operation"] = name
+        result["concurrency"] = len(devices)
+        result["sample_errors"] = sorted(set(errors))[:5]
+        return result
+
+    async def run(self, operations, levels):
+        results = []
+        for name in operations:
+            for level in levels:
+                results.append(await self.run_level(name, level))
+                print(format_row(results[-1]))
+        return results
+
+
+def format_row(r):
+    def ms(v):
+        return "     -" if v is None else "{:6.1f}".format(v * 1000)
+
+    ops = "      -" if r["ops_per_sec"] is None else "{:7.1f}".format(r["ops_per_sec"])
+    return "{:<16} c={:<5} n={:<6} err={:<4} p50={}ms p95={}ms p99={}ms ops/s={}".format(
+        r["operation"], r["concurrency"], r["count"], r["errors"],
+        ms(r["p50"]), ms(r["p95"]), ms(r["p99"]), ops)
+
+
+def compare(current, baseline, threshold=0.10):
+    """Return (key, metric, old, new) tuples where the current run regressed
+    by more than ``threshold`` against the baseline."""
+    old = {(r["operation"], r["concurrency"]): r for r in baseline["results"]}
+    regressions = []
+
+    for r in current["results"]:
+        b = old.get((r["operation"], r["concurrency"]), None)
+        if b is None:
+            continue
+
+        for metric in ("p50", "p95", "p99"):
+            if b[metric] and r[metric] and r[metric] > b[metric] * (1 + threshold):
+                regressions.append(((r["operation"], r["concurrency"]), metric, b[metric], r[metric]))
+
+        if b["ops_per_sec"] and r["ops_per_sec"] and r["ops_per_sec"] < b["ops_per_sec"] * (1 - threshold):
+            regressions.append(((r["operation"], r["concurrency"]), "ops_per_sec", b["ops_per_sec"], r["ops_per_sec"]))
+
+    return regressions
+
+
+def build_sensors(args):
+    if args.backend == "sim":
+        os.environ["BLUELIB_BACKEND"] = "sim"
+
+    import bluelib
+    bluelib.use_backend("sim" if args.backend == "sim" else None)
+
+    from bluelib.connection import configure_connections
+    configure_connections(max_adapter_links=args.max_adapter_links,
+                          max_adapter_pending=args.max_adapter_pending)
+
+    from tSense_lib import tSense
+
+    if args.backend == "sim":
+        from bluelib.sim import add_peripheral, clear_peripherals
+        from tSense_sim import make_tsense_peripheral, sim_address
+
+        clear_peripherals()
+        addresses = [sim_address(i) for i in range(args.devices)]
+        for i, address in enumerate(addresses):
+            add_peripheral(make_tsense_peripheral(address, seed=args.seed + i,
+                                                  connect_latency=args.connect_latency,
+                                                  op_latency=args.op_latency,
+                                                  jitter=args.jitter,
+                                                  drop_rate=args.drop_rate,
+                                                  adv_mode=args.adv_modes[i % len(args.adv_modes)],
+                                                  adv_connect=args.adv_connect,
+                                                  advertise_readings=True))
+    else:
+        addresses = args.address
+
+    return [tSense(a, defaultKeepConnection=False, adaptiveTimeouts=args.adaptive_timeouts) for a in addresses]
+
+
+def admission_metrics():
+    from bluelib.connection import default_manager
+    return {("default" if a is None else "hci%s" % a): m for a, m in default_manager().metrics().items()}
+
+
+async def main(args):
+    sensors = build_sensors(args)
+
+    levels = sorted(set(min(c, len(sensors)) for c in (args.concurrency or [1, len(sensors)])))
+    operations = args.operations or OPERATIONS
+
+    bench = Benchmark(sensors, iterations=args.iterations, timeout=args.timeout)
+    results = await bench.run(operations, levels)
+
+    report = {"meta": {"backend": args.backend,
+                       "devices": len(sensors),
+                       "iterations": args.iterations,
+                       "seed": args.seed,
+                       "timestamp": time.time(),
+                       "python": platform.python_version(),
+                       "platform": platform.platform()},
+              "results": results,
+              "admission": admission_metrics()}
+
+    for adapter, m in sorted(report["admission"].items()):
+        print("admission {:<8} admitted={} max_queued={} wait_mean={:.1f}ms wait_p95={:.1f}ms wait_max={:.1f}ms".format(
+            adapter, m["admitted"], m["max_queued"], m["wait_mean"] * 1000, m["wait_p95"] * 1000, m["wait_max"] * 1000))
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+
+        regressions = compare(report, baseline, args.threshold)
+        for key, metric, old, new in regressions:
+            print(f"REGRESSION {key[0]} c={key[1]} {metric}: {old:.4f} -> {new:.4f}")
+
+        return 1 if regressions else 0
+
+    return 0
+
+
+def add_device_arguments(parser):
+    """Options selecting the backend and the devices, shared with fleet.py."""
+    parser.add_argument("--backend", choices=["sim", "native"], default="sim")
+    parser.add_argument("--address", nargs="+", default=[], help="device addresses for --backend native")
+    parser.add_argument("--devices", type=int, default=8, help="number of simulated devices")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--connect-latency", type=float, default=0.05)
+    parser.add_argument("--op-latency", type=float, default=0.01)
+    parser.add_argument("--jitter", type=float, default=0.0)
+    parser.add_argument("--drop-rate", type=float, default=0.0)
+    parser.add_argument("--adv-modes", type=int, nargs="+", default=[0],
+                        help="advertising modes of the simulated devices, assigned in turn")
+    parser.add_argument("--adv-connect", action="store_true",
+                        help="simulated connects wait for the next advertising event")
+    parser.add_argument("--max-adapter-links", type=int, help="links per adapter (default: no limit)")
+    parser.add_argument("--max-adapter-pending", type=int, help="pending connects per adapter (default: no limit)")
+    parser.add_argument("--adaptive-timeouts", action="store_true",
+                        help="learn timeouts and connect attempts from each device's latencies")
+    parser.add_argument("--log-level", default="WARNING")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="bluelib latency/throughput benchmark")
+    add_device_arguments(parser)
+    parser.add_argument("--concurrency", type=int, nargs="+", help="concurrency levels (default: 1 and all)")
+    parser.add_argument("--operations", nargs="+", choices=OPERATIONS)
+    parser.add_argument("--iterations", type=int, default=10, help="operations per device and level")
+    parser.add_argument("--timeout", type=float, default=30)
+    parser.add_argument("--output", help="write results as JSON")
+    parser.add_argument("--compare", help="baseline JSON to check for regressions")
+    parser.add_argument("--threshold", type=float, default=0.10, help="allowed relative regression")
+    return parser.parse_args(argv)
+
+if __name__ == "__main__":
+    args = parse_args()
+    logging.basicConfig(level=args.log_level,
+                        format='%(asctime)-15s %(name)s %(levelname)s %(message)s')
+    sys.exit(asyncio.run(main(args)))
@@ -0,0 +1,106 @@
+# ------------------------------------------------------------------------------#
+# -Description:                                                                -#
+# --Polls a fleet of tSense sensors with bluelib.fleet.FleetPoller and prints --#
+# --every measurement as it arrives. Accepts the device options of           --#
+# --benchmark.py (--backend, --address, --devices, latencies, ...). With     --#
+# ----workers the sensors are sharded over worker processes.                 --#
+# ------------------------------------------------------------------------------#
+#
+# Examples:
+#   python fleet.py --backend sim --devices 1000 --interval 10 --concurrency 32 --duration 30
+#   python fleet.py --backend native --address 57:5a:4c:f3:7a:1c 57:5a:4c:f3:7a:0a
+#   python fleet.py --backend sim --devices 4000 --interval 10 --concurrency 32 --workers 4
+
+import argparse
+import asyncio
+import logging
+import pathlib
+import sys
+import time
+
+_module_path = pathlib.Path(__file__).parent.parent
+if str(_module_path) not in sys.path:
+    sys.path.append(str(_module_path))
+
+import benchmark
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="poll a fleet of tSense sensors")
+    benchmark.add_device_arguments(parser)
+    parser.add_argument("--interval", type=float, default=10, help="seconds between two measurements of a sensor")
+    parser.add_argument("--concurrency", type=int, default=8, help="measurements in flight")
+    parser.add_argument("--duration", type=float, help="seconds to run (default: forever)")
+    parser.add_argument("--values", nargs="+", default=["temperature", "battery"])
+    parser.add_argument("--watch", action="store_true", help="time connects by the advertisements scanned meanwhile")
+    parser.add_argument("--workers", type=int, help="shard the sensors over this many processes")
+    return parser.parse_args(argv)
+
+
+# Sensors of a worker process, by address
+_sensors = {}
+
+
+def init_worker(args):
+    for sensor in benchmark.build_sensors(args):
+        _sensors[sensor.get_address()] = sensor
+
+
+def measure_job(address):
+    sensor = _sensors[address]
+    return sensor.measure, sensor.get_adv_interval
+
+
+async def main(args):
+    sensors = benchmark.build_sensors(args)
+
+    import bluelib
+    from bluelib.fleet import FleetPoller
+    from bluelib.shard import ShardedPoller
+
+    if args.workers:
+        poller = ShardedPoller(measure_job, workers=args.workers, concurrency=args.concurrency,
+                               initializer=init_worker, initargs=(args,), watch=args.watch)
+        for sensor in sensors:
+            poller.add(sensor.get_address(), args.interval, args.values)
+    else:
+        poller = FleetPoller(concurrency=args.concurrency)
+        for sensor in sensors:
+            poller.add(sensor.get_address(), sensor.measure, args.interval, args.values,
+                       adv_interval=sensor.get_adv_interval)
+
+    ok = failed = 0
+    t0 = time.perf_counter()
+
+    async def consume():
+        nonlocal ok, failed
+        async for r in poller.results():
+            if r.ok:
+                ok += 1
+                print("{:<18} {} latency={:.0f}ms delay={:.0f}ms".format(r.key, r.value, r.latency * 1000, r.delay * 1000))
+            else:
+                failed += 1
+                print("{:<18} failed: {!r}".format(r.key, r.error))
+
+    async with poller:
+        if args.watch and not args.workers:
+            poller.watch(bluelib.scan_stream(refresh=0))
+        try:
+            await asyncio.wait_for(consume(), args.duration)
+        except asyncio.TimeoutError:
+            pass
+
+    elapsed = time.perf_counter() - t0
+    print("{} measurements, {} failed, {:.1f}/s".format(ok + failed, failed, (ok + failed) / elapsed))
+    if args.workers:
+        for i, m in sorted(poller.metrics().items()):
+            print("worker {} jobs={} runs={} failures={} delay={:.0f}ms".format(
+                i, m["jobs"], m["runs"], m["failures"], m["delay"] * 1000))
+    return 0
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    logging.basicConfig(level=args.log_level,
+                        format='%(asctime)-15s %(name)s %(levelname)s %(message)s')
+    sys.exit(asyncio.run(main(args)))
@@ -6,6 +6,9 @@ class Battery(BleSensorBase):
 
 	# --- BATTERY SERVICE --- #
 	BATTERY_BATTERY_LEVEL_CHAR_UUID     = "00002a19-0000-1000-8000-00805f9b34fb"
+
+	# --- ADVERTISED MEASUREMENTS --- #
+	ADV_FIELD_BATTERY_LEVEL             = 0x02
 	
 	def __init__(self, address, loop=None, **kwargs):
 		super().__init__(address, loop, **kwargs)
@@ -26,4 +29,16 @@ class Battery(BleSensorBase):
 			self.logger.error("[" + currentFuncName() + "] received exception: " + str(e))
 			raise e
 
+
+	def _parse_adv_BatteryLevel(self, value):
+		self.battery_BatteryLevel = value
+		self.logger.info("[" + currentFuncName() + "] advertised: " + str(self.battery_BatteryLevel))
+		return self.battery_BatteryLevel
+
+
+	def _adv_fields(self) -> dict:
+		fields = super()._adv_fields()
+		fields[Battery.ADV_FIELD_BATTERY_LEVEL] = ("battery", "B", self._parse_adv_BatteryLevel)
+		return fields
+
 			
\ No newline at end of file
@@ -4,6 +4,9 @@ import sys
 import time
 import logging
 import asyncio
+import struct
+
+from bluelib.advertisement import ScanFilter, collect
 
 currentFuncName = lambda n=0: sys._getframe(n + 1).f_code.co_name
 
@@ -18,11 +21,16 @@ class BleSensorBase(abc.ABC):
 	# --- GENERIC ACCESS SERVICE --- #
 	GEN_ACC_DEVICE_NAME_CHAR_UUID       = "00002a00-0000-1000-8000-00805f9b34fb"
 
+	# --- ADVERTISED MEASUREMENTS --- #
+	# Company identifier of the manufacturer data carrying the measurements
+	ADV_COMPANY_ID                      = 0x5A57
+
 
 	def __init__(self, address, loop=None,
 		maxretries = DEFAULT_MAXRETRIES,
 		defaultKeepConnection = DEFAULT_KEEP_CONNECTION,
-		timeout = DEFUALT_TIMEOUT):
+		timeout = DEFUALT_TIMEOUT,
+		adaptiveTimeouts = False):
 
 		self.logger = logging.getLogger(str(self.__class__.__name__)
 				+ " dev "
@@ -31,7 +39,8 @@ class BleSensorBase(abc.ABC):
 
 		
 		self.client = bluelib.BleClient(address, loop=loop,
-			maxretries=maxretries ,timeout=timeout, defaultKeepConnection=defaultKeepConnection)
+			maxretries=maxretries ,timeout=timeout, defaultKeepConnection=defaultKeepConnection,
+			adaptiveTimeouts=adaptiveTimeouts)
 
 		self.loop = loop if loop else asyncio.get_event_loop()
 
@@ -39,21 +48,31 @@ class BleSensorBase(abc.ABC):
 
 	
 	@staticmethod
-	async def scan(time=5, filter:str=None, sensor=None):
+	async def scan(time=5, filter:str=None, sensor=None, **filters):
+		"""Scan for devices.
+
+		Args:
+			time (float): Seconds to scan for.
+			filter (str): Text the device's description has to contain.
+			sensor (BleSensorBase): Sensor whose logger is used.
+			**filters: :class:`ScanFilter` criteria (``address_prefix``, ``name``,
+				``service_uuid``, ``manufacturer_id``), applied while scanning.
+
+		Returns:
+			(list) The description of every device found.
+
+		"""
 		if sensor is not None:
 			logger = sensor.logger
 		else:
 			logger = logging.getLogger()
 		try:
-			devices = await bluelib.scan(time)
+			scan_filter = ScanFilter(**filters) if filters else None
+			devices = await collect(bluelib.scan_stream(scan_filter), time)
 			ret = []
 
-			for d in devices:
-				if filter is not None:
-					if filter in str(d):
-					   logger.info("BleSensor [" + currentFuncName() + "] scanned device: " + str(d))
-					   ret.append(str(d))
-				else:
+			for d in (adv.to_dict() for adv in devices):
+				if filter is None or filter in str(d):
 					logger.info("BleSensor [" + currentFuncName() + "] scanned device: " + str(d))
 					ret.append(str(d))
 
@@ -82,6 +101,9 @@ class BleSensorBase(abc.ABC):
 	async def disconnect(self) -> bool:
 		return await self.client.disconnect()
 
+	async def release(self) -> None:
+		await self.client.release()
+
 	async def is_connected(self) -> bool:
 		return await self.client.is_connected()
 
@@ -92,40 +114,157 @@ class BleSensorBase(abc.ABC):
 
 		try:
 			data = await self.client.read_gatt_char(BleSensorBase.GEN_ACC_DEVICE_NAME_CHAR_UUID, **kwargs)
-			self.genAcc_DeviceName = data.decode("utf-8").strip(" ")
-			self.logger.info("[" + currentFuncName() + "] received: " + self.genAcc_DeviceName)
-			return self.genAcc_DeviceName
+			return self._parse_genAcc_DeviceName(data)
 
 		except Exception as e:
 			self.logger.error("[" + currentFuncName() + "] received exception: " + str(e))
 			return None
 
 
-	async def _get_notify(self, _uuid, **kwargs):
+	def _parse_genAcc_DeviceName(self, data):
+		self.genAcc_DeviceName = data.decode("utf-8").strip(" ")
+		self.logger.info("[" + currentFuncName(1) + "] received: " + self.genAcc_DeviceName)
+		return self.genAcc_DeviceName
+
+
+	# %% Static parameters
+
+	def _parameters(self) -> list:
+		"""(uuid, parser) pairs of the static values that were not read yet.
+
+		Sensor classes extend the list of their bases, so a combined sensor
+		can read every value it is missing in one bulk read.
+		"""
+		if self.genAcc_DeviceName is None:
+			return [(BleSensorBase.GEN_ACC_DEVICE_NAME_CHAR_UUID, self._parse_genAcc_DeviceName)]
+		return []
+
+
+	async def _read_parameters(self, parameters: list, keepConnection=None):
+		if not parameters:
+			return
+
+		try:
+			data = await self.client.read_gatt_chars([p[0] for p in parameters],
+				keepConnection=keepConnection, return_exceptions=True)
+		except Exception as e:
+			self.logger.error("[" + currentFuncName(1) + "] received exception: " + str(e))
+			return
+
+		for (_uuid, parse), value in zip(parameters, data):
+			try:
+				if isinstance(value, Exception):
+					raise value
+				parse(value)
+			except Exception as e:
+				self.logger.error("[" + currentFuncName(1) + "] could not read " + _uuid + ": " + str(e))
+
+
+	async def read_parameters(self, **kwargs):
+		"""Read every missing static value of the sensor in one bulk read."""
+		await self._read_parameters(self._parameters(), kwargs.get('keepConnection', None))
+
+
+	# %% Advertised measurements
+
+	def _adv_fields(self) -> dict:
+		"""Maps the field ids of the advertised measurements to (name, struct format, parser).
 
-		lock = True
-		data = None
+		Sensor classes extend the table of their bases, like :meth:`_parameters`.
+		"""
+		return {}
+
+
+	def parse_advertisement(self, adv) -> dict:
+		"""Decode the measurements in the manufacturer data of an advertisement.
+
+		The payload is a sequence of fields, each a one byte field id
+		followed by the value. Decoding stops at the first unknown field,
+		as its length is unknown.
+
+		Returns:
+			(dict) The decoded values by name, empty if the advertisement
+			carries no measurements.
+
+		"""
+		payload = adv.manufacturer_data.get(self.ADV_COMPANY_ID, None)
+		if not payload:
+			return {}
+
+		fields = self._adv_fields()
+		values = {}
+		i = 0
+
+		while i < len(payload):
+			field = fields.get(payload[i], None)
+			if field is None:
+				self.logger.debug(f"[{currentFuncName()}] unknown field {payload[i]} in advertisement.")
+				break
+
+			name, fmt, parse = field
+			size = struct.calcsize(fmt)
+			raw = payload[i+1:i+1+size]
+			if len(raw) < size:
+				break
+
+			values[name] = parse(struct.unpack(fmt, raw)[0])
+			i += 1 + size
+
+		return values
+
+
+	@staticmethod
+	async def monitor(sensors: list, refresh: float = None):
+		"""Yield ``(sensor, values)`` whenever one of ``sensors`` advertises new measurements.
+
+		No connection is made: the values are decoded from the scanner
+		stream with :meth:`parse_advertisement`.
+
+		Args:
+			sensors (list): The sensors to monitor.
+			refresh (float): Seconds after which unchanged values are yielded again.
+
+		"""
+		by_address = {s.get_address().replace("-", ":").lower(): s for s in sensors}
+		filters = [ScanFilter(manufacturer_id=c) for c in set(s.ADV_COMPANY_ID for s in sensors)]
+
+		async for adv in bluelib.scan_stream(filters, refresh=refresh):
+			sensor = by_address.get(adv.address, None)
+			if sensor is None:
+				continue
+
+			values = sensor.parse_advertisement(adv)
+			if values:
+				yield sensor, values
+
+
+	async def _get_notify(self, _uuid, **kwargs):
 
-		delay = kwargs.get('delay',0.2)
 		timeout = kwargs.get('timeout',2)
 
+		received = self.loop.create_future()
+
+		def __set_result(_data):
+			if not received.done():
+				received.set_result(_data)
+
 		def __callback(_sender, _data):
-			nonlocal lock
-			nonlocal data
-			data = _data
-			lock = False
+			# Backends may call back from a worker thread
+			self.loop.call_soon_threadsafe(__set_result, _data)
 
 		try:
 			await self.client.start_notify(_uuid, __callback, **kwargs)
 
-			start = time.perf_counter()
-			while lock:
-				await asyncio.sleep(delay, self.loop)
-				if time.perf_counter() > start + timeout:
-					lock = False
-					raise ConnectionError("Timeout: BLE connection might be broken.")
+			try:
+				data = await asyncio.wait_for(received, timeout)
+			except asyncio.TimeoutError:
+				try:
+					await self.client.stop_notify(_uuid, callback=__callback, **kwargs)
+				except Exception:
+					pass
+				raise ConnectionError("Timeout: BLE connection might be broken.")
 
-			await self.client.stop_notify(_uuid, **kwargs)
+			await self.client.stop_notify(_uuid, callback=__callback, **kwargs)
 
 			return data
 
@@ -1,6 +1,7 @@
 from sensorlib.blesensor.blesensorbase import BleSensorBase
 from sensorlib.blesensor.blesensorbase import currentFuncName
 import asyncio
+import functools
 
 class DeviceInformation(BleSensorBase):
 
@@ -15,6 +16,18 @@ class DeviceInformation(BleSensorBase):
 	DEV_INF_IEEE_RCDL_CHAR_UUID         = "00002a2a-0000-1000-8000-00805f9b34fb"
 	DEV_INF_PNP_ID_CHAR_UUID            = "00002a50-0000-1000-8000-00805f9b34fb"
 
+	# Characteristics read by get_devInf: (uuid, attribute, decoded as string)
+	DEV_INF_FIELDS = (
+		(DEV_INF_MANUFACTURER_NAME_CHAR_UUID, "devInf_ManufacturerName", True),
+		(DEV_INF_MODEL_NUMBER_CHAR_UUID, "devInf_ModelNumber", True),
+		(DEV_INF_SERIAL_NUMBER_CHAR_UUID, "devInf_SerialNumber", True),
+		(DEV_INF_HARDWARE_REVISION_CHAR_UUID, "devInf_HardwareRevision", True),
+		(DEV_INF_FIRMWARE_REVISION_CHAR_UUID, "devInf_FirmwareRevision", True),
+		(DEV_INF_SOFTWARE_REVISION_CHAR_UUID, "devInf_SoftwareRevision", True),
+		(DEV_INF_SYSTEM_ID_CHAR_UUID, "devInf_SystemID", False), # Has to be formated
+		(DEV_INF_IEEE_RCDL_CHAR_UUID, "devInf_IEEE_RCDL", False), # Has to be formated
+		(DEV_INF_PNP_ID_CHAR_UUID, "devInf_PNP_ID", False)) # Has to be formated
+
 	def __init__(self, address, loop=None, **kwargs):
 		super().__init__(address, loop, **kwargs)
 
@@ -35,10 +48,7 @@ class DeviceInformation(BleSensorBase):
 
 		try:
 			data = await self.client.read_gatt_char(DeviceInformation.DEV_INF_MANUFACTURER_NAME_CHAR_UUID, **kwargs)
-			self.devInf_ManufacturerName = data.decode("utf-8").strip(" ")
-			self.logger.info("[" + currentFuncName() + "] received: " + self.devInf_ManufacturerName)
-
-			return self.devInf_ManufacturerName
+			return self._parse_devInf("devInf_ManufacturerName", True, data)
 
 		except Exception as e:
 			self.logger.error("[" + currentFuncName() + "] received exception: " + str(e))
@@ -51,10 +61,7 @@ class DeviceInformation(BleSensorBase):
 
 		try:
 			data = await self.client.read_gatt_char(DeviceInformation.DEV_INF_MODEL_NUMBER_CHAR_UUID, **kwargs)
-			self.devInf_ModelNumber = data.decode("utf-8").strip(" ")
-			self.logger.info("[" + currentFuncName() + "] received: " + self.devInf_ModelNumber)
-
-			return self.devInf_ModelNumber
+			return self._parse_devInf("devInf_ModelNumber", True, data)
 
 		except Exception as e:
 			self.logger.error("[" + currentFuncName() + "] received exception: " + str(e))
@@ -67,10 +74,7 @@ class DeviceInformation(BleSensorBase):
 
 		try:
 			data = await self.client.read_gatt_char(DeviceInformation.DEV_INF_SERIAL_NUMBER_CHAR_UUID, **kwargs)
-			self.devInf_SerialNumber = data.decode("utf-8").strip(" ")
-			self.logger.info("[" + currentFuncName() + "] received: " + self.devInf_SerialNumber)
-
-			return self.devInf_SerialNumber
+			return self._parse_devInf("devInf_SerialNumber", True, data)
 
 		except Exception as e:
 			self.logger.error("[" + currentFuncName() + "] received exception: " + str(e))
@@ -83,10 +87,7 @@ class DeviceInformation(BleSensorBase):
 
 		try:
 			data = await self.client.read_gatt_char(DeviceInformation.DEV_INF_HARDWARE_REVISION_CHAR_UUID, **kwargs)
-			self.devInf_HardwareRevision = data.decode("utf-8").strip(" ")
-			self.logger.info("[" + currentFuncName() + "] received: " + self.devInf_HardwareRevision)
-
-			return self.devInf_HardwareRevision
+			return self._parse_devInf("devInf_HardwareRevision", True, data)
 
 		except Exception as e:
 			self.logger.error("[" + currentFuncName() + "] received exception: " + str(e))
@@ -99,10 +100,7 @@ class DeviceInformation(BleSensorBase):
 
 		try:
 			data = await self.client.read_gatt_char(DeviceInformation.DEV_INF_FIRMWARE_REVISION_CHAR_UUID, **kwargs)
-			self.devInf_FirmwareRevision = data.decode("utf-8").strip(" ")
-			self.logger.info("[" + currentFuncName() + "] received: " + self.devInf_FirmwareRevision)
-
-			return self.devInf_FirmwareRevision
+			return self._parse_devInf("devInf_FirmwareRevision", True, data)
 
 		except Exception as e:
 			self.logger.error("[" + currentFuncName() + "] received exception: " + str(e))
@@ -115,10 +113,7 @@ class DeviceInformation(BleSensorBase):
 
 		try:
 			data = await self.client.read_gatt_char(DeviceInformation.DEV_INF_SOFTWARE_REVISION_CHAR_UUID, **kwargs)
-			self.devInf_SoftwareRevision = data.decode("utf-8").strip(" ")
-			self.logger.info("[" + currentFuncName() + "] received: " + self.devInf_SoftwareRevision)
-
-			return self.devInf_SoftwareRevision
+			return self._parse_devInf("devInf_SoftwareRevision", True, data)
 
 		except Exception as e:
 			self.logger.error("[" + currentFuncName() + "] received exception: " + str(e))
@@ -131,10 +126,7 @@ class DeviceInformation(BleSensorBase):
 
 		try:
 			data = await self.client.read_gatt_char(DeviceInformation.DEV_INF_SYSTEM_ID_CHAR_UUID, **kwargs)
-			self.devInf_SystemID = data # Has to be formated
-			self.logger.info("[" + currentFuncName() + "] received: " + str(self.devInf_SystemID))
-
-			return self.devInf_SystemID
+			return self._parse_devInf("devInf_SystemID", False, data)
 
 		except Exception as e:
 			self.logger.error("[" + currentFuncName() + "] received exception: " + str(e))
@@ -147,10 +139,7 @@ class DeviceInformation(BleSensorBase):
 
 		try:
 			data = await self.client.read_gatt_char(DeviceInformation.DEV_INF_IEEE_RCDL_CHAR_UUID, **kwargs)
-			self.devInf_IEEE_RCDL = data # Has to be formated
-			self.logger.info("[" + currentFuncName() + "] received: " + str(self.devInf_IEEE_RCDL))
-
-			return self.devInf_IEEE_RCDL
+			return self._parse_devInf("devInf_IEEE_RCDL", False, data)
 
 		except Exception as e:
 			self.logger.error("[" + currentFuncName() + "] received exception: " + str(e))
@@ -163,10 +152,7 @@ class DeviceInformation(BleSensorBase):
 
 		try:
 			data = await self.client.read_gatt_char(DeviceInformation.DEV_INF_PNP_ID_CHAR_UUID, **kwargs)
-			self.devInf_PNP_ID = data # Has to be formated
-			self.logger.info("[" + currentFuncName() + "] received: " + str(self.devInf_PNP_ID))
-
-			return self.devInf_PNP_ID
+			return self._parse_devInf("devInf_PNP_ID", False, data)
 
 		except Exception as e:
 			self.logger.error("[" + currentFuncName() + "] received exception: " + str(e))
@@ -174,44 +160,24 @@ class DeviceInformation(BleSensorBase):
 
 
 	async def get_devInf(self, **kwargs):
-		keepConnection = kwargs.get('keepConnection',None)
-		kwargs['keepConnection'] = True
+		await self._read_parameters(self._devInf_parameters(), kwargs.get('keepConnection',None))
 
-		try:
-			await self.get_devInf_ManufacturerName(**kwargs)
-		except:
-			pass
-		try:
-			await self.get_devInf_ModelNumber(**kwargs)
-		except:
-			pass
-		try:
-			await self.get_devInf_SerialNumber(**kwargs)
-		except:
-			pass
-		try:
-			await self.get_devInf_HardwareRevision(**kwargs)
-		except:
-			pass
-		try:
-			await self.get_devInf_FirmwareRevision(**kwargs)
-		except:
-			pass
-		try:
-			await self.get_devInf_SoftwareRevision(**kwargs)
-		except:
-			pass
-		try:
-			await self.get_devInf_SystemID(**kwargs)
-		except:
-			pass
-		try:
-			await self.get_devInf_IEEE_RCDL(**kwargs)
-		except:
-			pass
 
-		kwargs['keepConnection'] = keepConnection
-		try:
-			await self.get_devInf_PNP_ID(**kwargs)
-		except:
-			pass
+	def _devInf_parameters(self) -> list:
+		return [(_uuid, functools.partial(self._parse_devInf, name, text))
+			for _uuid, name, text in DeviceInformation.DEV_INF_FIELDS if getattr(self, name) is None]
+
+
+	def _parse_devInf(self, name, text, data):
+		# The firmware revision is bound here only, for the getters and the bulk read alike
+		setattr(self, name, data.decode("utf-8").strip(" ") if text else data)
+		self.logger.info("[" + currentFuncName(1) + "] received " + name + ": " + str(getattr(self, name)))
+
+		if name == "devInf_FirmwareRevision":
+			self.client.bind_firmware_revision(self.devInf_FirmwareRevision)
+
+		return getattr(self, name)
+
+
+	def _parameters(self) -> list:
+		return super()._parameters() + self._devInf_parameters()
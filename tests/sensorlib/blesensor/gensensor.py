@@ -53,6 +53,12 @@ class GenericSensor(BleSensorBase):
 	
 	async def connect(self, timeout=None, retries=None) -> bool:
 		try:
+			if timeout is None and self.client.adaptiveTimeouts:
+				# The client learns the timeout from the device's connect latencies
+				status = await BleSensorBase.connect(self, timeout=None, retries=retries)
+				if status and self.genSens_AdvMode is None:
+					await self.get_genSens_AdvMode(keepConnection=True)
+				return status
 			if timeout is None:
 				timeout = self.connTimeout
 			if timeout is None:
@@ -66,6 +72,15 @@ class GenericSensor(BleSensorBase):
 			raise e
 
 
+	def get_adv_interval(self):
+		"""Maximum advertising interval of the sensor in seconds, or None while its mode is unknown."""
+		intervals = [self.MAX_ADV_INTERVAL_MODE_1, self.MAX_ADV_INTERVAL_MODE_2,
+			self.MAX_ADV_INTERVAL_MODE_3, self.MAX_ADV_INTERVAL_MODE_4]
+		if self.genSens_AdvMode in (self.ADV_MODE_1, self.ADV_MODE_2, self.ADV_MODE_3, self.ADV_MODE_4):
+			return intervals[self.genSens_AdvMode]
+		return None
+
+
 	# %% Generic Sensor Service
 	async def get_genSens_Label(self, **kwargs):
 		if self.genSens_Label is not None:
@@ -73,9 +88,7 @@ class GenericSensor(BleSensorBase):
 
 		try:
 			data = await self.client.read_gatt_char(GenericSensor.GEN_SENS_LABEL_CHAR_UUID, **kwargs)
-			self.genSens_Label = data.decode("utf-8").strip(" ")
-			self.logger.info("[" + currentFuncName() + "] received: " + self.genSens_Label)
-			return self.genSens_Label
+			return self._parse_genSens_Label(data)
 
 		except Exception as e:
 			self.logger.error("[" + currentFuncName() + "] received exception: " + str(e))
@@ -108,26 +121,7 @@ class GenericSensor(BleSensorBase):
 
 		try:
 			data = await self.client.read_gatt_char(GenericSensor.GEN_SENS_ADV_MODE_CHAR_UUID, **kwargs)
-
-			self.genSens_AdvMode = int(format(data[0]))
-
-			if self.genSens_AdvMode == self.ADV_MODE_1:
-				self.connTimeout = self.MAX_ADV_INTERVAL_MODE_1 + self.connTimeout_plus
-				self.logger.info("[" + currentFuncName() + "] received: ADV_MODE_1")
-			elif self.genSens_AdvMode == self.ADV_MODE_2:
-				self.connTimeout = self.MAX_ADV_INTERVAL_MODE_2 + self.connTimeout_plus
-				self.logger.info("[" + currentFuncName() + "] received: ADV_MODE_2")
-			elif self.genSens_AdvMode == self.ADV_MODE_3:
-				self.connTimeout = self.MAX_ADV_INTERVAL_MODE_3 + self.connTimeout_plus
-				self.logger.info("[" + currentFuncName() + "] received: ADV_MODE_3")
-			elif self.genSens_AdvMode == self.ADV_MODE_4:
-				self.connTimeout = self.MAX_ADV_INTERVAL_MODE_4 + self.connTimeout_plus
-				self.logger.info("[" + currentFuncName() + "] received: ADV_MODE_4")
-			else:
-				self.connTimeout = self.MAX_ADV_INTERVAL_MODE_4 + self.connTimeout_plus
-				self.logger.warning("[" + currentFuncName() + "] received unexpected result: " + str(self.genSens_AdvMode))
-
-			return self.genSens_AdvMode
+			return self._parse_genSens_AdvMode(data)
 
 		except Exception as e:
 			self.logger.error("[" + currentFuncName() + "] received exception: " + str(e))
@@ -173,25 +167,7 @@ class GenericSensor(BleSensorBase):
 
 		try:
 			data = await self.client.read_gatt_char(GenericSensor.GEN_SENS_TX_PWR_LVL_CHAR_UUID, **kwargs)
-
-			self.genSens_TxPwrLvl_AdvScan     = int(format(data[0]))
-			self.genSens_TxPwrLvl_Conn        = int(format(data[1]))
-
-			pwrLvl = ["TX_PWR_LVL_NEG_18_DBM",
-					"TX_PWR_LVL_NEG_12_DBM",
-					"TX_PWR_LVL_NEG_6_DBM",
-					"TX_PWR_LVL_NEG_3_DBM",
-					"TX_PWR_LVL_NEG_2_DBM",
-					"TX_PWR_LVL_NEG_1_DBM",
-					"TX_PWR_LVL_0_DBM",
-					"TX_PWR_LVL_3_DBM",
-					"TX_PWR_LVL_MAX"]
-
-			self.logger.info("[" + currentFuncName() + "] received: "
-				+ f"TxPwrLvl_AdvScan: {pwrLvl[self.genSens_TxPwrLvl_AdvScan-1]}\t"
-				+ f"TxPwrLvl_Conn: {pwrLvl[self.genSens_TxPwrLvl_Conn-1]}")
-
-			return self.genSens_TxPwrLvl_AdvScan, self.genSens_TxPwrLvl_Conn
+			return self._parse_genSens_TxPwrLvl(data)
 
 		except Exception as e:
 			self.logger.error("[" + currentFuncName() + "] received exception: " + str(e))
@@ -233,20 +209,123 @@ class GenericSensor(BleSensorBase):
 			raise e
 
 
-	async def get_genSens(self, **kwargs):
-		keepConnection = kwargs.get('keepConnection',None)
-		kwargs['keepConnection'] = True
-		try:
-			await self.get_genSens_Label(**kwargs)
-		except:
-			pass
-		try:
-			await self.get_genSens_AdvMode(**kwargs)
-		except:
-			pass
+	async def set_genSens(self, label=None, advMode=None, txPwrLvl=None, **kwargs):
+		"""Write several generic sensor settings in one session on one link.
+
+		Settings left as None are not written. The written values are applied
+		like values read from the sensor. If a write fails, the other ones
+		are still applied and the first failure is raised.
+
+		Args:
+			label (str): The label, cut to 64 characters.
+			advMode (int): One of the ``ADV_MODE_*`` modes.
+			txPwrLvl (tuple): The ``(advScan, conn)`` pair of ``TX_PWR_LVL_*`` levels.
+
+		"""
+		values = {}
+		parsers = {}
+
+		if label is not None:
+			values[GenericSensor.GEN_SENS_LABEL_CHAR_UUID] = bytearray(label[:64], "utf-8")
+			parsers[GenericSensor.GEN_SENS_LABEL_CHAR_UUID] = self._parse_genSens_Label
+
+		if advMode is not None:
+			assert (advMode >= self.ADV_MODE_1 and advMode <= self.ADV_MODE_4), ("Advertisement Mode has to be between 1 and 4")
+			values[GenericSensor.GEN_SENS_ADV_MODE_CHAR_UUID] = bytearray(uint8(advMode))
+			parsers[GenericSensor.GEN_SENS_ADV_MODE_CHAR_UUID] = self._parse_genSens_AdvMode
+
+		if txPwrLvl is not None:
+			advScan, conn = txPwrLvl
+			assert (advScan >= 1 and advScan <= 9), ("Parameter \'advScan\' has to be between 1 and 9")
+			assert (conn >= 1 and conn <= 9), ("Parameter \'conn\' has to be between 1 and 9")
+			values[GenericSensor.GEN_SENS_TX_PWR_LVL_CHAR_UUID] = bytearray(uint8(advScan) + uint8(conn))
+			parsers[GenericSensor.GEN_SENS_TX_PWR_LVL_CHAR_UUID] = self._parse_genSens_TxPwrLvl
+
+		if not values:
+			return
 
-		kwargs['keepConnection'] = keepConnection
 		try:
-			await self.get_genSens_TxPwrLvl(**kwargs)
-		except:
-			pass
\ No newline at end of file
+			async with self.client.session(keepConnection=kwargs.get('keepConnection',None)) as s:
+				results = await s.write_many(values, return_exceptions=True)
+		except Exception as e:
+			self.logger.error("[" + currentFuncName() + "] received exception: " + str(e))
+			raise e
+
+		errors = []
+		for (_uuid, data), result in zip(values.items(), results):
+			if isinstance(result, Exception):
+				self.logger.error("[" + currentFuncName() + "] could not write " + _uuid + ": " + str(result))
+				errors.append(result)
+			else:
+				parsers[_uuid](data)
+
+		if errors:
+			raise errors[0]
+
+
+	async def get_genSens(self, **kwargs):
+		await self._read_parameters(self._genSens_parameters(), kwargs.get('keepConnection',None))
+
+
+	def _genSens_parameters(self) -> list:
+		parameters = []
+		if self.genSens_Label is None:
+			parameters.append((GenericSensor.GEN_SENS_LABEL_CHAR_UUID, self._parse_genSens_Label))
+		if self.genSens_AdvMode is None:
+			parameters.append((GenericSensor.GEN_SENS_ADV_MODE_CHAR_UUID, self._parse_genSens_AdvMode))
+		if self.genSens_TxPwrLvl_AdvScan is None:
+			parameters.append((GenericSensor.GEN_SENS_TX_PWR_LVL_CHAR_UUID, self._parse_genSens_TxPwrLvl))
+		return parameters
+
+
+	def _parameters(self) -> list:
+		return super()._parameters() + self._genSens_parameters()
+
+
+	def _parse_genSens_Label(self, data):
+		self.genSens_Label = data.decode("utf-8").strip(" ")
+		self.logger.info("[" + currentFuncName(1) + "] received: " + self.genSens_Label)
+		return self.genSens_Label
+
+
+	def _parse_genSens_AdvMode(self, data):
+		self.genSens_AdvMode = int(format(data[0]))
+
+		if self.genSens_AdvMode == self.ADV_MODE_1:
+			self.connTimeout = self.MAX_ADV_INTERVAL_MODE_1 + self.connTimeout_plus
+			self.logger.info("[" + currentFuncName(1) + "] received: ADV_MODE_1")
+		elif self.genSens_AdvMode == self.ADV_MODE_2:
+			self.connTimeout = self.MAX_ADV_INTERVAL_MODE_2 + self.connTimeout_plus
+			self.logger.info("[" + currentFuncName(1) + "] received: ADV_MODE_2")
+		elif self.genSens_AdvMode == self.ADV_MODE_3:
+			self.connTimeout = self.MAX_ADV_INTERVAL_MODE_3 + self.connTimeout_plus
+			self.logger.info("[" + currentFuncName(1) + "] received: ADV_MODE_3")
+		elif self.genSens_AdvMode == self.ADV_MODE_4:
+			self.connTimeout = self.MAX_ADV_INTERVAL_MODE_4 + self.connTimeout_plus
+			self.logger.info("[" + currentFuncName(1) + "] received: ADV_MODE_4")
+		else:
+			self.connTimeout = self.MAX_ADV_INTERVAL_MODE_4 + self.connTimeout_plus
+			self.logger.warning("[" + currentFuncName(1) + "] received unexpected result: " + str(self.genSens_AdvMode))
+
+		return self.genSens_AdvMode
+
+
+	def _parse_genSens_TxPwrLvl(self, data):
+		self.genSens_TxPwrLvl_AdvScan     = int(format(data[0]))
+		self.genSens_TxPwrLvl_Conn        = int(format(data[1]))
+
+		pwrLvl = ["TX_PWR_LVL_NEG_18_DBM",
+				"TX_PWR_LVL_NEG_12_DBM",
+				"TX_PWR_LVL_NEG_6_DBM",
+				"TX_PWR_LVL_NEG_3_DBM",
+				"TX_PWR_LVL_NEG_2_DBM",
+				"TX_PWR_LVL_NEG_1_DBM",
+				"TX_PWR_LVL_0_DBM",
+				"TX_PWR_LVL_3_DBM",
+				"TX_PWR_LVL_MAX"]
+
+		self.logger.info("[" + currentFuncName(1) + "] received: "
+			+ f"TxPwrLvl_AdvScan: {pwrLvl[self.genSens_TxPwrLvl_AdvScan-1]}\t"
+			+ f"TxPwrLvl_Conn: {pwrLvl[self.genSens_TxPwrLvl_Conn-1]}")
+
+		return self.genSens_TxPwrLvl_AdvScan, self.genSens_TxPwrLvl_Conn
@@ -10,6 +10,9 @@ class Temperature(BleSensorBase):
 	TEMP_TEMPERATURE_CHAR_UUID          = "00002100-0000-1000-8000-00805F9B575A".lower()
 	TEMP_CALIBRATION_DATA_CHAR_UUID     = "00002101-0000-1000-8000-00805F9B575A".lower()
 
+	# --- ADVERTISED MEASUREMENTS --- #
+	ADV_FIELD_TEMPERATURE               = 0x01
+
 	def __init__(self, address, loop=None, **kwargs):
 		super().__init__(address, loop, **kwargs)
 
@@ -36,41 +39,63 @@ class Temperature(BleSensorBase):
 			raise e
 
 
+	def _parse_adv_Temperature(self, value):
+		self.temp_Temperature = value
+		self.logger.info("[" + currentFuncName() + "] advertised: " + str(self.temp_Temperature))
+		return self.temp_Temperature
+
+
+	def _adv_fields(self) -> dict:
+		fields = super()._adv_fields()
+		fields[Temperature.ADV_FIELD_TEMPERATURE] = ("temperature", "<f", self._parse_adv_Temperature)
+		return fields
+
+
 	async def get_temp_CalibrationData(self, **kwargs):
 		if self.temp_CalibrationData_CalA is not None:
 			return list((self.temp_CalibrationData_CalA, self.temp_CalibrationData_CalB)), self.temp_CalibrationData_CalDate
 
 		try:
 			caldata = await self.client.read_gatt_char(Temperature.TEMP_CALIBRATION_DATA_CHAR_UUID, **kwargs)
-
-			self.temp_CalibrationData_CalA = struct.unpack('>H',caldata[:2])[0]
-			self.temp_CalibrationData_CalB = struct.unpack('>h',caldata[2:4])[0]
-
-			i = 0
-			date = ""
-			for i in range(4):
-				date = date + str(chr(caldata[i + 4]))
-			date = date + "/"
-			for i in range(2):
-				date = date + str(chr(caldata[i + 8]))
-			date = date + "/"
-			for i in range(2):
-				date = date + str(chr(caldata[i + 10]))
-
-			self.temp_CalibrationData_CalDate = date
-
-			self.logger.info("[" + currentFuncName() + "] received: "
-				+ f"calA: {self.temp_CalibrationData_CalA}\t"
-				+ f"calB: {self.temp_CalibrationData_CalB}\t"
-				+ f"calDate: {self.temp_CalibrationData_CalDate}")
-
-			return list((self.temp_CalibrationData_CalA, self.temp_CalibrationData_CalB)), self.temp_CalibrationData_CalDate
+			return self._parse_temp_CalibrationData(caldata)
 
 		except Exception as e:
 			self.logger.error("[" + currentFuncName() + "] received exception: " + str(e))
 			raise e
 
 
+	def _parse_temp_CalibrationData(self, caldata):
+		self.temp_CalibrationData_CalA = struct.unpack('>H',caldata[:2])[0]
+		self.temp_CalibrationData_CalB = struct.unpack('>h',caldata[2:4])[0]
+
+		i = 0
+		date = ""
+		for i in range(4):
+			date = date + str(chr(caldata[i + 4]))
+		date = date + "/"
+		for i in range(2):
+			date = date + str(chr(caldata[i + 8]))
+		date = date + "/"
+		for i in range(2):
+			date = date + str(chr(caldata[i + 10]))
+
+		self.temp_CalibrationData_CalDate = date
+
+		self.logger.info("[" + currentFuncName(1) + "] received: "
+			+ f"calA: {self.temp_CalibrationData_CalA}\t"
+			+ f"calB: {self.temp_CalibrationData_CalB}\t"
+			+ f"calDate: {self.temp_CalibrationData_CalDate}")
+
+		return list((self.temp_CalibrationData_CalA, self.temp_CalibrationData_CalB)), self.temp_CalibrationData_CalDate
+
+
+	def _parameters(self) -> list:
+		parameters = super()._parameters()
+		if self.temp_CalibrationData_CalA is None:
+			parameters.append((Temperature.TEMP_CALIBRATION_DATA_CHAR_UUID, self._parse_temp_CalibrationData))
+		return parameters
+
+
 	async def set_temp_CalibrationData(self, calA, calB, **kwargs):
 		try:
 			# Write A and B to bytearray:
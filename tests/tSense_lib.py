@@ -52,18 +52,9 @@ class tSense(GenericSensor, DeviceInformation, Temperature, Battery):
 
 
     async def get_device_parameters(self, keepConnection=None, **kwargs):
-        try:
-            await self.get_genAcc_DeviceName(keepConnection=True, **kwargs)
-        except:
-            pass
-
-        await self.get_devInf(keepConnection=True, **kwargs)
-        await self.get_genSens(keepConnection=True, **kwargs)
-
-        try:
-            await self.get_temp_CalibrationData(keepConnection=keepConnection, **kwargs)
-        except:
-            pass
+        # Device name, device information, generic sensor settings and
+        # calibration data in one bulk read
+        await self.read_parameters(keepConnection=keepConnection)
 
 
     async def measure(self, values: list) -> list:
@@ -71,27 +62,28 @@ class tSense(GenericSensor, DeviceInformation, Temperature, Battery):
 
         await self.connect()
 
+        # Reads are retried with the client's backoff policy, the client
+        # reports every failed attempt to the device's circuit breaker
+        retry = self.client.retry
+
         ret_val = []
         for v in values:
             if v.lower() == "temperature":
-                for i in range(0,3):
-                    try:
-                        result = await self.get_temp_Temperature(keepConnection=True)
-                        ret_val.append(float(result))
-                        break
-                    except:
-                        pass
+                try:
+                    result = await retry.run(self.get_temp_Temperature, keepConnection=True)
+                    ret_val.append(float(result))
+                except:
+                    pass
 
             elif v.lower() == "battery":
-                for i in range(0,3):
-                    try:
-                        result = await self.get_battery_BatteryLevel(keepConnection=True)
-                        ret_val.append(float(result))
-                        break
-                    except:
-                        pass
+                try:
+                    result = await retry.run(self.get_battery_BatteryLevel, keepConnection=True)
+                    ret_val.append(float(result))
+                except:
+                    pass
 
-        await self.disconnect()
+        # Let the link linger so the next measurement can reuse it
+        await self.release()
 
         assert (len(ret_val) > 0), ("[tSense.measure] no valid value was found")
 
@@ -99,6 +91,25 @@ class tSense(GenericSensor, DeviceInformation, Temperature, Battery):
 
 
 
+    async def measure_advertised(self, values: list, timeout=GenericSensor.MAX_ADV_INTERVAL_MODE_4 * 2) -> list:
+        """Like measure, but decodes the values the sensor advertises, without connecting."""
+        assert (values is not None and len(values) > 0), ("[tSense.measure_advertised] values has to be a valid list of strings")
+
+        stream = self.monitor([self])
+        try:
+            _, advertised = await asyncio.wait_for(stream.__anext__(), timeout)
+        except (asyncio.TimeoutError, StopAsyncIteration):
+            advertised = {}
+        finally:
+            await stream.aclose()
+
+        ret_val = [float(advertised[v.lower()]) for v in values if v.lower() in advertised]
+
+        assert (len(ret_val) > 0), ("[tSense.measure_advertised] no valid value was advertised")
+
+        return ret_val
+
+
 
 # -------- FOR TESTS PURPOUSES -------- #
 async def main(loop):
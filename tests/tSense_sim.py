@@ -0,0 +1,88 @@
+# ------------------------------------------------------------------------------#
+# -Description:                                                                -#
+# --Simulated tSense peripherals for the bluelib.sim backend. The attribute   --#
+# --table mirrors the UUIDs used by sensorlib.blesensor so tSense objects can --#
+# --run unchanged against virtual devices.                                    --#
+# ------------------------------------------------------------------------------#
+
+import random
+import struct
+
+from bluelib.sim import SimPeripheral, SimCharacteristic
+from sensorlib.blesensor import GenericSensor, DeviceInformation, Temperature, Battery
+from sensorlib.blesensor.blesensorbase import BleSensorBase
+
+GEN_ACC_SERVICE_UUID    = "00001800-0000-1000-8000-00805f9b34fb"
+DEV_INF_SERVICE_UUID    = "0000180a-0000-1000-8000-00805f9b34fb"
+BATTERY_SERVICE_UUID    = "0000180f-0000-1000-8000-00805f9b34fb"
+GEN_SENS_SERVICE_UUID   = "00001fff-0000-1000-8000-00805f9b575a"
+TEMP_SERVICE_UUID       = "000020ff-0000-1000-8000-00805f9b575a"
+
+
+def make_tsense_peripheral(address, seed=None, temperature=21.5, battery=87,
+                           adv_mode=GenericSensor.ADV_MODE_1, advertise_readings=False, **kwargs):
+    """Build a SimPeripheral exposing the tSense GATT profile.
+
+    With advertise_readings the peripheral also puts its temperature and
+    battery level in its manufacturer data, as read by
+    BleSensorBase.parse_advertisement. Extra keyword arguments (latencies,
+    jitter, drop_rate, ...) are passed on to SimPeripheral.
+    """
+    rng = random.Random(seed)
+
+    def read_temperature():
+        return struct.pack('<f', temperature + rng.uniform(-0.5, 0.5))
+
+    adv_interval = [GenericSensor.MAX_ADV_INTERVAL_MODE_1,
+                    GenericSensor.MAX_ADV_INTERVAL_MODE_2,
+                    GenericSensor.MAX_ADV_INTERVAL_MODE_3,
+                    GenericSensor.MAX_ADV_INTERVAL_MODE_4][adv_mode]
+
+    services = {
+        GEN_ACC_SERVICE_UUID: [
+            SimCharacteristic(BleSensorBase.GEN_ACC_DEVICE_NAME_CHAR_UUID, b"tSense", ("read",)),
+        ],
+        DEV_INF_SERVICE_UUID: [
+            SimCharacteristic(DeviceInformation.DEV_INF_MANUFACTURER_NAME_CHAR_UUID, b"WZL", ("read",)),
+            SimCharacteristic(DeviceInformation.DEV_INF_MODEL_NUMBER_CHAR_UUID, b"tSense", ("read",)),
+            SimCharacteristic(DeviceInformation.DEV_INF_SERIAL_NUMBER_CHAR_UUID, address.replace(":", "").encode(), ("read",)),
+            SimCharacteristic(DeviceInformation.DEV_INF_HARDWARE_REVISION_CHAR_UUID, b"1.0", ("read",)),
+            SimCharacteristic(DeviceInformation.DEV_INF_FIRMWARE_REVISION_CHAR_UUID, b"1.0.0", ("read",)),
+            SimCharacteristic(DeviceInformation.DEV_INF_SOFTWARE_REVISION_CHAR_UUID, b"1.0.0", ("read",)),
+            SimCharacteristic(DeviceInformation.DEV_INF_SYSTEM_ID_CHAR_UUID, bytes(8), ("read",)),
+            SimCharacteristic(DeviceInformation.DEV_INF_IEEE_RCDL_CHAR_UUID, bytes(4), ("read",)),
+            SimCharacteristic(DeviceInformation.DEV_INF_PNP_ID_CHAR_UUID, bytes(7), ("read",)),
+        ],
+        BATTERY_SERVICE_UUID: [
+            SimCharacteristic(Battery.BATTERY_BATTERY_LEVEL_CHAR_UUID, bytes([battery]), ("read", "notify"),
+                              notify_on_subscribe=True),
+        ],
+        GEN_SENS_SERVICE_UUID: [
+            SimCharacteristic(GenericSensor.GEN_SENS_LABEL_CHAR_UUID, b"Virtual tSense"),
+            SimCharacteristic(GenericSensor.GEN_SENS_ADV_MODE_CHAR_UUID, bytes([adv_mode])),
+            SimCharacteristic(GenericSensor.GEN_SENS_TX_PWR_LVL_CHAR_UUID, bytes([GenericSensor.TX_PWR_LVL_0_DBM,
+                                                                                  GenericSensor.TX_PWR_LVL_0_DBM])),
+        ],
+        TEMP_SERVICE_UUID: [
+            SimCharacteristic(Temperature.TEMP_TEMPERATURE_CHAR_UUID, read_temperature, ("read", "notify"),
+                              notify_on_subscribe=True),
+            SimCharacteristic(Temperature.TEMP_CALIBRATION_DATA_CHAR_UUID,
+                              struct.pack('>Hh', 10000, 0) + b"20190101"),
+        ],
+    }
+
+    def advertised_readings():
+        return (bytes([Temperature.ADV_FIELD_TEMPERATURE]) + read_temperature()
+                + bytes([Battery.ADV_FIELD_BATTERY_LEVEL, battery]))
+
+    if advertise_readings:
+        kwargs.setdefault("manufacturer_data", {BleSensorBase.ADV_COMPANY_ID: advertised_readings})
+
+    kwargs.setdefault("adv_interval", adv_interval)
+    kwargs.setdefault("name", "tSense")
+
+    return SimPeripheral(address, services, seed=seed, **kwargs)
+
+
+def sim_address(i):
+    return "57:5a:4c:{:02x}:{:02x}:{:02x}".format((i >> 16) & 0xff, (i >> 8) & 0xff, i & 0xff)